@@ -0,0 +1,59 @@
+"""Time adding tasks one at a time (like cloning or the new task dialog) and in one bulk call.
+
+Run from the repository root:  QT_QPA_PLATFORM=offscreen python -m benchmarks.bench_append
+"""
+import sys
+import time
+
+from PyQt5.QtWidgets import QApplication
+
+from benchmarks.synthetic import makeTasks
+from src.classes.filter_proxy import TaskFilterProxy
+from src.classes.pandas_model import PandasModel
+
+BASE_ROWS = 100_000
+COUNTS = [1_000, 5_000, 10_000]
+
+
+def makeView(rows):
+    """Return a model of rows tasks behind the same filter proxy the main window uses"""
+    model = PandasModel(makeTasks(rows))
+    proxy = TaskFilterProxy()
+    proxy.setSourceModel(model)
+    proxy.setColumnFilter('Status', 'Active')
+    return model, proxy
+
+
+def timeSingle(count):
+    """Append count tasks one call at a time, then read a cell so appended blocks get concatenated"""
+    model, proxy = makeView(BASE_ROWS)
+    new_rows = makeTasks(count).to_dict('records')
+    start = time.perf_counter()
+    for row in new_rows:
+        model.addRows([row])
+    model.getRowObj(model.totalRowCount() - 1)
+    return (time.perf_counter() - start) * 1000
+
+
+def timeBulk(count):
+    """Append count tasks in one call"""
+    model, proxy = makeView(BASE_ROWS)
+    new_rows = makeTasks(count)
+    start = time.perf_counter()
+    model.addRows(new_rows)
+    model.getRowObj(model.totalRowCount() - 1)
+    return (time.perf_counter() - start) * 1000
+
+
+def main(counts):
+    app = QApplication.instance() or QApplication(sys.argv)
+    print('appending to %d rows' % BASE_ROWS)
+    print('rows added'.rjust(10), 'single ms'.rjust(10), 'us per row'.rjust(11), 'bulk ms'.rjust(8))
+    for count in counts:
+        single = timeSingle(count)
+        bulk = timeBulk(count)
+        print(str(count).rjust(10), ('%.0f' % single).rjust(10), ('%.0f' % (single * 1000 / count)).rjust(11), ('%.1f' % bulk).rjust(8))
+
+
+if __name__ == '__main__':
+    main([int(arg) for arg in sys.argv[1:]] or COUNTS)
@@ -0,0 +1,78 @@
+"""Time a cold start of the main window: until it is on screen, and until the tasks are in it.
+
+Each start is a fresh python process in a folder holding a synthetic
+data/task_data.json, so imports are not cached from an earlier run. The window
+should be up in about the same time whatever the table size, only the tasks
+arriving should take longer with more rows.
+
+Run from the repository root:  QT_QPA_PLATFORM=offscreen python -m benchmarks.bench_cold_start [rows ...]
+"""
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+SIZES = [1_000, 100_000, 1_000_000]
+RUNS = 3  # starts per size, the fastest is reported
+
+# started like run.py: time from the first line, open the window in view mode and wait for the tasks
+CHILD = '''
+import time
+started = time.perf_counter()
+launched = time.time()
+import sys, json
+from PyQt5.QtWidgets import QApplication
+from PyQt5.QtCore import QTimer
+app = QApplication(sys.argv)
+from src.classes.main_window import MainWindow
+window = MainWindow(False, None, started)
+def check():
+    if window.loaded_ms is not None:
+        print(json.dumps({'launched': launched, 'shown': window.shown_ms, 'loaded': window.loaded_ms}))
+        app.quit()
+timer = QTimer()
+timer.timeout.connect(check)
+timer.start(5)
+app.exec_()
+'''
+
+
+def makeFolder(rows):
+    """Return a folder with data/ holding rows synthetic tasks and the app's other data files"""
+    from benchmarks.synthetic import makeTasks
+    from src.classes.row_ids import withIds
+    folder = tempfile.mkdtemp(prefix='cold_start_')
+    os.makedirs(os.path.join(folder, 'data'))
+    for name in ['type_data.json', 'computer.ico']:
+        shutil.copy(os.path.join('data', name), os.path.join(folder, 'data', name))
+    withIds(makeTasks(rows)).to_json(os.path.join(folder, 'data', 'task_data.json'))
+    return folder
+
+
+def coldStart(folder):
+    """Return (python start ms, window shown ms, tasks loaded ms) for one start of the window in folder"""
+    env = dict(os.environ, PYTHONPATH=os.getcwd(), QT_QPA_PLATFORM=os.environ.get('QT_QPA_PLATFORM', 'offscreen'))
+    env.pop('TASK_TRACKER_PROFILE', None)
+    spawned = time.time()
+    output = subprocess.run([sys.executable, '-c', CHILD], cwd=folder, env=env, capture_output=True, text=True, check=True).stdout
+    times = json.loads(output.strip().splitlines()[-1])
+    python_ms = (times['launched'] - spawned) * 1000
+    return python_ms, python_ms + times['shown'], python_ms + times['loaded']
+
+
+def main(sizes):
+    print('rows'.rjust(10), 'python ms'.rjust(10), 'window shown ms'.rjust(16), 'tasks loaded ms'.rjust(16))
+    for rows in sizes:
+        folder = makeFolder(rows)
+        try:
+            best = min((coldStart(folder) for _ in range(RUNS)), key=lambda times: times[1])
+        finally:
+            shutil.rmtree(folder, ignore_errors=True)
+        print(str(rows).rjust(10), ('%.0f' % best[0]).rjust(10), ('%.0f' % best[1]).rjust(16), ('%.0f' % best[2]).rjust(16))
+
+
+if __name__ == '__main__':
+    main([int(arg) for arg in sys.argv[1:]] or SIZES)
@@ -0,0 +1,52 @@
+"""Time the per cell and per header calls the view makes while painting: flags() and headerData().
+
+Both should cost the same whatever the table size, a lookup rather than a
+walk over the columns. A page is the cells and headers a maximised window
+shows at once.
+
+Run from the repository root:  QT_QPA_PLATFORM=offscreen python -m benchmarks.bench_flags
+"""
+import sys
+import time
+
+from PyQt5.QtCore import Qt
+from PyQt5.QtWidgets import QApplication
+
+from benchmarks.synthetic import makeTasks
+from src.classes.pandas_model import PandasModel
+
+SIZES = [1_000, 1_000_000]
+CALLS = 200_000
+PAGE_ROWS = 40
+
+
+def perCall(func, args):
+    """Return microseconds per call of func over a list of argument tuples"""
+    start = time.perf_counter()
+    for arg in args:
+        func(*arg)
+    return (time.perf_counter() - start) * 1e6 / len(args)
+
+
+def main():
+    app = QApplication.instance() or QApplication(sys.argv)
+    print('rows'.rjust(10), 'mode'.rjust(5), 'flags us'.rjust(9), 'header us'.rjust(10), 'columnIndex us'.rjust(15), 'page us'.rjust(8))
+    for rows in SIZES:
+        model = PandasModel(makeTasks(rows))
+        columns = model.columnCount()
+        names = model.getColumnNames()
+        cells = [(model.index(i % PAGE_ROWS, i % columns),) for i in range(CALLS)]
+        headers = [(i % columns, Qt.Horizontal, Qt.DisplayRole) for i in range(CALLS)]
+        lookups = [(names[i % columns],) for i in range(CALLS)]
+        for editable in (False, True):
+            model.editable = editable
+            flags = perCall(model.flags, cells)
+            header = perCall(model.headerData, headers)
+            lookup = perCall(model.columnIndex, lookups)
+            page = flags * PAGE_ROWS * columns + header * columns
+            print(str(rows).rjust(10), ('edit' if editable else 'view').rjust(5), ('%.2f' % flags).rjust(9), ('%.2f' % header).rjust(10),
+                  ('%.2f' % lookup).rjust(15), ('%.0f' % page).rjust(8))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,138 @@
+"""Simulate many launchers editing the same data folder at once on one machine.
+
+Each launcher is a separate process that takes a session lease, then saves a
+series of edits (one cell it owns plus one new row) through a TaskStore, so every
+save contends for the journal lock and merges the other launchers' batches.
+Some launchers crash partway, leaving their lease behind. The harness reports
+lock waits, timeouts and save rates, then checks that no save was lost and that the
+crashed launchers' leases expired on their own.
+
+Run from the repository root:  QT_QPA_PLATFORM=offscreen python -m benchmarks.bench_leases [launchers]
+"""
+import json
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+
+from benchmarks.synthetic import makeTasks
+from src.classes.row_ids import withIds
+
+LAUNCHERS = [4, 16, 32]
+SAVES = 20  # saves per launcher
+BASE_ROWS = 1_000
+TTL = 2.0  # short lease so expiry can be watched within the run
+CRASH_EVERY = 4  # every fourth launcher dies without releasing its lease
+
+
+def launcher(folder, number, start_at):
+    """Take a lease and save edits like an editing session would (worker process)"""
+    from PyQt5.QtCore import QCoreApplication, Qt
+    from src.classes.pandas_model import PandasModel
+    from src.classes.session_lease import SessionLease, activeSessions
+    from src.classes.task_store import TaskStore
+
+    app = QCoreApplication.instance() or QCoreApplication([])
+    # start together so the launches themselves contend
+    time.sleep(max(0, start_at - time.time()))
+    key = 'launcher-{0} {1}'.format(number, os.getpid())
+    seen = len(activeSessions(os.path.join(folder, 'sessions')))
+    lease = SessionLease(os.path.join(folder, 'sessions'), key, ttl=TTL)
+    lease.acquire()
+
+    store = TaskStore(os.path.join(folder, 'task_data.json'), os.path.join(folder, 'task_journal.jsonl'),
+                      compact_threshold=200, session=key)
+    model = PandasModel(store.load(), store)
+    notes = model.getColumnNames().index('Notes')
+    waits = []
+    timeouts = 0
+    crash = number % CRASH_EVERY == CRASH_EVERY - 1
+    for save in range(SAVES):
+        model.setData(model.createIndex(number, notes), 'launcher {0} save {1}'.format(number, save), Qt.EditRole)
+        model.addRows([{'Title': 'launcher {0} row {1}'.format(number, save)}])
+        started = time.perf_counter()
+        while True:
+            try:
+                conflicts = model.saveToJson()
+                break
+            except TimeoutError:
+                # what the save dialog asks the user to do
+                timeouts += 1
+        waits.append((time.perf_counter() - started) * 1000)
+        # record progress after every save, a crashing launcher never gets to report at the end
+        with open(os.path.join(folder, 'result-{0}.json'.format(number)), 'w') as f:
+            json.dump({'saves': save + 1, 'waits': waits, 'conflicts': len(conflicts), 'timeouts': timeouts, 'seen': seen}, f)
+        if crash and save == SAVES // 2:
+            os._exit(1)
+    lease.release()
+
+
+def run(count):
+    """Run count launchers against a fresh data folder and check the result"""
+    from src.classes.session_lease import activeSessions
+    from src.classes.task_store import TaskStore
+
+    folder = tempfile.mkdtemp()
+    withIds(makeTasks(BASE_ROWS)).to_json(os.path.join(folder, 'task_data.json'))
+    start_at = time.time() + 1.0
+    started = time.perf_counter()
+    processes = [multiprocessing.Process(target=launcher, args=(folder, number, start_at)) for number in range(count)]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join()
+    elapsed = time.perf_counter() - started - 1.0
+
+    results = []
+    for number in range(count):
+        with open(os.path.join(folder, 'result-{0}.json'.format(number))) as f:
+            results.append(json.load(f))
+    waits = sorted(wait for result in results for wait in result['waits'])
+    saves = sum(result['saves'] for result in results)
+
+    # every save must be in the data, with each launcher's cell holding its last value
+    data = TaskStore(os.path.join(folder, 'task_data.json'), os.path.join(folder, 'task_journal.jsonl')).load()
+    lost = BASE_ROWS + saves - data.shape[0]
+    for number, result in enumerate(results):
+        if data['Notes'].iloc[number] != 'launcher {0} save {1}'.format(number, result['saves'] - 1):
+            lost += 1
+
+    # crashed launchers' leases stay until they expire, then the next launch drops them
+    crashed = len([number for number in range(count) if number % CRASH_EVERY == CRASH_EVERY - 1])
+    left = len(activeSessions(os.path.join(folder, 'sessions')))
+    time.sleep(TTL)
+    remaining = len(activeSessions(os.path.join(folder, 'sessions')))
+    return {
+        'launchers': count,
+        'saves': saves,
+        'saves_per_s': saves / elapsed,
+        'wait_p50_ms': waits[len(waits) // 2],
+        'wait_p99_ms': waits[min(len(waits) - 1, int(len(waits) * 0.99))],
+        'wait_max_ms': waits[-1],
+        'conflicts': sum(result['conflicts'] for result in results),
+        'timeouts': sum(result['timeouts'] for result in results),
+        'lost_saves': lost,
+        'crashed': crashed,
+        'stale_leases': left,
+        'leases_after_ttl': remaining,
+    }
+
+
+def main(counts):
+    print('launchers'.rjust(9), 'saves'.rjust(6), 'saves/s'.rjust(8), 'p50 ms'.rjust(7), 'p99 ms'.rjust(7), 'max ms'.rjust(7),
+          'conflicts'.rjust(9), 'timeouts'.rjust(8), 'lost'.rjust(5), 'crashed'.rjust(8), 'stale'.rjust(6), 'after ttl'.rjust(9))
+    ok = True
+    for count in counts:
+        result = run(count)
+        print(str(result['launchers']).rjust(9), str(result['saves']).rjust(6), ('%.0f' % result['saves_per_s']).rjust(8),
+              ('%.1f' % result['wait_p50_ms']).rjust(7), ('%.1f' % result['wait_p99_ms']).rjust(7), ('%.1f' % result['wait_max_ms']).rjust(7),
+              str(result['conflicts']).rjust(9), str(result['timeouts']).rjust(8), str(result['lost_saves']).rjust(5), str(result['crashed']).rjust(8), str(result['stale_leases']).rjust(6), str(result['leases_after_ttl']).rjust(9))
+        ok = ok and result['lost_saves'] == 0 and result['leases_after_ttl'] == 0
+    if not ok:
+        print('FAILED: saves were lost or stale leases did not expire')
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main([int(arg) for arg in sys.argv[1:]] or LAUNCHERS)
@@ -0,0 +1,28 @@
+"""Compare the memory used by the task table as loaded (python strings) and as the model stores it.
+
+Run from the repository root:  python -m benchmarks.bench_memory
+"""
+import sys
+
+from benchmarks.synthetic import makeTasks
+from src.classes.column_types import TEXT_DTYPE, compactFrame
+
+SIZES = [1_000_000]
+
+
+def main(sizes):
+    print('free text stored as', TEXT_DTYPE)
+    for rows in sizes:
+        data = makeTasks(rows)
+        compact = compactFrame(data)
+        before = data.memory_usage(deep=True, index=False)
+        after = compact.memory_usage(deep=True, index=False)
+        print('\n%d rows' % rows)
+        print('column'.ljust(14), 'type'.rjust(16), 'before MB'.rjust(10), 'after MB'.rjust(9))
+        for col in data.columns:
+            print(col.ljust(14), str(compact[col].dtype).rjust(16), ('%.1f' % (before[col] / 1e6)).rjust(10), ('%.1f' % (after[col] / 1e6)).rjust(9))
+        print('total'.ljust(14), ''.rjust(16), ('%.1f' % (before.sum() / 1e6)).rjust(10), ('%.1f' % (after.sum() / 1e6)).rjust(9))
+
+
+if __name__ == '__main__':
+    main([int(arg) for arg in sys.argv[1:]] or SIZES)
@@ -0,0 +1,48 @@
+"""Compare save latency for a single-cell edit: full json rewrite vs. TaskStore journal.
+
+Run from the repository root:  python -m benchmarks.bench_save
+"""
+import os
+import sys
+import tempfile
+import time
+
+from benchmarks.synthetic import makeTasks
+from src.classes.row_ids import withIds
+from src.classes.task_store import TaskStore
+
+SIZES = [1_000, 100_000, 1_000_000]
+
+
+def timeIt(func):
+    """Return how long func takes in milliseconds"""
+    start = time.perf_counter()
+    func()
+    return (time.perf_counter() - start) * 1000
+
+
+def main(sizes):
+    print('rows'.rjust(10), 'full rewrite ms'.rjust(16), 'journal ms'.rjust(12), 'journal bytes'.rjust(14))
+    for rows in sizes:
+        data = withIds(makeTasks(rows))
+        with tempfile.TemporaryDirectory() as folder:
+            snapshot = os.path.join(folder, 'task_data.json')
+            journal = os.path.join(folder, 'task_journal.jsonl')
+            data.to_json(snapshot)
+            store = TaskStore(snapshot, journal, compact_threshold=10**9)
+            data = store.load()
+
+            # baseline: rewrite the whole table
+            full = timeIt(lambda: data.to_json(snapshot))
+
+            # journal: append one cell edit
+            data.iloc[rows // 2, 0] = 'Edited'
+            store.recordUpdate(rows // 2, 'Title', 'Edited')
+            before = os.path.getsize(journal) if os.path.exists(journal) else 0
+            journaled = timeIt(lambda: store.commit(lambda: data))
+            written = os.path.getsize(journal) - before
+        print(str(rows).rjust(10), ('%.2f' % full).rjust(16), ('%.2f' % journaled).rjust(12), str(written).rjust(14))
+
+
+if __name__ == '__main__':
+    main([int(arg) for arg in sys.argv[1:]] or SIZES)
@@ -0,0 +1,41 @@
+"""Time re-filtering the task view for each keystroke typed into the search bar.
+
+Run from the repository root:  QT_QPA_PLATFORM=offscreen python -m benchmarks.bench_search
+"""
+import sys
+import time
+
+from PyQt5.QtWidgets import QApplication
+
+from benchmarks.synthetic import makeTasks
+from src.classes.filter_proxy import TaskFilterProxy
+from src.classes.pandas_model import PandasModel
+
+SIZES = [1_000, 10_000, 100_000]
+QUERY = 'printer 42'
+
+
+def main(sizes):
+    app = QApplication.instance() or QApplication(sys.argv)
+    print('rows'.rjust(10), 'first key ms'.rjust(13), 'mean key ms'.rjust(12), 'max key ms'.rjust(11), 'clear ms'.rjust(9))
+    for rows in sizes:
+        model = PandasModel(makeTasks(rows))
+        proxy = TaskFilterProxy()
+        proxy.setSourceModel(model)
+        proxy.setColumnFilter('Status', 'Active')
+
+        # type the query one character at a time, then clear it
+        times = []
+        for end in range(1, len(QUERY) + 1):
+            start = time.perf_counter()
+            proxy.setSearchText(QUERY[:end])
+            times.append((time.perf_counter() - start) * 1000)
+        start = time.perf_counter()
+        proxy.setSearchText('')
+        cleared = (time.perf_counter() - start) * 1000
+        print(str(rows).rjust(10), ('%.1f' % times[0]).rjust(13), ('%.1f' % (sum(times[1:]) / len(times[1:]))).rjust(12),
+              ('%.1f' % max(times[1:])).rjust(11), ('%.1f' % cleared).rjust(9))
+
+
+if __name__ == '__main__':
+    main([int(arg) for arg in sys.argv[1:]] or SIZES)
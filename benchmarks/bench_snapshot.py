@@ -0,0 +1,74 @@
+"""Compare json and Arrow snapshots: file size, writing one, and loading the tasks from it.
+
+Loading is timed on its own (TaskStore.load) and up to the model being built
+from the result, once with an empty journal and once with a journal of edits
+and new tasks on top (compact_threshold changes, the most it holds before it
+is folded into a new snapshot).
+
+Run from the repository root:  python -m benchmarks.bench_snapshot [rows ...]
+"""
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+from PyQt5.QtWidgets import QApplication
+
+from benchmarks.synthetic import makeTasks
+from src.classes.pandas_model import PandasModel
+from src.classes.row_ids import withIds
+from src.classes.task_store import TaskStore
+
+SIZES = [10_000, 100_000, 1_000_000]
+JOURNAL_CHANGES = 2000
+
+
+def timeIt(func):
+    """Return (result, ms) for calling func"""
+    start = time.perf_counter()
+    result = func()
+    return result, (time.perf_counter() - start) * 1000
+
+
+def measure(rows, snapshot_format):
+    """Return (MB, write ms, load ms, model ms, load with journal ms) for one snapshot format"""
+    folder = tempfile.mkdtemp(prefix='snapshot_')
+    try:
+        store = TaskStore(os.path.join(folder, 'task_data.json'), os.path.join(folder, 'task_journal.jsonl'),
+                          compact_threshold=JOURNAL_CHANGES + 1, snapshot_format=snapshot_format)
+        model = PandasModel(withIds(makeTasks(rows)))
+        _, write_ms = timeIt(lambda: store.compact(model.getDataFrame()))
+        path = store.arrow_path if snapshot_format == 'arrow' else store.snapshot_path
+        size = os.path.getsize(path) / 1e6
+
+        store = TaskStore(store.snapshot_path, store.journal_path, compact_threshold=JOURNAL_CHANGES + 1, snapshot_format=snapshot_format)
+        data, load_ms = timeIt(store.load)
+        _, model_ms = timeIt(lambda: PandasModel(data, store))
+
+        # a journal of edits and new tasks, saved in batches of ten
+        for batch in range(JOURNAL_CHANGES // 10):
+            for i in range(5):
+                store.recordUpdate((batch * 97 + i * 13) % rows, 'Notes', 'note %d' % batch)
+            store.recordInsert([['new task %d' % batch] + [''] * (len(data.columns) - 1)] * 5)
+            store.commit(lambda: None)
+        store = TaskStore(store.snapshot_path, store.journal_path, snapshot_format=snapshot_format)
+        _, journal_ms = timeIt(lambda: PandasModel(store.load(), store))
+        return size, write_ms, load_ms, model_ms, journal_ms
+    finally:
+        shutil.rmtree(folder, ignore_errors=True)
+
+
+def main(sizes):
+    app = QApplication.instance() or QApplication(sys.argv)
+    print('rows'.rjust(10), 'format'.rjust(7), 'MB'.rjust(7), 'write ms'.rjust(9), 'load ms'.rjust(8), 'model ms'.rjust(9),
+          'journal+model ms'.rjust(17))
+    for rows in sizes:
+        for snapshot_format in ['json', 'arrow']:
+            size, write_ms, load_ms, model_ms, journal_ms = measure(rows, snapshot_format)
+            print(str(rows).rjust(10), snapshot_format.rjust(7), ('%.1f' % size).rjust(7), ('%.0f' % write_ms).rjust(9),
+                  ('%.1f' % load_ms).rjust(8), ('%.1f' % model_ms).rjust(9), ('%.0f' % journal_ms).rjust(17))
+
+
+if __name__ == '__main__':
+    main([int(arg) for arg in sys.argv[1:]] or SIZES)
@@ -0,0 +1,47 @@
+"""Time from handing a loaded task table to the model until the table view first paints.
+
+Run from the repository root:  QT_QPA_PLATFORM=offscreen python -m benchmarks.bench_startup
+"""
+import sys
+import time
+
+from PyQt5.QtWidgets import QApplication, QHeaderView, QTableView
+
+from benchmarks.synthetic import makeTasks
+from src.classes.filter_proxy import TaskFilterProxy
+from src.classes.pandas_model import PandasModel
+
+SIZES = [1_000, 10_000, 100_000, 1_000_000]
+
+
+def firstPaint(app, data):
+    """Build the model/proxy/view stack like MainWindow and return ms until it has painted"""
+    start = time.perf_counter()
+    model = PandasModel(data)
+    proxy = TaskFilterProxy()
+    proxy.setSourceModel(model)
+    proxy.setColumnFilter('Status', 'Active')
+    view = QTableView()
+    view.setModel(proxy)
+    view.verticalHeader().hide()
+    view.verticalHeader().setSectionResizeMode(QHeaderView.Fixed)
+    view.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
+    view.resize(1600, 900)
+    view.show()
+    view.viewport().grab()
+    app.processEvents()
+    elapsed = (time.perf_counter() - start) * 1000
+    view.close()
+    return elapsed, proxy.rowCount()
+
+
+def main(sizes):
+    app = QApplication.instance() or QApplication(sys.argv)
+    print('rows'.rjust(10), 'first paint ms'.rjust(15), 'rows shown'.rjust(13))
+    for rows in sizes:
+        elapsed, fetched = firstPaint(app, makeTasks(rows))
+        print(str(rows).rjust(10), ('%.1f' % elapsed).rjust(15), str(fetched).rjust(13))
+
+
+if __name__ == '__main__':
+    main([int(arg) for arg in sys.argv[1:]] or SIZES)
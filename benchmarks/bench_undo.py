@@ -0,0 +1,73 @@
+"""Measure what the undo history costs: memory per recorded edit, and undoing and redoing an import.
+
+Edits are kept as (row, column, old, new) steps, so the history should grow by a
+few hundred bytes per edit whatever the table size, and undoing an import should
+take time in proportion to the imported rows rather than to the whole table.
+
+Run from the repository root:  QT_QPA_PLATFORM=offscreen python -m benchmarks.bench_undo
+"""
+import sys
+import time
+import tracemalloc
+
+from PyQt5.QtCore import Qt
+from PyQt5.QtWidgets import QApplication
+
+from benchmarks.synthetic import makeTasks
+from src.classes.filter_proxy import TaskFilterProxy
+from src.classes.pandas_model import PandasModel
+
+EDITS = [1_000, 10_000]
+TABLE_ROWS = [1_000, 100_000, 1_000_000]
+IMPORT_ROWS = 5_000
+
+
+def historyBytes(edits):
+    """Return bytes the history holds after edits cell edits"""
+    model = PandasModel(makeTasks(10_000))
+    notes = model.getColumnNames().index('Notes')
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    for row in range(edits):
+        model.history.recordEdit(row % 10_000, notes, 'old note %d' % row, 'new note %d' % row)
+    used = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    return used
+
+
+def timeImport(rows):
+    """Return (undo ms, redo ms) for an import of IMPORT_ROWS tasks into a table of rows tasks"""
+    model = PandasModel(makeTasks(rows))
+    proxy = TaskFilterProxy()
+    proxy.setSourceModel(model)
+    proxy.setColumnFilter('Status', 'Active')
+    model.addRows(makeTasks(IMPORT_ROWS))
+    # an edit to an imported row rides along with it
+    model.setData(model.createIndex(rows, 0), 'edited import', Qt.EditRole)
+    model.undo()
+    start = time.perf_counter()
+    model.undo()
+    undo = (time.perf_counter() - start) * 1000
+    start = time.perf_counter()
+    model.redo()
+    redo = (time.perf_counter() - start) * 1000
+    assert model.totalRowCount() == rows + IMPORT_ROWS
+    return undo, redo
+
+
+def main():
+    app = QApplication.instance() or QApplication(sys.argv)
+    print('edits'.rjust(8), 'history KB'.rjust(11), 'bytes/edit'.rjust(11))
+    for edits in EDITS:
+        used = historyBytes(edits)
+        print(str(edits).rjust(8), ('%.0f' % (used / 1024)).rjust(11), ('%.0f' % (used / edits)).rjust(11))
+    print()
+    print('undo and redo of a %d row import' % IMPORT_ROWS)
+    print('table rows'.rjust(10), 'undo ms'.rjust(8), 'redo ms'.rjust(8))
+    for rows in TABLE_ROWS:
+        undo, redo = timeImport(rows)
+        print(str(rows).rjust(10), ('%.1f' % undo).rjust(8), ('%.1f' % redo).rjust(8))
+
+
+if __name__ == '__main__':
+    main()
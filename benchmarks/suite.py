@@ -0,0 +1,350 @@
+"""Headless benchmark suite for the model, filter, search, scroll, import, export and save paths.
+
+Each case runs in a fresh process under Qt's offscreen platform against a
+synthetic task table, so one case's caches and memory never skew the next, and
+the process's peak memory is recorded with its timings. Results are printed as
+a table and written as json. Give a previous results file to --compare to list
+the metrics that got slower or bigger since.
+
+Spreadsheet imports and xlsx exports are capped at FILE_ROWS rows, reading or
+writing a million row workbook takes minutes without telling more.
+
+Run from the repository root:
+    python -m benchmarks.suite [--rows 1000 10000 ...] [--cases data scroll ...] [--out results.json] [--compare old.json]
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+SIZES = [1_000, 10_000, 100_000, 1_000_000]
+FILE_ROWS = 100_000  # most rows written to or read from an xlsx file
+QUERY = 'printer 42'
+TYPING_MS = 80  # pause between simulated keystrokes
+SCROLL_PAGES = 200  # pages scrolled through the table view
+TOLERANCE = 0.2  # relative change --compare reports as a regression
+
+
+def timeIt(func):
+    """Return how long func takes in milliseconds"""
+    start = time.perf_counter()
+    func()
+    return (time.perf_counter() - start) * 1000
+
+
+def makeModel(rows, store=None):
+    """Return a model of rows synthetic tasks behind the filter proxy the main window uses"""
+    from benchmarks.synthetic import makeTasks
+    from src.classes.filter_proxy import TaskFilterProxy
+    from src.classes.pandas_model import PandasModel
+    model = PandasModel(store.load() if store is not None else makeTasks(rows), store)
+    proxy = TaskFilterProxy()
+    proxy.setSourceModel(model)
+    proxy.setColumnFilter('Status', 'Active')
+    return model, proxy
+
+
+def makeStore(rows, folder):
+    """Return a TaskStore over a snapshot of rows synthetic tasks"""
+    from benchmarks.synthetic import makeTasks
+    from src.classes.row_ids import withIds
+    from src.classes.task_store import TaskStore
+    # saved with ids, so the first save is not the one that writes them out
+    withIds(makeTasks(rows)).to_json(os.path.join(folder, 'task_data.json'))
+    return TaskStore(os.path.join(folder, 'task_data.json'), os.path.join(folder, 'task_journal.jsonl'))
+
+
+def caseLoad(rows, folder):
+    """Read the json snapshot, then build the model and proxy from it"""
+    from src.classes.pandas_model import PandasModel
+    store = makeStore(rows, folder)
+    loaded = {}
+    load = timeIt(lambda: loaded.setdefault('data', store.load()))
+    model = timeIt(lambda: loaded.setdefault('model', PandasModel(loaded['data'], store)))
+    return {'load_ms': load, 'model_ms': model}
+
+
+def caseData(rows, folder):
+    """Read cells through PandasModel.data, from parts of the table not shown yet and then again"""
+    from PyQt5.QtCore import Qt
+    model, proxy = makeModel(rows)
+    columns = model.columnCount()
+    spread = [row * (rows // 200) for row in range(200)] if rows >= 200 else list(range(rows))
+    cold = timeIt(lambda: [model.data(model.createIndex(row, 0), Qt.DisplayRole) for row in spread]) / len(spread)
+    indexes = [model.createIndex(row, col) for row in range(min(50, rows)) for col in range(columns)]
+    warm = timeIt(lambda: [model.data(index, Qt.DisplayRole) for _ in range(20) for index in indexes]) / (20 * len(indexes))
+    return {'cold_cell_us': cold * 1000, 'warm_cell_us': warm * 1000}
+
+
+def caseHeader(rows, folder):
+    """Ask for header text and cell flags the way a painting view does"""
+    from PyQt5.QtCore import Qt
+    model, proxy = makeModel(rows)
+    calls = 20_000
+    sections = [row % min(rows, 500) for row in range(calls)]
+    vertical = timeIt(lambda: [model.headerData(section, Qt.Vertical, Qt.DisplayRole) for section in sections]) / calls
+    horizontal = timeIt(lambda: [model.headerData(section % model.columnCount(), Qt.Horizontal, Qt.DisplayRole) for section in sections]) / calls
+    indexes = [model.createIndex(section, section % model.columnCount()) for section in sections]
+    flags = timeIt(lambda: [model.flags(index) for index in indexes]) / calls
+    return {'vertical_header_us': vertical * 1000, 'horizontal_header_us': horizontal * 1000, 'flags_us': flags * 1000}
+
+
+def caseFilter(rows, folder):
+    """Attach the proxy, filter to active tasks, sort and remove the filter"""
+    from benchmarks.synthetic import makeTasks
+    from src.classes.filter_proxy import TaskFilterProxy
+    from src.classes.pandas_model import PandasModel
+    model = PandasModel(makeTasks(rows))
+    proxy = TaskFilterProxy()
+    attach = timeIt(lambda: proxy.setSourceModel(model))
+    filtered = timeIt(lambda: proxy.setColumnFilter('Status', 'Active'))
+    sort = timeIt(lambda: proxy.sort(0))
+    unfiltered = timeIt(lambda: proxy.setColumnFilter('Status', None))
+    return {'attach_ms': attach, 'filter_ms': filtered, 'sort_ms': sort, 'unfilter_ms': unfiltered}
+
+
+def caseSearch(rows, folder):
+    """Type a query into a search bar wired up like the main window's, key by key"""
+    from PyQt5.QtWidgets import QApplication, QLineEdit
+    from src.classes.search_runner import SearchRunner
+    app = QApplication.instance()
+    model, proxy = makeModel(rows)
+    # synchronous filtering per key, as without the debounce
+    keys = [timeIt(lambda: proxy.setSearchText(QUERY[:end])) for end in range(1, len(QUERY) + 1)]
+    proxy.setSearchText('')
+
+    # typing at a steady pace through the debounced runner, watching how long the event loop stalls
+    runner = SearchRunner(model, proxy)
+    search_bar = QLineEdit()
+    search_bar.textChanged.connect(runner.setText)
+    shown = []
+    runner.statsChanged.connect(lambda message: shown.append(time.perf_counter()))
+    stall = 0.0
+    for char in QUERY:
+        until = time.perf_counter() + TYPING_MS / 1000
+        while time.perf_counter() < until:
+            start = time.perf_counter()
+            app.processEvents()
+            stall = max(stall, (time.perf_counter() - start) * 1000)
+        search_bar.insert(char)
+    typed = time.perf_counter()
+    while not shown or shown[-1] < typed:
+        start = time.perf_counter()
+        app.processEvents()
+        stall = max(stall, (time.perf_counter() - start) * 1000)
+        if time.perf_counter() - typed > 60:
+            break
+    runner.stop()
+    return {'first_key_ms': keys[0], 'key_ms': sum(keys[1:]) / len(keys[1:]),
+            'typed_to_result_ms': ((shown[-1] if shown else time.perf_counter()) - typed) * 1000, 'max_stall_ms': stall}
+
+
+def caseScroll(rows, folder):
+    """Page down through a table view, painting every page"""
+    from PyQt5.QtWidgets import QApplication, QHeaderView, QTableView
+    app = QApplication.instance()
+    model, proxy = makeModel(rows)
+    view = QTableView()
+    view.setModel(proxy)
+    view.verticalHeader().setSectionResizeMode(QHeaderView.Fixed)
+    view.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
+    view.resize(1600, 900)
+    view.show()
+    first = timeIt(lambda: (view.viewport().grab(), app.processEvents()))
+    bar = view.verticalScrollBar()
+    frames = []
+    for _ in range(SCROLL_PAGES):
+        start = time.perf_counter()
+        bar.setValue(bar.value() + bar.pageStep())
+        app.processEvents()
+        view.viewport().grab()
+        frames.append((time.perf_counter() - start) * 1000)
+    shown = view.rowAt(0)
+    view.close()
+    frames.sort()
+    return {'first_paint_ms': first, 'page_ms': sum(frames) / len(frames), 'page_p95_ms': frames[int(len(frames) * 0.95)],
+            'page_max_ms': frames[-1], 'rows_scrolled': shown}
+
+
+def caseImport(rows, folder):
+    """Read a spreadsheet through the import path and append its tasks"""
+    from openpyxl import Workbook
+    from benchmarks.synthetic import makeTasks
+    from src.classes.excel_import import ExcelImport
+    count = min(rows, FILE_ROWS)
+    path = os.path.join(folder, 'import.xlsx')
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet('Tasks')
+    tasks = makeTasks(count)
+    sheet.append(tasks.columns.tolist())
+    for row in tasks.itertuples(index=False):
+        sheet.append(list(row))
+    workbook.save(path)
+
+    model, proxy = makeModel(rows)
+    importer = ExcelImport(path, model.getColumnNames(), {})
+    read = timeIt(lambda: [None for _ in importer.chunks()])
+    append = timeIt(lambda: model.addRows(importer.rows))
+    return {'import_rows': count, 'read_ms': read, 'append_ms': append}
+
+
+def caseExport(rows, folder):
+    """Write every task to csv (and parquet with pyarrow), and up to FILE_ROWS to xlsx"""
+    import numpy as np
+    from src.classes.task_export import TaskExport
+    model, proxy = makeModel(rows)
+    data = model.getDataFrame()
+
+    def export(path, rows=None):
+        for _ in TaskExport(path, data, rows).chunks():
+            pass
+    results = {'csv_ms': timeIt(lambda: export(os.path.join(folder, 'tasks.csv')))}
+    results['xlsx_ms'] = timeIt(lambda: export(os.path.join(folder, 'tasks.xlsx'), np.arange(min(rows, FILE_ROWS))))
+    try:
+        import pyarrow
+        results['parquet_ms'] = timeIt(lambda: export(os.path.join(folder, 'tasks.parquet')))
+    except ImportError:
+        pass
+    return results
+
+
+def caseSave(rows, folder):
+    """Save one edit and a few new tasks through the journal, then fold everything into a new snapshot"""
+    from PyQt5.QtCore import Qt
+    from benchmarks.synthetic import makeTasks
+    store = makeStore(rows, folder)
+    model, proxy = makeModel(rows, store)
+    model.setData(model.createIndex(rows // 2, 0), 'Edited', Qt.EditRole)
+    edit = timeIt(model.saveToJson)
+    model.addRows(makeTasks(100))
+    append = timeIt(model.saveToJson)
+    compact = timeIt(lambda: store.compact(model.getDataFrame()))
+    return {'edit_save_ms': edit, 'append_save_ms': append, 'compact_ms': compact}
+
+
+CASES = {
+    'load': caseLoad,
+    'data': caseData,
+    'header': caseHeader,
+    'filter': caseFilter,
+    'search': caseSearch,
+    'scroll': caseScroll,
+    'import': caseImport,
+    'export': caseExport,
+    'save': caseSave,
+}
+
+
+def peakMemory():
+    """Return the most memory this process has used, in MB (None where it cannot be read)"""
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # linux reports kilobytes, macos bytes
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+
+def runCase(name, rows, results):
+    """Run one case and put its metrics on the results queue (worker process)"""
+    os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+    from PyQt5.QtWidgets import QApplication
+    app = QApplication.instance() or QApplication([])
+    with tempfile.TemporaryDirectory() as folder:
+        metrics = CASES[name](rows, folder)
+    metrics['peak_mb'] = peakMemory()
+    results.put(metrics)
+
+
+def measure(name, rows):
+    """Run a case in a fresh process and return its metrics (with an error message if it failed)"""
+    context = multiprocessing.get_context('spawn')
+    results = context.Queue()
+    process = context.Process(target=runCase, args=(name, rows, results))
+    process.start()
+    metrics = None
+    while metrics is None and (process.is_alive() or not results.empty()):
+        try:
+            metrics = results.get(timeout=1)
+        except Exception:
+            pass
+    process.join()
+    return metrics if metrics is not None else {'error': 'exited with code {0}'.format(process.exitcode)}
+
+
+def commitId():
+    """Return the checked out git commit, or '' outside a git checkout"""
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return ''
+
+
+def compare(old, new, tolerance):
+    """Print how each metric changed since an older results file, returning the regressions"""
+    before = {(result['case'], result['rows']): result['metrics'] for result in old['results']}
+    regressions = []
+    print('\ncompared with {0} ({1})'.format(old.get('commit') or 'unknown commit', old.get('created', '')))
+    print('case'.ljust(8), 'rows'.rjust(9), 'metric'.ljust(22), 'before'.rjust(10), 'after'.rjust(10), 'change'.rjust(8))
+    for result in new['results']:
+        metrics = before.get((result['case'], result['rows']), {})
+        for metric, value in result['metrics'].items():
+            # times and sizes are better lower, counts are only context
+            if not metric.endswith(('_ms', '_us', '_mb')) or metrics.get(metric) is None or value is None:
+                continue
+            change = (value - metrics[metric]) / metrics[metric] if metrics[metric] else 0.0
+            worse = change > tolerance
+            if worse:
+                regressions.append((result['case'], result['rows'], metric))
+            print(result['case'].ljust(8), str(result['rows']).rjust(9), metric.ljust(22), formatValue(metrics[metric]).rjust(10),
+                  formatValue(value).rjust(10), ('%+.0f%%' % (change * 100)).rjust(8), 'WORSE' if worse else '')
+    return regressions
+
+
+def formatValue(value):
+    """Format a metric for the tables"""
+    if isinstance(value, float):
+        return '%.1f' % value if value >= 1 else '%.3f' % value
+    return str(value)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Time the task tracker\'s hot paths on synthetic tables.')
+    parser.add_argument('--rows', type=int, nargs='+', default=SIZES, help='table sizes to run')
+    parser.add_argument('--cases', nargs='+', choices=list(CASES), default=list(CASES), help='cases to run')
+    parser.add_argument('--out', help='results file to write (default bench_results_<commit>.json)')
+    parser.add_argument('--compare', help='earlier results file to compare with')
+    parser.add_argument('--tolerance', type=float, default=TOLERANCE, help='relative change counted as a regression')
+    args = parser.parse_args()
+
+    results = {'commit': commitId(), 'created': datetime.now().isoformat(timespec='seconds'), 'python': platform.python_version(),
+               'platform': platform.platform(), 'results': []}
+    print('case'.ljust(8), 'rows'.rjust(9), 'metrics')
+    for name in args.cases:
+        for rows in args.rows:
+            metrics = measure(name, rows)
+            results['results'].append({'case': name, 'rows': rows, 'metrics': metrics})
+            print(name.ljust(8), str(rows).rjust(9), '  '.join('{0}={1}'.format(metric, formatValue(value)) for metric, value in metrics.items()))
+            sys.stdout.flush()
+
+    out = args.out or 'bench_results_{0}.json'.format(results['commit'] or 'local')
+    with open(out, 'w') as f:
+        json.dump(results, f, indent=1)
+    print('\nwrote', out)
+    if args.compare:
+        with open(args.compare) as f:
+            regressions = compare(json.load(f), results, args.tolerance)
+        if regressions:
+            print('\n{0} metrics regressed by more than {1:.0%}'.format(len(regressions), args.tolerance))
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,19 @@
+"""Synthetic task tables shared by the benchmarks"""
+import pandas as pd
+
+COLUMNS = ['Title', 'Description', 'Category', 'Subtasks', 'Priority', 'Date Created', 'Status', 'Timeline', 'Notes']
+
+
+def makeTasks(rows):
+    """Return a synthetic task table with the given amount of rows"""
+    return pd.DataFrame({
+        'Title': ['Task ' + str(i) for i in range(rows)],
+        'Description': ['Replace the toner in printer ' + str(i % 97) for i in range(rows)],
+        'Category': [['Network', 'Hardware', 'Software'][i % 3] for i in range(rows)],
+        'Subtasks': ['' for _ in range(rows)],
+        'Priority': [['High', 'Medium', 'Low'][i % 3] for i in range(rows)],
+        'Date Created': ['2024-01-%02d' % (i % 28 + 1) for i in range(rows)],
+        'Status': ['Active' if i % 4 else 'Completed 2024-02-01' for i in range(rows)],
+        'Timeline': ['1 week' for _ in range(rows)],
+        'Notes': ['' for _ in range(rows)],
+    }, columns=COLUMNS)
@@ -1,12 +1,9 @@
 from PyQt5.QtWidgets import QLineEdit, QFormLayout, QVBoxLayout, QLabel, QDialog, QDialogButtonBox, QMessageBox, QComboBox
 from datetime import date
-import pandas as pd
-import json
-from pathlib import Path
 
 
 class NewTask(QDialog):
-    def __init__(self, model):
+    def __init__(self, model, option_store):
         """Create a form that creates a new row from user input"""
         super(NewTask, self).__init__()
 
@@ -17,10 +14,8 @@ class NewTask(QDialog):
         self.setWindowTitle("Add New Task")
         self.setGeometry(100, 100, 300, 400)
 
-        # get options from json
-        from src.run import resource_path
-        with open(resource_path(Path('data/type_data.json')), 'r') as f:
-            options = json.load(f)
+        # get options (already in memory)
+        options = option_store.options()
 
         # set up widgets
         self.title = QLineEdit()
@@ -87,13 +82,13 @@ class NewTask(QDialog):
 
         # create a new row
         results = [title, description, category, subtasks, priority, date_created, status, timeline, notes]
-        new_record = pd.DataFrame([results], columns=self.model.getColumnNames())
+        new_record = dict(zip(self.model.getColumnNames(), results))
 
         self.close()
         
         # add the new row to dataframe and reindex
         try:
-            if self.model.addRows(new_record):
+            if self.model.addRows([new_record]):
                 QMessageBox.information(None, 'Successfully Added', title+' was successfully added.')
         except Exception as e:
             QMessageBox.critical(None, 'Failed Add Rows', str(e))
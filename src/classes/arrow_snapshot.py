@@ -0,0 +1,47 @@
+"""Task snapshots in the Arrow IPC file format (needs pyarrow).
+
+The table is written in its compact column types: categoricals as dictionary
+columns, dates as timestamps, ids as int64 and text as arrow strings. Reading
+takes the file's bytes as they are, so the columns are views into one buffer
+and nothing is parsed or allocated per value. A JSON snapshot is hashed to
+name it, this file carries a random name in its schema metadata instead, so
+reading never has to go through every byte.
+"""
+from src.classes.column_types import compactFrame, TEXT_DTYPE
+
+DIGEST_KEY = b'task_tracker_digest'  # schema metadata naming the snapshot for the journal header
+
+try:
+    import pyarrow as pa
+except ImportError:
+    pa = None
+
+
+def available():
+    """Return if pyarrow is installed, which reading and writing these snapshots needs"""
+    return pa is not None
+
+
+def toArrow(data, digest):
+    """Return data as the bytes of an Arrow IPC file named digest"""
+    table = pa.Table.from_pandas(compactFrame(data), preserve_index=False)
+    metadata = dict(table.schema.metadata or {})
+    metadata[DIGEST_KEY] = digest.encode('utf-8')
+    table = table.replace_schema_metadata(metadata)
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_file(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue().to_pybytes()
+
+
+def fromArrow(raw):
+    """Return (data, digest) for the bytes of an Arrow IPC file"""
+    if pa is None:
+        raise ValueError('Reading a binary snapshot needs the pyarrow package, which is not installed')
+    # the columns point into raw rather than being copied out of it
+    table = pa.ipc.open_file(pa.py_buffer(raw)).read_all()
+    digest = (table.schema.metadata or {}).get(DIGEST_KEY)
+    if digest is None:
+        raise ValueError('Not a task snapshot')
+    strings = {pa.string(): TEXT_DTYPE, pa.large_string(): TEXT_DTYPE} if TEXT_DTYPE is not object else {}
+    return table.to_pandas(types_mapper=strings.get), digest.decode('utf-8')
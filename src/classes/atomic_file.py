@@ -0,0 +1,120 @@
+"""Crash safe file writes.
+
+A file is written to a temp file next to it, flushed to disk and swapped into
+place in one rename, so a crash or a reader opening it mid save only ever sees
+the old or the new contents in full. Optionally a few previous versions are kept
+beside it (path.1 is the newest), and readLatest falls back to them when the
+file itself cannot be read.
+"""
+import os
+import tempfile
+import time
+
+REPLACE_TRIES = 20  # a reader holding the file open on windows makes a rename fail briefly
+
+
+def writeAtomic(path, raw, generations=0):
+    """Replace the file at path with bytes, keeping up to generations previous versions"""
+    folder = os.path.dirname(path) or '.'
+    # a unique temp name, so sessions saving the same file at once don't write into each other's
+    fd, temp_path = tempfile.mkstemp(dir=folder, prefix=os.path.basename(path) + '.', suffix='.tmp')
+    try:
+        # temp files are private, give the new file the permissions the old one had
+        os.chmod(temp_path, _mode(path))
+        with os.fdopen(fd, 'wb') as f:
+            f.write(raw)
+            f.flush()
+            os.fsync(f.fileno())
+        if generations > 0 and os.path.exists(path):
+            try:
+                _rotate(path, generations)
+            except OSError:
+                # keeping old versions is best effort (another session may be rotating them too)
+                pass
+        _replace(temp_path, path)
+    except BaseException:
+        _remove(temp_path)
+        raise
+    _syncFolder(folder)
+
+
+def readLatest(path, parse, generations=0):
+    """Return (value, path read) for the newest version of a file that parse(bytes) accepts.
+
+    The file itself is tried first, then its kept generations from newest to oldest.
+    The error from the file itself is raised if no version can be read.
+    """
+    error = None
+    for candidate in generationPaths(path, generations):
+        try:
+            with open(candidate, 'rb') as f:
+                return parse(f.read()), candidate
+        except (OSError, ValueError) as e:
+            if error is None:
+                error = e
+    raise error
+
+
+def generationPaths(path, generations):
+    """Return the file's path followed by its kept generations, newest first"""
+    return [path] + ['{0}.{1}'.format(path, number) for number in range(1, generations + 1)]
+
+
+def _rotate(path, generations):
+    """Shift the kept versions back by one and keep the current file as path.1"""
+    paths = generationPaths(path, generations)
+    for older, newer in zip(reversed(paths[1:]), reversed(paths[1:-1])):
+        if os.path.exists(newer):
+            _replace(newer, older)
+    # a hard link keeps the current file readable at path until the new one replaces it
+    _remove(paths[1])
+    try:
+        os.link(path, paths[1])
+    except OSError:
+        # file systems without hard links get a copy instead
+        with open(path, 'rb') as source, open(paths[1], 'wb') as copy:
+            copy.write(source.read())
+
+
+def _replace(source, target):
+    """Rename source over target, retrying while another process has target open"""
+    for attempt in range(REPLACE_TRIES):
+        try:
+            os.replace(source, target)
+            return
+        except PermissionError:
+            if attempt == REPLACE_TRIES - 1:
+                raise
+            time.sleep(0.05)
+
+
+def _mode(path):
+    """Return the permission bits of the file being replaced, or readable by everyone if it is new"""
+    try:
+        return os.stat(path).st_mode & 0o777
+    except OSError:
+        return 0o644
+
+
+def _syncFolder(folder):
+    """Flush the folder entry so the rename itself survives a power cut (not possible on windows)"""
+    if os.name == 'nt':
+        return
+    try:
+        fd = os.open(folder, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+def _remove(path):
+    """Delete a file if it is there"""
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
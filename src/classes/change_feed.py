@@ -0,0 +1,121 @@
+from PyQt5.QtCore import QObject, QFileSystemWatcher, QTimer, pyqtSignal
+from concurrent.futures import ThreadPoolExecutor
+import os
+
+DEBOUNCE_MS = 200  # wait for a burst of file events to settle before reading
+POLL_MS = 5000  # fallback check for shared drives that never report file changes
+
+
+class ChangeFeed(QObject):
+    """Pull changes other sessions save into the model while it is open.
+
+    A file watcher on the store's files reacts as soon as a save lands, and a
+    slower timer covers shared drives that do not deliver change notifications.
+    Each check is a stat of the journal (or one query in sqlite), and only the
+    batches saved since the last sync are read and applied, so a refresh costs
+    as much as the rows that changed. When the saves this session missed were
+    folded away and every task has to be read again, that read happens on a
+    worker thread and is applied once it is done.
+    """
+    changesApplied = pyqtSignal()  # the model was updated with other sessions' changes
+    conflictsFound = pyqtSignal(object)  # unsaved edits that lost to another session's
+    _reloaded = pyqtSignal(object, object)  # the store's sync point before a reload, and what it read (or None)
+
+    def __init__(self, model, store):
+        """Start watching store's files for saves from other sessions"""
+        super().__init__()
+        # set up variables
+        self.model = model
+        self.store = store
+        self._reloading = False  # every task is being read again on the worker thread
+        self._executor = ThreadPoolExecutor(max_workers=1)
+        self._reloaded.connect(self._applyReload)
+
+        # read a little after the last event, so one save is only read once
+        self._debounce = QTimer(self)
+        self._debounce.setSingleShot(True)
+        self._debounce.setInterval(DEBOUNCE_MS)
+        self._debounce.timeout.connect(self.refresh)
+
+        self._watcher = QFileSystemWatcher(self)
+        self._watchFiles()
+        self._watcher.fileChanged.connect(self._fileChanged)
+        self._watcher.directoryChanged.connect(self._fileChanged)
+
+        self._poll = QTimer(self)
+        self._poll.setInterval(POLL_MS)
+        self._poll.timeout.connect(self.refresh)
+        self._poll.start()
+
+    def stop(self):
+        """Stop watching"""
+        self._poll.stop()
+        self._debounce.stop()
+        self._watcher.removePaths(self._watcher.files() + self._watcher.directories())
+        self._executor.shutdown(wait=False)
+
+    def refresh(self):
+        """Apply anything other sessions saved since the last sync"""
+        if self._reloading or not self.store.hasNewChanges():
+            return
+        version = self.model.version()
+        # never read every task (or wait out a compaction) on the gui thread
+        conflicts = self.model.pullChanges(reload=False)
+        if conflicts is None:
+            self._reloading = True
+            self._executor.submit(self._reload, self.store.syncPoint())
+            return
+        self._applied(version, conflicts)
+
+    def _reload(self, sync_point):
+        """Read every task again (worker thread)"""
+        try:
+            reloaded = self.store.reloaded()
+        except Exception:
+            # the files were caught mid write, the next check tries again
+            reloaded = None
+        # handed back to the gui thread through a queued signal
+        self._reloaded.emit(sync_point, reloaded)
+
+    def _applyReload(self, sync_point, reloaded):
+        """Apply the tasks read on the worker thread"""
+        self._reloading = False
+        if reloaded is None:
+            return
+        version = self.model.version()
+        conflicts = self.model.pullReloaded(sync_point, reloaded)
+        if conflicts is None:
+            # this session saved or synced during the read, so look again
+            self._debounce.start()
+            return
+        self._applied(version, conflicts)
+
+    def _applied(self, version, conflicts):
+        """Report what pulling changed"""
+        if conflicts:
+            self.conflictsFound.emit(conflicts)
+        if self.model.version() != version:
+            self.changesApplied.emit()
+
+    def _fileChanged(self, path):
+        """Read the new changes once the burst of events from one save is over"""
+        # a file replaced by a compaction stops being watched, so watch the new one
+        self._watchFiles()
+        self._debounce.start()
+
+    def _watchFiles(self):
+        """Make sure every existing store file is being watched, and the folder of any not created yet"""
+        watched = self._watcher.files()
+        folders = set()
+        for path in self.store.watchPaths():
+            if os.path.exists(path):
+                if path not in watched:
+                    self._watcher.addPath(path)
+            else:
+                # the first save creates the file
+                folders.add(os.path.dirname(os.path.abspath(path)))
+        for folder in self._watcher.directories():
+            if folder not in folders:
+                self._watcher.removePath(folder)
+        for folder in folders - set(self._watcher.directories()):
+            self._watcher.addPath(folder)
@@ -0,0 +1,163 @@
+"""Fit one session's unsaved changes on top of changes other sessions saved first.
+
+Stores call these while holding their write lock. Changes use the journal's format
+({'op': 'update' | 'insert' | 'remove' | 'clear', ...}) and rows are positions. A
+session's own new rows always sit after the saved ones, so rows saved by others are
+slotted in before them. Pending changes only remove this session's new rows: saved
+rows are removed while committing, once the session has caught up. Edits are
+checked per cell: a cell another session changed to a different value keeps their
+value, and the local edit is reported as a conflict.
+"""
+
+
+def rebaseChanges(pending, foreign, saved_rows):
+    """Rebase pending changes over foreign ones read from the journal.
+
+    foreign is a list of (session, change) saved by other sessions since this one
+    last synced, when saved_rows rows were saved. Returns (pending, conflicts, rows):
+    the changes still to write (moved past rows the others added or removed), the
+    dropped edits, and the amount of saved rows once the foreign changes are applied.
+    """
+    rows = saved_rows
+    theirs = {}  # (row, column) -> (value, session) for cells the others changed, by row as of the last sync
+    gone = []  # ranges of this session's saved rows the others removed
+    for session, change in foreign:
+        # the others' rows start with what is left of the saved ones
+        kept = saved_rows - _removedBefore(gone, saved_rows)
+        if change['op'] == 'update':
+            if change['row'] < kept:
+                theirs[(_savedRow(gone, change['row']), change['column'])] = (change['value'], session)
+        elif change['op'] == 'insert':
+            rows += len(change['rows'])
+        elif change['op'] == 'remove':
+            end = min(change['start'] + change['count'], kept)
+            if change['start'] < end:
+                _addRange(gone, _savedRow(gone, change['start']), _savedRow(gone, end - 1) + 1)
+            rows -= change['count']
+        elif change['op'] == 'clear':
+            rows = 0
+            theirs = {}
+            gone = [(0, saved_rows)]
+
+    # judge each edited cell by the last value this session gave it
+    mine = _finalValues(pending, saved_rows)
+    conflicts = []
+    dropped = set()
+    for (row, column), value in mine.items():
+        if _removedBefore(gone, row + 1) > _removedBefore(gone, row):
+            # the row was removed by another session
+            conflicts.append(_conflict((row, column), value, None, None))
+            dropped.add((row, column))
+        elif (row, column) in theirs and str(theirs[(row, column)][0]) != str(value):
+            # reported at the row's position once the others' changes are in
+            conflicts.append(_conflict((row - _removedBefore(gone, row), column), value, *theirs[(row, column)]))
+            dropped.add((row, column))
+    return _shifted(pending, dropped, saved_rows, rows - saved_rows, gone), conflicts, rows
+
+
+def rebaseOnData(pending, fresh, saved_rows):
+    """Rebase pending changes onto a freshly loaded table (when the journal no longer covers them).
+
+    Each edited cell is compared with the value it had before this session edited it.
+    Returns (pending, conflicts, changes), where changes turn the session's saved rows
+    into fresh and then reapply the edits that were kept.
+    """
+    columns = fresh.columns.tolist()
+    base = {}  # (row, column) -> value before this session's first edit
+    for change in pending:
+        if change['op'] == 'update' and change['row'] < saved_rows:
+            base.setdefault((change['row'], change['column']), change.get('old'))
+
+    mine = _finalValues(pending, saved_rows)
+    conflicts = []
+    dropped = set()
+    for (row, column), value in mine.items():
+        if row >= fresh.shape[0] or column not in columns:
+            conflicts.append(_conflict((row, column), value, None, None))
+            dropped.add((row, column))
+            continue
+        current = str(fresh.iat[row, columns.index(column)])
+        if current != str(value) and current != str(base[(row, column)]):
+            conflicts.append(_conflict((row, column), value, current, None))
+            dropped.add((row, column))
+
+    changes = [{'op': 'clear'}, {'op': 'insert', 'rows': fresh.values.tolist()}]
+    changes += [{'op': 'update', 'row': row, 'column': column, 'value': value}
+                for (row, column), value in mine.items() if (row, column) not in dropped]
+    return _shifted(pending, dropped, saved_rows, fresh.shape[0] - saved_rows), conflicts, changes
+
+
+def hasClear(pending):
+    """Return if pending drops every row, which makes anything saved before it irrelevant"""
+    return any(change['op'] == 'clear' for change in pending)
+
+
+def rowsAfter(pending, saved_rows):
+    """Return how many rows there are once pending is applied to saved_rows rows"""
+    rows = saved_rows
+    for change in pending:
+        if change['op'] == 'insert':
+            rows += len(change['rows'])
+        elif change['op'] == 'remove':
+            rows -= change['count']
+        elif change['op'] == 'clear':
+            rows = 0
+    return rows
+
+
+def _finalValues(pending, saved_rows):
+    """Return (row, column) -> last pending value, for cells in rows that were already saved"""
+    values = {}
+    for change in pending:
+        if change['op'] == 'update' and change['row'] < saved_rows:
+            values[(change['row'], change['column'])] = change['value']
+    return values
+
+
+def _shifted(pending, dropped, saved_rows, shift, gone=()):
+    """Return pending without the dropped cells' edits, with new rows moved by shift and saved rows moved past gone ones"""
+    kept = []
+    for change in pending:
+        if change['op'] == 'update':
+            if change['row'] >= saved_rows:
+                change = dict(change, row=change['row'] + shift)
+            elif (change['row'], change['column']) in dropped:
+                continue
+            elif gone:
+                change = dict(change, row=change['row'] - _removedBefore(gone, change['row']))
+        elif change['op'] in ('insert', 'remove') and 'start' in change:
+            change = dict(change, start=change['start'] + shift)
+        kept.append(change)
+    return kept
+
+
+def _removedBefore(gone, row):
+    """Return how many rows before row are in the gone ranges"""
+    return sum(min(end, row) - start for start, end in gone if start < row)
+
+
+def _savedRow(gone, position):
+    """Return the saved row now at position, skipping the gone ranges"""
+    row = position
+    for start, end in gone:
+        if start <= row:
+            row += end - start
+        else:
+            break
+    return row
+
+
+def _addRange(gone, start, end):
+    """Add rows start to end (exclusive) to the sorted, separate gone ranges"""
+    merged = []
+    for range_start, range_end in sorted(gone + [(start, end)]):
+        if merged and range_start <= merged[-1][1]:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], range_end))
+        else:
+            merged.append((range_start, range_end))
+    gone[:] = merged
+
+
+def _conflict(key, mine, theirs, session):
+    """Describe an edit that lost to another session's (theirs is None when the row was removed)"""
+    return {'row': key[0], 'column': key[1], 'mine': mine, 'theirs': theirs, 'session': session}
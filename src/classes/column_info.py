@@ -0,0 +1,35 @@
+from PyQt5.QtCore import Qt
+
+from src.classes.column_types import CATEGORY_COLUMNS, ID_COLUMN
+
+READ_ONLY_COLUMNS = CATEGORY_COLUMNS + [ID_COLUMN]  # values picked from a menu, and ids that never change
+READ_FLAGS = Qt.ItemIsSelectable | Qt.ItemIsEnabled
+EDIT_FLAGS = Qt.ItemIsEditable | Qt.ItemIsEnabled
+
+
+class ColumnInfo:
+    """What the model answers about its columns, worked out once per set of columns.
+
+    flags() and headerData() are called for every cell and header the view
+    paints, so names, positions and each column's item flags are kept in a tuple
+    and a dict instead of being read off the dataframe's columns each time. The
+    model makes a new one when its columns change.
+    """
+
+    def __init__(self, names):
+        """Work out the lookups for columns names (in table order)"""
+        self.names = tuple(names)
+        self.positions = {name: i for i, name in enumerate(self.names)}
+        # flags per column while the table is editable (it is read only otherwise)
+        self.edit_flags = tuple(READ_FLAGS if name in READ_ONLY_COLUMNS else EDIT_FLAGS for name in self.names)
+
+    def position(self, name):
+        """Return a column's position, raising ValueError for an unknown column like list.index does"""
+        try:
+            return self.positions[name]
+        except KeyError:
+            raise ValueError('{0!r} is not a column'.format(name)) from None
+
+    def matches(self, names):
+        """Return if these lookups are for columns names"""
+        return len(names) == len(self.names) and all(a == b for a, b in zip(names, self.names))
@@ -0,0 +1,221 @@
+import numpy as np
+import pandas as pd
+
+CATEGORY_COLUMNS = ['Status', 'Category', 'Priority']  # a handful of distinct values, stored as categoricals
+DATE_COLUMNS = ['Date Created']  # stored as datetime64 while every value is a date
+ID_COLUMN = 'ID'  # each task's stable id, stored as int64 in the last column
+DATE_FORMAT = '%Y-%m-%d'
+
+# free text is kept as arrow strings when pyarrow is installed, otherwise as python strings
+try:
+    import pyarrow
+    TEXT_DTYPE = pd.StringDtype('pyarrow')
+except ImportError:
+    TEXT_DTYPE = object
+
+
+def compactFrame(data, options=None):
+    """Return data with every column converted to its compact type.
+
+    options maps categorical columns to their known values (from type_data.json),
+    which become the first categories so their order matches the options.
+    """
+    options = options or {}
+    columns = {col: compactColumn(col, data[col], options.get(col)) for col in data.columns}
+    return pd.DataFrame(columns, columns=data.columns)
+
+
+def compactColumn(name, values, categories=None):
+    """Convert one column's values (anything list-like) to the column's compact type"""
+    values = pd.Series(values, dtype=object) if not isinstance(values, pd.Series) else values
+    if name == ID_COLUMN:
+        return _idColumn(values)
+    # columns that already have their compact type (read from a binary snapshot) are kept as they are
+    if name in CATEGORY_COLUMNS and isinstance(values.dtype, pd.CategoricalDtype):
+        codes = values.cat.codes.to_numpy()
+        labels = [str(value) for value in values.cat.categories]
+        if (codes == -1).any():
+            codes = np.where(codes == -1, len(labels), codes)
+            labels.append('')
+        return _categoryColumn(codes, labels, list(categories or []))
+    if name in DATE_COLUMNS and pd.api.types.is_datetime64_any_dtype(values.dtype):
+        return values.reset_index(drop=True)
+    if name not in CATEGORY_COLUMNS and name not in DATE_COLUMNS and pd.api.types.infer_dtype(values, skipna=True) == 'string':
+        # text that is already all strings converts directly, without finding its distinct values
+        values = values.fillna('').reset_index(drop=True)
+        return values if TEXT_DTYPE is object else values.astype(TEXT_DTYPE)
+    codes, labels = _factorized(values)
+    if name in CATEGORY_COLUMNS:
+        return _categoryColumn(codes, labels, list(categories or []))
+    if name in DATE_COLUMNS:
+        dates = _parseDates(labels)
+        if dates is not None:
+            return pd.Series(dates.to_numpy()[codes])
+    return _textColumn(codes, labels)
+
+
+def extendColumn(column, values):
+    """Return column with values (display strings) appended, keeping its compact type where possible"""
+    if pd.api.types.is_integer_dtype(column.dtype):
+        return pd.concat([column, _idColumn(pd.Series(values, dtype=object))], ignore_index=True)
+    codes, labels = _factorized(values)
+    if isinstance(column.dtype, pd.CategoricalDtype):
+        tail = _categoryColumn(codes, labels, list(column.cat.categories))
+        if len(tail.cat.categories) > len(column.cat.categories):
+            column = column.cat.add_categories(tail.cat.categories[len(column.cat.categories):])
+    elif pd.api.types.is_datetime64_any_dtype(column.dtype):
+        dates = _parseDates(labels)
+        if dates is None:
+            # a value that is not a date turns the column back into text
+            column = _textColumn(*_factorized(displayArray(column)))
+            tail = _textColumn(codes, labels)
+        else:
+            tail = pd.Series(dates.to_numpy()[codes])
+    else:
+        tail = _textColumn(codes, labels)
+    if len(column) == 0:
+        return tail
+    return pd.concat([column, tail], ignore_index=True)
+
+
+def appendRows(frame, rows):
+    """Return frame with rows (value lists in column order) appended"""
+    columns = {}
+    for i, col in enumerate(frame.columns):
+        columns[col] = extendColumn(frame[col].reset_index(drop=True), [row[i] for row in rows])
+    return pd.DataFrame(columns, columns=frame.columns)
+
+
+def setCell(frame, row, col, value):
+    """Store value in a cell of frame (in place) and return its display string"""
+    name = frame.columns[col]
+    column = frame[name]
+    text = _factorized([value])[1][0]
+    if isinstance(column.dtype, pd.CategoricalDtype):
+        if text not in column.cat.categories:
+            frame[name] = column.cat.add_categories([text])
+        frame.iloc[row, col] = text
+    elif pd.api.types.is_datetime64_any_dtype(column.dtype):
+        date = _parseDates([text])
+        if date is None:
+            # a value that is not a date turns the column back into text
+            frame[name] = _textColumn(*_factorized(displayArray(column))).set_axis(frame.index)
+            frame.iloc[row, col] = text
+        else:
+            frame.iloc[row, col] = date.iloc[0]
+            text = displayArray(date)[0]
+    elif pd.api.types.is_integer_dtype(column.dtype):
+        frame.iloc[row, col] = int(text)
+    else:
+        frame.iloc[row, col] = text
+    return text
+
+
+def displayArray(column):
+    """Return a column's values as an object array of display strings"""
+    if isinstance(column.dtype, pd.CategoricalDtype):
+        # format each category once and look the codes up
+        labels = np.array([str(value) for value in column.cat.categories] + [''], dtype=object)
+        return labels[column.cat.codes.to_numpy()]
+    if pd.api.types.is_datetime64_any_dtype(column.dtype):
+        codes, uniques = pd.factorize(column)
+        labels = np.array([value.strftime(DATE_FORMAT) for value in uniques] + [''], dtype=object)
+        return labels[codes]
+    if isinstance(column.dtype, pd.StringDtype):
+        return column.to_numpy(dtype=object, na_value='')
+    return np.array(list(map(str, column.tolist())), dtype=object)
+
+
+def displayValue(value):
+    """Return one value (as held in appended rows) as the display string it gets once stored in a column"""
+    # missing values are stored as blanks, see _factorized
+    if pd.api.types.is_scalar(value) and pd.isna(value):
+        return ''
+    return str(value)
+
+
+def plainFrame(data):
+    """Return data with every column as display strings, for writing to disk"""
+    return pd.DataFrame({col: displayArray(data[col]) for col in data.columns}, columns=data.columns)
+
+
+def isCompact(name, column):
+    """Return if a column has its compact type already (rather than values as read from json)"""
+    if name == ID_COLUMN:
+        return pd.api.types.is_integer_dtype(column.dtype)
+    return isinstance(column.dtype, (pd.CategoricalDtype, pd.StringDtype)) or pd.api.types.is_datetime64_any_dtype(column.dtype)
+
+
+def plainValues(name, column):
+    """Return a column's values as a new object array: display strings if it is compact, otherwise as they are"""
+    if isCompact(name, column):
+        return displayArray(column)
+    return column.to_numpy(dtype=object, copy=True)
+
+
+def rawFrame(data):
+    """Return data with its compact columns as display strings, the way a json snapshot reads"""
+    return pd.DataFrame({col: plainValues(col, data[col]) for col in data.columns}, columns=data.columns)
+
+
+def sortKey(column):
+    """Return an array whose ascending order is the column's display order"""
+    if isinstance(column.dtype, pd.CategoricalDtype):
+        labels = [str(value) for value in column.cat.categories]
+        # rank the categories by their text, blanks (code -1) first like an empty string would be
+        ranks = np.empty(len(labels) + 1, dtype=np.int64)
+        ranks[np.argsort(np.array(labels + [''], dtype=object), kind='stable')] = np.arange(len(labels) + 1)
+        return ranks[column.cat.codes.to_numpy()]
+    if pd.api.types.is_datetime64_any_dtype(column.dtype):
+        return column.to_numpy().view(np.int64)  # NaT is the smallest value, so blanks sort first
+    if pd.api.types.is_integer_dtype(column.dtype):
+        return column.to_numpy()
+    return displayArray(column)
+
+
+def _factorized(values):
+    """Return (codes, labels) for values, where labels are the distinct values as strings and missing values are ''"""
+    codes, uniques = pd.factorize(pd.Series(list(values) if not hasattr(values, 'dtype') else values, dtype=object))
+    labels = [str(value) for value in uniques]
+    if (codes == -1).any():
+        codes = np.where(codes == -1, len(labels), codes)
+        labels.append('')
+    # values like 1 and '1' display the same, so give them one label
+    if len(set(labels)) != len(labels):
+        merged = {}
+        remap = np.array([merged.setdefault(label, len(merged)) for label in labels], dtype=np.int64)
+        codes, labels = remap[codes], list(merged)
+    return codes, labels
+
+
+def _categoryColumn(codes, labels, categories):
+    """Return a categorical series with categories first, then any new labels"""
+    positions = {value: i for i, value in enumerate(categories)}
+    for label in labels:
+        if label not in positions:
+            positions[label] = len(categories)
+            categories.append(label)
+    remap = np.array([positions[label] for label in labels], dtype=np.int64)
+    return pd.Series(pd.Categorical.from_codes(remap[codes], categories=categories))
+
+
+def _parseDates(labels):
+    """Return labels as a datetime64 series, or None if one of them is not a date"""
+    dates = pd.to_datetime(pd.Series(labels, dtype=object).replace('', None), format=DATE_FORMAT, errors='coerce')
+    blanks = sum(1 for label in labels if label == '')
+    if dates.isna().to_numpy().sum() != blanks:
+        return None
+    return dates
+
+
+def _idColumn(values):
+    """Return task ids (numbers or their text) as an int64 series, -1 where one is missing"""
+    return pd.to_numeric(values.reset_index(drop=True), errors='coerce').fillna(-1).astype(np.int64)
+
+
+def _textColumn(codes, labels):
+    """Return a text series, sharing one string object between equal values"""
+    text = np.array(labels, dtype=object)[codes] if len(codes) else np.array([], dtype=object)
+    if TEXT_DTYPE is object:
+        return pd.Series(text)
+    return pd.Series(text, dtype=TEXT_DTYPE)
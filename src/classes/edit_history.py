@@ -0,0 +1,168 @@
+from PyQt5.QtCore import QObject, pyqtSignal
+
+HISTORY_STEPS = 10000  # undo steps kept, the oldest are dropped after this
+
+
+class EditHistory(QObject):
+    """Undo and redo steps for one session's changes to the model.
+
+    Steps hold only what changed, as small lists the model reads back:
+    ['edit', row, column, old, new], ['insert', start, count, values, refs] and
+    ['clear', data]. An insert's values are only kept once it is undone (to put
+    the rows back on redo), and refs lists the edits to its rows that were undone
+    before it, as (step, offset) while its rows are gone. Rows are positions, so
+    the model reports rows other sessions add or remove and the steps are moved
+    to match.
+    """
+    changed = pyqtSignal()  # a step was added, undone or redone
+
+    def __init__(self):
+        """Start with nothing to undo"""
+        super().__init__()
+        self._undo = []
+        self._redo = []
+
+    def recordEdit(self, row, column, old, new):
+        """Add a cell edit"""
+        self._record(['edit', row, column, old, new])
+
+    def recordInsert(self, start, count):
+        """Add rows appended from start on"""
+        self._record(['insert', start, count, None, []])
+
+    def recordClear(self, data):
+        """Add dropping every row, keeping the dropped dataframe to restore"""
+        # the rows older steps point at are gone, so the clear is as far back as undo goes
+        self._undo = []
+        self._record(['clear', data])
+
+    def attach(self, undo, redo):
+        """Call undo() and redo() alongside the last step (for changes made outside the model)"""
+        if self._undo:
+            self._undo[-1].append((undo, redo))
+
+    def canUndo(self):
+        """Return if there is a step to undo"""
+        return len(self._undo) != 0
+
+    def canRedo(self):
+        """Return if there is a step to redo"""
+        return len(self._redo) != 0
+
+    def undoText(self):
+        """Return a short description of the step undo would revert"""
+        return self._describe(self._undo[-1]) if self._undo else ''
+
+    def redoText(self):
+        """Return a short description of the step redo would apply"""
+        return self._describe(self._redo[-1]) if self._redo else ''
+
+    def nextUndo(self):
+        """Return the step undo would revert, or None"""
+        return self._undo[-1] if self._undo else None
+
+    def popUndo(self):
+        """Take the step to undo off the history"""
+        return self._undo.pop() if self._undo else None
+
+    def popRedo(self):
+        """Take the step to redo off the history"""
+        return self._redo.pop() if self._redo else None
+
+    def undone(self, step):
+        """Keep a step that was undone for redo"""
+        self._redo.append(step)
+        self._runHooks(step, 0)
+        self.changed.emit()
+
+    def redone(self, step):
+        """Keep a step that was redone for undo"""
+        self._undo.append(step)
+        self._runHooks(step, 1)
+        self.changed.emit()
+
+    def insertUndone(self, step, values):
+        """Keep an insert whose rows (values) were removed, and the edits to them for when they come back"""
+        start, count = step[1], step[2]
+        refs = []
+        for other in self._redo:
+            if other[0] == 'edit' and other[1] is not None and start <= other[1] < start + count:
+                refs.append((other, other[1] - start))
+                other[1] = None
+        step[3], step[4] = values, refs
+        self.rowsRemoved(start, count)
+        self.undone(step)
+
+    def insertRedone(self, step, start):
+        """Keep an insert whose rows were put back from start on"""
+        for other, offset in step[4]:
+            other[1] = start + offset
+        step[1], step[3], step[4] = start, None, []
+        self.redone(step)
+
+    def rowsInserted(self, position, count):
+        """Move steps past rows inserted at position"""
+        for step in self._undo + self._redo:
+            if self._onRows(step) and step[1] >= position:
+                step[1] += count
+
+    def rowsRemoved(self, start, count):
+        """Drop steps on removed rows and move the steps after them up"""
+        end = start + count
+        for steps in (self._undo, self._redo):
+            kept = []
+            for step in steps:
+                if not self._onRows(step):
+                    pass
+                elif step[0] == 'edit':
+                    if start <= step[1] < end:
+                        continue
+                    if step[1] >= end:
+                        step[1] -= count
+                else:
+                    # keep whatever part of the inserted rows is left
+                    first, last = step[1], step[1] + step[2]
+                    if start <= first and last <= end:
+                        continue
+                    step[2] -= max(0, min(last, end) - max(first, start))
+                    if first >= end:
+                        step[1] -= count
+                    elif first > start:
+                        step[1] = start
+                kept.append(step)
+            steps[:] = kept
+        self.changed.emit()
+
+    def clear(self):
+        """Forget every step (when the rows they point at were replaced)"""
+        self._undo = []
+        self._redo = []
+        self.changed.emit()
+
+    def _record(self, step):
+        """Add a new step, which makes the undone ones unreachable"""
+        self._undo.append(step)
+        self._redo = []
+        if len(self._undo) > HISTORY_STEPS:
+            del self._undo[0]
+        self.changed.emit()
+
+    def _onRows(self, step):
+        """Return if a step points at rows in the table (not a clear, or rows that are gone)"""
+        if step[0] == 'edit':
+            return step[1] is not None
+        return step[0] == 'insert' and step[3] is None
+
+    def _runHooks(self, step, which):
+        """Call the undo (0) or redo (1) functions attached to a step"""
+        length = {'edit': 5, 'insert': 5, 'clear': 2}[step[0]]
+        for hooks in step[length:]:
+            hooks[which]()
+
+    def _describe(self, step):
+        """Return a short description of a step"""
+        if step[0] == 'edit':
+            return 'Edit'
+        if step[0] == 'insert':
+            return 'Add Task' if step[2] == 1 else 'Add {0:,} Tasks'.format(step[2])
+        return 'Clear Data'
@@ -1,10 +1,8 @@
 from PyQt5.QtWidgets import QMainWindow, QWidget, QPlainTextEdit, QPushButton, QMessageBox, QLabel, QVBoxLayout
 from PyQt5.QtCore import QSize
-from pathlib import Path
-import json
 
 class OptionsWindow(QMainWindow):
-    def __init__(self, title):
+    def __init__(self, title, option_store):
         """Create a window to allow user to edit column value options"""
         super().__init__()
 
@@ -19,14 +17,9 @@ class OptionsWindow(QMainWindow):
         # create instructions
         instructions = QLabel("Values should be formatted as a comma separated list.")
 
-        # get options from json
-        try:
-            from src.run import resource_path
-            with open(resource_path(Path('data/type_data.json')), 'r') as f:
-                self.options = json.load(f)
-        except Exception as e:
-            QMessageBox.critical(None, 'Error Loading Values', str(e))
-            return
+        # get options (already in memory)
+        self.option_store = option_store
+        self.options = option_store.options()
 
         # set up a text field
         self.text_edit = QPlainTextEdit(self)
@@ -65,10 +58,7 @@ class OptionsWindow(QMainWindow):
             self.options[self.column] = text_list # update relevant column
 
             # save options in json
-            try:
-                from src.run import resource_path
-                with open(resource_path(Path('data/type_data.json')), 'w') as f:
-                    json.dump(self.options, f)
+            try: self.option_store.setValues(self.column, text_list)
             except Exception as e:
                 QMessageBox.critical(None, 'Error Saving Changes', str(e))
                 return
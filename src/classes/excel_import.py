@@ -0,0 +1,88 @@
+from datetime import date
+from openpyxl import load_workbook
+
+from src.classes.column_types import DATE_FORMAT
+
+CHUNK_ROWS = 1000  # spreadsheet rows normalized between progress updates
+TITLE_COLUMNS = ['Title', 'Category', 'Priority']  # columns whose values are title-cased
+
+
+class ExcelImport:
+    """Read the first sheet of a task spreadsheet in chunks of normalized rows.
+
+    Rows are streamed from a read-only workbook, so only the current chunk of
+    raw cells is held in memory. Each kept row is a list of strings in the
+    model's column order. New values for option columns are merged into a copy
+    of the options as they are read.
+    """
+
+    def __init__(self, filepath, columns, options):
+        """Set up the import for a workbook and the model's columns"""
+        self.filepath = filepath
+        self.columns = columns
+        self.rows = []  # normalized rows read so far
+        self.read = 0  # spreadsheet rows read so far, including blank ones
+        self.total = 0  # spreadsheet rows to read, 0 if the sheet does not say
+        # keep existing options first, in their saved order
+        self.options = {col: list(values) for col, values in options.items()}
+        self._known = {col: set(values) for col, values in options.items()}
+
+    def chunks(self):
+        """Read the sheet, yielding after each chunk so callers can report progress or stop"""
+        workbook = load_workbook(self.filepath, read_only=True, data_only=True)
+        try:
+            sheet = workbook.worksheets[0]
+            self.total = max((sheet.max_row or 1) - 1, 0)
+            cells = sheet.iter_rows(values_only=True)
+
+            # map the header to the model's columns, ignoring unknown ones
+            header = next(cells, None)
+            if header is None:
+                return
+            names = ['' if name is None else str(name) for name in header]
+            source = [names.index(col) if col in names else None for col in self.columns]
+
+            chunk = []
+            for row in cells:
+                chunk.append(row)
+                if len(chunk) == CHUNK_ROWS:
+                    self._addChunk(chunk, source)
+                    chunk = []
+                    yield
+            if chunk:
+                self._addChunk(chunk, source)
+                yield
+        finally:
+            workbook.close()
+
+    def _addChunk(self, chunk, source):
+        """Normalize a chunk of raw rows and collect their options"""
+        status = self.columns.index('Status') if 'Status' in self.columns else None
+        titled = [i for i, col in enumerate(self.columns) if col in TITLE_COLUMNS]
+        option_columns = [(i, col) for i, col in enumerate(self.columns) if col in self.options]
+        for raw in chunk:
+            self.read += 1
+            # skip rows without any values
+            if all(value is None for value in raw):
+                continue
+            row = ['' if i is None or i >= len(raw) else _cellText(raw[i]) for i in source]
+            if status is not None and row[status] == '':
+                row[status] = 'Active'  # put null statuses as Active
+            for i in titled:
+                row[i] = row[i].title()
+            for i, col in option_columns:
+                value = row[i]
+                if value != '' and value not in self._known[col]:
+                    self._known[col].add(value)
+                    self.options[col].append(value)
+            self.rows.append(row)
+
+
+def _cellText(value):
+    """Return a cell's value as the string the model stores"""
+    if value is None:
+        return ''
+    # date cells come as datetimes, written like the dates already in the table
+    if isinstance(value, date):
+        return value.strftime(DATE_FORMAT)
+    return str(value)
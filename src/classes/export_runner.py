@@ -0,0 +1,51 @@
+from PyQt5.QtCore import QObject, pyqtSignal
+from concurrent.futures import ThreadPoolExecutor
+import threading
+
+
+class ExportRunner(QObject):
+    """Run a task export on a worker thread, reporting progress and allowing it to be cancelled"""
+    progressChanged = pyqtSignal(int, int)  # rows written, rows to write
+    exportReady = pyqtSignal(object)  # the finished TaskExport
+    exportFailed = pyqtSignal(str)
+    exportCancelled = pyqtSignal()
+
+    def __init__(self, export):
+        """Set up the worker thread for a TaskExport"""
+        super().__init__()
+        # set up variables
+        self.export = export
+        self._cancel = threading.Event()
+        self._future = None
+        self._executor = ThreadPoolExecutor(max_workers=1)
+
+    def start(self):
+        """Start writing on the worker thread"""
+        self._future = self._executor.submit(self._run)
+        # the thread exits on its own once the export is done
+        self._executor.shutdown(wait=False)
+
+    def cancel(self):
+        """Stop the export after the chunk being written"""
+        self._cancel.set()
+
+    def isRunning(self):
+        """Return if the export has started and not finished yet"""
+        return self._future is not None and not self._future.done()
+
+    def _run(self):
+        """Write the file chunk by chunk, checking for a cancel between chunks (worker thread)"""
+        chunks = self.export.chunks()
+        try:
+            for _ in chunks:
+                if self._cancel.is_set():
+                    # closing the writer removes the partial file
+                    chunks.close()
+                    self.exportCancelled.emit()
+                    return
+                self.progressChanged.emit(self.export.written, self.export.total)
+        except Exception as e:
+            self.exportFailed.emit(str(e))
+            return
+        # results come back to the gui thread through a queued signal
+        self.exportReady.emit(self.export)
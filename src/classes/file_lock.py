@@ -0,0 +1,143 @@
+import os
+import socket
+import threading
+import time
+import uuid
+
+STALE_CHECK_SECONDS = 1.0  # how often a waiting session looks at whether the lock was left behind
+
+
+class FileLock:
+    """A lock shared between processes (and machines using the same data folder).
+
+    The lock is held by exclusively creating a file next to the data, so it works
+    on network drives where os level locks are unreliable. The file holds a random
+    token, so a session only ever removes its own lock, and is touched while held.
+    A lock file that has not been touched for stale_after seconds (by the share's
+    clock, not this machine's) was left behind by a session that crashed and is
+    taken over by renaming it aside, which only one waiting session can do.
+    """
+
+    def __init__(self, path, timeout=10, stale_after=60):
+        """Set up the lock file's path and how long to wait for it"""
+        self.path = path
+        self.timeout = timeout
+        self.stale_after = stale_after
+        self._token = None  # contents of the lock file while this session holds it
+        self._released = threading.Event()
+        self._toucher = None
+
+    def acquire(self, timeout=None):
+        """Wait until the lock is free and take it, raising TimeoutError after timeout (or self.timeout) seconds"""
+        deadline = time.monotonic() + (self.timeout if timeout is None else timeout)
+        next_check = time.monotonic()
+        while True:
+            try:
+                fd = os.open(self.path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+            except FileExistsError:
+                if time.monotonic() >= next_check:
+                    next_check = time.monotonic() + STALE_CHECK_SECONDS
+                    stale = self._staleToken()
+                    if stale is not None:
+                        self._takeOver(stale)
+                        continue
+                if time.monotonic() >= deadline:
+                    raise TimeoutError('Another session has been saving for too long, try again in a moment.')
+                time.sleep(0.05)
+                continue
+            # note who holds the lock, to help when a stale one has to be cleared by hand
+            self._token = '{0} {1} {2}'.format(socket.gethostname(), os.getpid(), uuid.uuid4().hex)
+            with os.fdopen(fd, 'w') as f:
+                f.write(self._token)
+            # keep the lock file fresh for saves that outlast stale_after
+            self._released.clear()
+            self._toucher = threading.Thread(target=self._touch, name='file-lock', daemon=True)
+            self._toucher.start()
+            return
+
+    def release(self):
+        """Give up the lock, leaving the file alone if another session has it now"""
+        self._released.set()
+        if self._toucher is not None:
+            self._toucher.join()
+            self._toucher = None
+        if self._token is not None and self._readToken(self.path) == self._token:
+            self._remove(self.path)
+        self._token = None
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, *exc):
+        self.release()
+
+    def _touch(self):
+        """Update the lock file's modified time a few times per stale_after while held (lock thread)"""
+        while not self._released.wait(self.stale_after / 4):
+            try:
+                if self._readToken(self.path) == self._token:
+                    os.utime(self.path)
+            except OSError:
+                # the shared drive may be briefly unreachable, the next touch tries again
+                pass
+
+    def _staleToken(self):
+        """Return the lock file's contents if it has not been touched for stale_after, otherwise None"""
+        token = self._readToken(self.path)
+        try:
+            modified = os.path.getmtime(self.path)
+        except OSError:
+            return None
+        if token is None or self._shareTime() - modified <= self.stale_after:
+            return None
+        return token
+
+    def _takeOver(self, token):
+        """Move a stale lock holding token aside, so only the session that moved it can create a new one"""
+        aside = '{0}.{1}.stale'.format(self.path, uuid.uuid4().hex)
+        try:
+            os.rename(self.path, aside)
+        except OSError:
+            # another waiting session moved it first
+            return
+        if self._readToken(aside) != token:
+            # that session already made a new lock, which was moved here instead, so put it back
+            try:
+                os.link(aside, self.path)
+            except FileExistsError:
+                pass
+            except OSError:
+                # shares without hard links
+                if not os.path.exists(self.path):
+                    os.rename(aside, self.path)
+                    return
+        self._remove(aside)
+
+    def _shareTime(self):
+        """Return the current time by the clock of the drive holding the lock (machines' clocks can differ)"""
+        probe = '{0}.{1}.clock'.format(self.path, uuid.uuid4().hex)
+        try:
+            fd = os.open(probe, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+        except OSError:
+            return time.time()
+        try:
+            return os.fstat(fd).st_mtime
+        finally:
+            os.close(fd)
+            self._remove(probe)
+
+    def _readToken(self, path):
+        """Return a lock file's contents, or None if it is gone"""
+        try:
+            with open(path, 'r') as f:
+                return f.read()
+        except OSError:
+            return None
+
+    def _remove(self, path):
+        """Delete a file if it is still there"""
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
@@ -0,0 +1,358 @@
+from PyQt5.QtCore import Qt, QAbstractProxyModel, QModelIndex
+import numpy as np
+
+FETCH_ROWS = 500  # accepted rows handed to the view at a time
+
+
+class TaskFilterProxy(QAbstractProxyModel):
+    def __init__(self):
+        """Create a proxy that filters by column values and search text, and sorts, using whole-column masks"""
+        super().__init__()
+        # set up variables
+        self._filters = {}  # column name -> value a row must have
+        self._search = ''  # lowercase search query
+        self._filter_mask = None  # rows passing the column filters
+        self._search_mask = None  # rows matching the search query
+        self._sort_column = -1
+        self._sort_order = Qt.AscendingOrder
+        self._rank = None  # sort position of every source row
+        self._rows = np.empty(0, dtype=np.int64)  # source row shown at each proxy row
+        self._positions = np.empty(0, dtype=np.int64)  # proxy row of each source row (-1 if hidden)
+        self._fetched = 0  # proxy rows handed to the view so far
+
+    def setSourceModel(self, model):
+        """Attach the model and compute the initial rows"""
+        # the proxy pages rows to the view itself, so it needs all of the model's rows
+        model.fetchAll()
+        super().setSourceModel(model)
+        model.dataChanged.connect(self._cellsChanged)
+        model.rowsInserted.connect(self._rowsInserted)
+        model.modelAboutToBeReset.connect(self._sourceAboutToReset)
+        model.modelReset.connect(self._sourceReset)
+        model.rowsAboutToBeRemoved.connect(self._rowsAboutToBeRemoved)
+        model.rowsRemoved.connect(self._rowsRemoved)
+        self.beginResetModel()
+        self._recompute()
+        self.endResetModel()
+
+    def setColumnFilter(self, column, value):
+        """Only accept rows where column equals value (None removes the filter)"""
+        if value is None:
+            self._filters.pop(column, None)
+        else:
+            self._filters[column] = value
+        self.beginResetModel()
+        self._recompute()
+        self.endResetModel()
+
+    def setSearchText(self, text):
+        """Only accept rows matching a search query (see SearchIndex.query)"""
+        text = text.lower()
+        self._search_mask = self.sourceModel().searchMask(text) if text != '' else None
+        self._search = text
+        self.beginResetModel()
+        self._recompute(search=False, filters=False)
+        self.endResetModel()
+
+    def setSearchResult(self, text, mask):
+        """Show rows from a search matched elsewhere (mask of rows matching text, None for no search)"""
+        self._search = text
+        self._search_mask = mask
+        self.beginResetModel()
+        self._recompute(search=False, filters=False)
+        self.endResetModel()
+
+    def searchState(self):
+        """Return the current lowercase search text and its mask of matching rows"""
+        return self._search, self._search_mask
+
+    def matchCount(self):
+        """Return amount of rows passing the filters and search"""
+        return len(self._rows)
+
+    def sourceRows(self):
+        """Return the source rows passing the filters and search, in the proxy's order"""
+        return self._rows.copy()
+
+    def sort(self, column, order=Qt.AscendingOrder):
+        """Order rows by a column using the model's sorted row order"""
+        self.layoutAboutToBeChanged.emit()
+        old_rows = self._rows
+        self._sort_column = column
+        self._sort_order = order
+        self._rank = self._ranks(column) if column >= 0 else None
+        # sorting never changes which rows are accepted, only their order
+        self._rows = self._ordered(np.sort(self._rows))
+        self._updatePositions()
+        self._remapPersistent(old_rows)
+        self.layoutChanged.emit()
+
+    def sortColumn(self):
+        """Return the column being sorted by (-1 when unsorted)"""
+        return self._sort_column
+
+    def index(self, row, column, parent=QModelIndex()):
+        """Create an index for a proxy cell"""
+        if parent.isValid() or row < 0 or row >= self._fetched or column < 0 or column >= self.columnCount():
+            return QModelIndex()
+        return self.createIndex(row, column)
+
+    def parent(self, index=None):
+        """Rows have no parents in a table"""
+        return QModelIndex()
+
+    def rowCount(self, parent=QModelIndex()):
+        """Return amount of accepted rows handed to the view"""
+        return 0 if parent.isValid() else self._fetched
+
+    def columnCount(self, parent=QModelIndex()):
+        """Return amount of columns in the model"""
+        return 0 if parent.isValid() or self.sourceModel() is None else self.sourceModel().columnCount()
+
+    def mapToSource(self, proxy_index):
+        """Look up the model index behind a proxy index"""
+        if not proxy_index.isValid():
+            return QModelIndex()
+        return self.sourceModel().index(int(self._rows[proxy_index.row()]), proxy_index.column())
+
+    def mapFromSource(self, source_index):
+        """Look up the proxy index showing a model index"""
+        if not source_index.isValid() or source_index.row() >= len(self._positions):
+            return QModelIndex()
+        row = self._positions[source_index.row()]
+        if row < 0 or row >= self._fetched:
+            return QModelIndex()
+        return self.createIndex(int(row), source_index.column())
+
+    def data(self, index, role=Qt.DisplayRole):
+        """Return a cell's value straight from the model's display cache"""
+        if index.isValid() and (role == Qt.DisplayRole or role == Qt.EditRole):
+            return self.sourceModel().getItem(int(self._rows[index.row()]), index.column())
+        return super().data(index, role)
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        """Use the model's column headers and source row numbers"""
+        if orientation == Qt.Horizontal:
+            return self.sourceModel().headerData(section, orientation, role)
+        if role == Qt.DisplayRole and 0 <= section < self._fetched:
+            return str(self._rows[section])
+        return None
+
+    def canFetchMore(self, parent=QModelIndex()):
+        """Return if accepted rows are waiting to be shown"""
+        return not parent.isValid() and self._fetched < len(self._rows)
+
+    def fetchMore(self, parent=QModelIndex()):
+        """Hand the next batch of accepted rows to the view"""
+        rows = min(self._fetched + FETCH_ROWS, len(self._rows))
+        if rows <= self._fetched:
+            return
+        self.beginInsertRows(QModelIndex(), self._fetched, rows - 1)
+        self._fetched = rows
+        self.endInsertRows()
+
+    def _filterMask(self):
+        """Return a mask of source rows passing every column filter (None when unfiltered)"""
+        model = self.sourceModel()
+        mask = None
+        for column, value in self._filters.items():
+            column_mask = np.zeros(model.totalRowCount(), dtype=bool)
+            column_mask[model.queryRows(column, value)] = True
+            mask = column_mask if mask is None else mask & column_mask
+        return mask
+
+    def _accepted(self):
+        """Return a mask of source rows passing the column filters and search"""
+        mask = np.ones(self.sourceModel().totalRowCount(), dtype=bool)
+        if self._filter_mask is not None:
+            mask &= self._filter_mask
+        if self._search_mask is not None:
+            mask &= self._search_mask
+        return mask
+
+    def _ordered(self, rows):
+        """Put accepted source rows (ascending) into the proxy's row order"""
+        if self._rank is not None:
+            rows = rows[np.argsort(self._rank[rows], kind='stable')]
+            if self._sort_order == Qt.DescendingOrder:
+                rows = rows[::-1]
+        return rows
+
+    def _ranks(self, column):
+        """Return the sort position of every source row for a column"""
+        model = self.sourceModel()
+        rank = np.empty(model.totalRowCount(), dtype=np.int64)
+        rank[model.sortedRows(model.getColumnNames()[column])] = np.arange(len(rank))
+        return rank
+
+    def _recompute(self, search=True, filters=True):
+        """Rebuild every row mapping from the model (call between begin/endResetModel)"""
+        model = self.sourceModel()
+        if filters:
+            self._filter_mask = self._filterMask()
+        if search and self._search != '':
+            self._search_mask = model.searchMask(self._search)
+        if self._sort_column >= 0:
+            self._rank = self._ranks(self._sort_column)
+        self._rows = self._ordered(np.flatnonzero(self._accepted()))
+        self._updatePositions()
+        self._fetched = min(FETCH_ROWS, len(self._rows))
+
+    def _updatePositions(self):
+        """Rebuild the source row -> proxy row lookup"""
+        self._positions = np.full(self.sourceModel().totalRowCount(), -1, dtype=np.int64)
+        self._positions[self._rows] = np.arange(len(self._rows))
+
+    def _remapPersistent(self, old_rows):
+        """Point persistent indexes (selection, current cell) at their rows' new positions"""
+        old = self.persistentIndexList()
+        new = []
+        for index in old:
+            row = self._positions[old_rows[index.row()]] if index.row() < len(old_rows) else -1
+            new.append(self.createIndex(int(row), index.column()) if 0 <= row < self._fetched else QModelIndex())
+        self.changePersistentIndexList(old, new)
+
+    def _rowPasses(self, row):
+        """Check a single row against the filter and search masks"""
+        if self._filter_mask is not None and not self._filter_mask[row]:
+            return False
+        return self._search_mask is None or bool(self._search_mask[row])
+
+    def _filtersPass(self, row):
+        """Check a single row against the column filters using the model's current values"""
+        model = self.sourceModel()
+        return all(model.getItem(row, model.columnIndex(column)) == value for column, value in self._filters.items())
+
+    def _sourceAboutToReset(self, *args):
+        """Start a reset before the model drops its rows"""
+        self.beginResetModel()
+
+    def _sourceReset(self, *args):
+        """Rebuild after the model reset or dropped rows"""
+        self._recompute()
+        self.endResetModel()
+
+    def _cellsChanged(self, top_left, bottom_right, roles=None):
+        """Add, remove or move edited rows, then forward the change to the view"""
+        rows = np.arange(top_left.row(), bottom_right.row() + 1)
+        if self._filter_mask is not None:
+            self._filter_mask[rows] = [self._filtersPass(row) for row in rows]
+        if self._search_mask is not None:
+            self._search_mask[rows] = self.sourceModel().searchMask(self._search, rows)[rows]
+        for row in rows:
+            shown = self._positions[row] >= 0
+            passes = self._rowPasses(row)
+            if shown and not passes:
+                self._removeRow(row)
+            elif passes and not shown:
+                self._insertRow(row)
+        if top_left.column() <= self._sort_column <= bottom_right.column():
+            self._rank = self._ranks(self._sort_column)
+            self.sort(self._sort_column, self._sort_order)
+        # tell the view about the cells that are still shown
+        if len(rows) == 1:
+            first = self.mapFromSource(top_left)
+            if first.isValid():
+                self.dataChanged.emit(first, first.sibling(first.row(), bottom_right.column()))
+        elif self._fetched > 0:
+            self.dataChanged.emit(self.index(0, 0), self.index(self._fetched - 1, self.columnCount() - 1))
+
+    def _removeRow(self, source_row):
+        """Hide a source row that no longer passes"""
+        row = int(self._positions[source_row])
+        fetched = row < self._fetched
+        if fetched:
+            self.beginRemoveRows(QModelIndex(), row, row)
+        self._rows = np.delete(self._rows, row)
+        self._updatePositions()
+        if fetched:
+            self._fetched -= 1
+            self.endRemoveRows()
+
+    def _insertRow(self, source_row):
+        """Show a source row that now passes, keeping the current order"""
+        if self._rank is None:
+            row = int(np.searchsorted(self._rows, source_row))
+        else:
+            ranks = self._rank[self._rows]
+            if self._sort_order == Qt.DescendingOrder:
+                row = len(ranks) - int(np.searchsorted(ranks[::-1], self._rank[source_row]))
+            else:
+                row = int(np.searchsorted(ranks, self._rank[source_row]))
+        # rows past the fetched window join silently and show up when fetched
+        fetched = row <= self._fetched and (row < self._fetched or self._fetched == len(self._rows))
+        if fetched:
+            self.beginInsertRows(QModelIndex(), row, row)
+        self._rows = np.insert(self._rows, row, source_row)
+        self._updatePositions()
+        if fetched:
+            self._fetched += 1
+            self.endInsertRows()
+
+    def _rowsInserted(self, parent, first, last):
+        """Add model rows that pass the filters, moving the rows after them down"""
+        count = last - first + 1
+        new_rows = np.arange(first, last + 1)
+        if self._filter_mask is not None:
+            passing = np.array([self._filtersPass(row) for row in new_rows], dtype=bool)
+            self._filter_mask = np.insert(self._filter_mask, first, passing)
+        if self._search_mask is not None:
+            self._search_mask = np.insert(self._search_mask, first, self.sourceModel().searchMask(self._search, new_rows)[first:last + 1])
+        if self._rank is not None:
+            # new rows can land anywhere in a sorted view, so rebuild the order
+            self.beginResetModel()
+            self._recompute(search=False, filters=False)
+            self.endResetModel()
+            return
+        # rows saved by other sessions go in before this session's new ones
+        self._rows[self._rows >= first] += count
+        passing = np.array([row for row in new_rows if self._rowPasses(row)], dtype=np.int64)
+        if len(passing) == 0:
+            if first == len(self._positions):
+                self._positions = np.concatenate([self._positions, np.full(count, -1, dtype=np.int64)])
+            else:
+                self._updatePositions()
+            return
+        start = int(np.searchsorted(self._rows, first))
+        # rows past the fetched window join silently and show up when fetched
+        fetched = start < self._fetched or self._fetched == len(self._rows)
+        if fetched:
+            self.beginInsertRows(QModelIndex(), start, start + len(passing) - 1)
+        self._rows = np.insert(self._rows, start, passing)
+        self._updatePositions()
+        if fetched:
+            self._fetched += len(passing)
+            self.endInsertRows()
+
+    def _removedRange(self, first, last):
+        """Return the proxy rows (start, end) showing model rows first to last, when unsorted"""
+        return int(np.searchsorted(self._rows, first)), int(np.searchsorted(self._rows, last, side='right'))
+
+    def _rowsAboutToBeRemoved(self, parent, first, last):
+        """Start removing the proxy rows of model rows about to go"""
+        if self._rank is not None:
+            # the removed rows are spread over a sorted view, so rebuild it
+            self.beginResetModel()
+            return
+        start, end = self._removedRange(first, last)
+        end = min(end, self._fetched)
+        if start < end:
+            self.beginRemoveRows(QModelIndex(), start, end - 1)
+
+    def _rowsRemoved(self, parent, first, last):
+        """Drop the removed model rows and move the rows after them up"""
+        if self._filter_mask is not None:
+            self._filter_mask = np.delete(self._filter_mask, np.s_[first:last + 1])
+        if self._search_mask is not None:
+            self._search_mask = np.delete(self._search_mask, np.s_[first:last + 1])
+        if self._rank is not None:
+            self._recompute(search=False, filters=False)
+            self.endResetModel()
+            return
+        start, end = self._removedRange(first, last)
+        self._rows = np.concatenate([self._rows[:start], self._rows[end:] - (last - first + 1)])
+        self._updatePositions()
+        end = min(end, self._fetched)
+        if start < end:
+            self._fetched -= end - start
+            self.endRemoveRows()
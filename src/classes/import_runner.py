@@ -0,0 +1,51 @@
+from PyQt5.QtCore import QObject, pyqtSignal
+from concurrent.futures import ThreadPoolExecutor
+import threading
+
+
+class ImportRunner(QObject):
+    """Run a spreadsheet import on a worker thread, reporting progress and allowing it to be cancelled"""
+    progressChanged = pyqtSignal(int, int, int)  # rows read, rows kept, rows in the sheet (0 if unknown)
+    importReady = pyqtSignal(object)  # the finished ExcelImport
+    importFailed = pyqtSignal(str)
+    importCancelled = pyqtSignal()
+
+    def __init__(self, importer):
+        """Set up the worker thread for an ExcelImport"""
+        super().__init__()
+        # set up variables
+        self.importer = importer
+        self._cancel = threading.Event()
+        self._future = None
+        self._executor = ThreadPoolExecutor(max_workers=1)
+
+    def start(self):
+        """Start reading on the worker thread"""
+        self._future = self._executor.submit(self._run)
+        # the thread exits on its own once the import is done
+        self._executor.shutdown(wait=False)
+
+    def cancel(self):
+        """Stop the import after the chunk being read"""
+        self._cancel.set()
+
+    def isRunning(self):
+        """Return if the import has started and not finished yet"""
+        return self._future is not None and not self._future.done()
+
+    def _run(self):
+        """Read the sheet chunk by chunk, checking for a cancel between chunks (worker thread)"""
+        try:
+            for _ in self.importer.chunks():
+                if self._cancel.is_set():
+                    self.importCancelled.emit()
+                    return
+                self.progressChanged.emit(self.importer.read, len(self.importer.rows), self.importer.total)
+        except Exception as e:
+            self.importFailed.emit(str(e))
+            return
+        if self._cancel.is_set():
+            self.importCancelled.emit()
+            return
+        # results come back to the gui thread through a queued signal
+        self.importReady.emit(self.importer)
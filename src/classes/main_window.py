@@ -1,137 +1,149 @@
 
 # imports
-import os, sys, traceback
+import os, sys, time, traceback
 
-from PyQt5.QtCore import Qt, QSortFilterProxyModel, QModelIndex
-from PyQt5.QtWidgets import QMainWindow, QCheckBox, QToolButton, QWidget, QHBoxLayout, QFileDialog, QVBoxLayout, QLabel, QToolBar, QMessageBox, QHeaderView, QAction, QActionGroup, QMenu, QInputDialog, QTableView, QLineEdit
-from PyQt5.QtGui import QCursor, QIcon
-import pandas as pd
+from PyQt5.QtCore import Qt, QModelIndex, QTimer
+from PyQt5.QtWidgets import QProgressDialog, QMainWindow, QCheckBox, QToolButton, QWidget, QHBoxLayout, QFileDialog, QVBoxLayout, QLabel, QToolBar, QMessageBox, QHeaderView, QAction, QActionGroup, QMenu, QInputDialog, QTableView, QLineEdit
+from PyQt5.QtGui import QCursor, QIcon, QKeySequence
 from datetime import date, datetime
 from pathlib import Path
-import json
 
-from src.classes.pandas_model import PandasModel
+# pandas, the model and the readers and writers are imported once the window is up
+from src.classes.option_store import OptionStore
+from src.classes.task_loader import TaskLoader
+from src.classes.profiler import profiler, PROFILE_AT_START
 
 class MainWindow(QMainWindow):
-    def __init__(self, edit_on):
-        """Build window with task table"""
+    def __init__(self, edit_on, session_key=None, started=None):
+        """Build window shell, show it and load the tasks in the background"""
         super().__init__()
         # set up window
         self.setWindowTitle("Task Tracker")
         from src.run import resource_path
         self.setWindowIcon(QIcon(resource_path(Path('data/computer.ico'))))
-
-        # create data model and save column names
-        task_data = pd.read_json(resource_path(Path('data/task_data.json')))
-        self.model = PandasModel(task_data)
-        self.columns = self.model.getColumnNames()
-
-        # create proxy models (used for filtering)
-        self.status_proxy = QSortFilterProxyModel()
-        self.status_proxy.setSourceModel(self.model)
-        self.status_proxy.setFilterKeyColumn(self.columns.index('Status'))
-        self.status_proxy.setFilterFixedString('Active')
-        self.proxy = QSortFilterProxyModel()
-        self.proxy.setSourceModel(self.status_proxy)
-        self.proxy.setFilterKeyColumn(-1) # set the column to filter by as all
-        self.proxy.setFilterCaseSensitivity(False)
-
-        # create view model
+        # record timings from launch if asked to (TASK_TRACKER_PROFILE=1)
+        if PROFILE_AT_START:
+            profiler.enable(self.profileLogPath(session_key))
+        self.session_key = session_key
+        self.started = started # time.perf_counter() at launch, to report how long startup took
+        self.shown_ms = None # ms from launch until the window was up
+        self.loaded_ms = None # ms from launch until the tasks were in
+        self.store = None # the store and data model are created once the tasks are loaded
+        self.model = None
+
+        # load the data validation columns once (small, their options seed the model's categorical columns)
+        with profiler.span('MainWindow.loadOptions'):
+            self.option_store = OptionStore(resource_path(Path('data/type_data.json')))
+
+        # create view (its model is set once the tasks are loaded)
         self.view = QTableView()
-        self.view.setModel(self.proxy)
         self.view.installEventFilter(self)
         self.view.verticalHeader().hide() # don't show indexes
+        self.view.verticalHeader().setSectionResizeMode(QHeaderView.Fixed) # row heights never depend on contents
+        self.view.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch) # every column shares the width
+        self.view.horizontalHeader().setSortIndicator(-1, Qt.AscendingOrder) # keep stored order until a header is clicked
         self.view.setSortingEnabled(True)
         self.view.setTextElideMode(Qt.ElideRight)
         self.view.setWordWrap(True)
 
-        # resize columns and hide certain columns
-        for i in range(self.view.horizontalHeader().count()):
-            self.view.horizontalHeader().setSectionResizeMode(i, QHeaderView.Stretch)
-            if self.columns[i] in ['Details']:
-                self.view.setColumnHidden(i, True)
-
         # create menu bar widgets
-        view_action = QAction("View Mode", self)
+        self.view_action = QAction("View Mode", self)
         self.edit_action = QAction("Edit Mode", self)
         save_action = QAction("Save Changes", self)
         new_action = QAction("New", self)
         export_action = QAction("Export Data", self)
+        export_view_action = QAction("Export View", self)
         upload_action = QAction("Import Data", self)
         clear_action = QAction("Clear Data", self)
+        self.undo_action = QAction("Undo", self)
+        self.redo_action = QAction("Redo", self)
         val_options_button = QToolButton()
         val_options_button.setText("Edit Column Values")
         val_options_menu = QMenu()
         hide_columns_button = QToolButton()
         hide_columns_button.setText("Hide Columns")
-        visible_columns_menu = QMenu()
+        self.visible_columns_menu = QMenu()
         hide_completed_box = QCheckBox(self)
         hide_completed_label = QLabel("Hide Completed")
+        diagnostics_button = QToolButton()
+        diagnostics_button.setText("Diagnostics")
+        diagnostics_menu = QMenu()
+        self.profile_action = QAction("Record Timings", self)
+        show_timings_action = QAction("Show Timings", self)
 
         # create search bar
         search_label = QLabel("Search: ")
         self.search_bar = QLineEdit()
 
         # make mode actions checkable and put in group (only one checkable at a time)
-        view_action.setCheckable(True)
-        view_action.setChecked(True)
+        self.view_action.setCheckable(True)
+        self.view_action.setChecked(True)
         self.edit_action.setCheckable(True)
         group = QActionGroup(self)
-        group.addAction(view_action)
+        group.addAction(self.view_action)
         group.addAction(self.edit_action)
 
         # check hide completed
         hide_completed_box.setChecked(True)
 
-        # get data validation columns
-        with open(resource_path(Path('data/type_data.json')), 'r') as f:
-            options = json.load(f)
+        # undo and redo use the platform's shortcuts and are only enabled while there is a step
+        self.undo_action.setShortcut(QKeySequence.Undo)
+        self.redo_action.setShortcut(QKeySequence.Redo)
+        self.undo_action.setEnabled(False)
+        self.redo_action.setEnabled(False)
+
+        # timings are off unless turned on here or at launch
+        self.profile_action.setCheckable(True)
+        self.profile_action.setChecked(profiler.enabled)
+        diagnostics_menu.addAction(self.profile_action)
+        diagnostics_menu.addAction(show_timings_action)
 
         # dynamically add actions to val_options_menu
-        for col in options.keys():
+        for col in self.option_store.columns():
             val_options_menu.addAction(QAction("Edit "+ col +" Values", self))
 
-        # dynamically add actions to visible_columns_menu
-        for i, column in enumerate(self.columns): # add a qaction to menu per column
-            temp = QAction(column, self)
-            temp.setCheckable(True)
-            if self.view.isColumnHidden(i) == True:
-                temp.setChecked(False)
-            else:
-                temp.setChecked(True)
-            visible_columns_menu.addAction(temp)
-
-        # attach menus to qtoolbuttons
+        # attach menus to qtoolbuttons (the column menu is filled in once the columns are known)
         val_options_button.setMenu(val_options_menu)
         val_options_button.setPopupMode(QToolButton.InstantPopup)
-        hide_columns_button.setMenu(visible_columns_menu)
+        hide_columns_button.setMenu(self.visible_columns_menu)
         hide_columns_button.setPopupMode(QToolButton.InstantPopup)
+        diagnostics_button.setMenu(diagnostics_menu)
+        diagnostics_button.setPopupMode(QToolButton.InstantPopup)
 
         # connect actions
-        view_action.triggered.connect(self.model.makeViewable)
-        self.edit_action.triggered.connect(self.model.makeEditable)
         save_action.triggered.connect(self.save)
-        export_action.triggered.connect(self.export)
+        export_action.triggered.connect(lambda: self.export())
+        export_view_action.triggered.connect(lambda: self.export(visible_only=True))
         upload_action.triggered.connect(self.uploadData)
         new_action.triggered.connect(self.add)
         clear_action.triggered.connect(self.clearData)
+        self.undo_action.triggered.connect(self.undo)
+        self.redo_action.triggered.connect(self.redo)
         val_options_menu.triggered.connect(self.editOptions)
-        self.search_bar.textChanged.connect(self.proxy.setFilterFixedString)
-        visible_columns_menu.triggered.connect(self.columnsChange)
+        self.search_runner = None # debounces and searches off the gui thread
+        self.change_feed = None # applies saves from other sessions as they land
+        self.import_runner = None # reads imported spreadsheets off the gui thread
+        self.export_runner = None # writes exports off the gui thread
+        self.visible_columns_menu.triggered.connect(self.columnsChange)
         hide_completed_box.stateChanged.connect(self.toggleShowCompleted)
+        self.profile_action.toggled.connect(lambda on: self.toggleProfiling(on, session_key))
+        show_timings_action.triggered.connect(self.showTimings)
 
         # add actions and widgets to a menu bar
-        menubar = QToolBar()
+        self.menubar = QToolBar()
         if edit_on:
-            menu_actions = [view_action, self.edit_action, save_action, new_action, export_action, upload_action, clear_action]
-            menu_widgets = [val_options_button, hide_columns_button, hide_completed_box, hide_completed_label]
+            menu_actions = [self.view_action, self.edit_action, save_action, self.undo_action, self.redo_action, new_action, export_action, export_view_action, upload_action, clear_action]
+            menu_widgets = [val_options_button, hide_columns_button, hide_completed_box, hide_completed_label, diagnostics_button]
         else:
-            menu_actions = [view_action, export_action]
-            menu_widgets = [hide_columns_button, hide_completed_box, hide_completed_label]
+            menu_actions = [self.view_action, export_action, export_view_action]
+            menu_widgets = [hide_columns_button, hide_completed_box, hide_completed_label, diagnostics_button]
         for action in menu_actions:
-            menubar.addAction(action)
+            self.menubar.addAction(action)
         for widget in menu_widgets:
-            menubar.addWidget(widget)
+            self.menubar.addWidget(widget)
+        # nothing to act on until the tasks are in
+        self.menubar.setEnabled(False)
+        self.search_bar.setEnabled(False)
 
         # create horizontal search bar layout
         search_layout = QHBoxLayout()
@@ -142,7 +154,7 @@ class MainWindow(QMainWindow):
 
         # vertically stack search bar with menubar and view
         vbox = QVBoxLayout()
-        vbox.addWidget(menubar)
+        vbox.addWidget(self.menubar)
         vbox.addLayout(search_layout)
         vbox.addWidget(self.view)
         vbox.setContentsMargins(0,0,0,0)
@@ -151,7 +163,7 @@ class MainWindow(QMainWindow):
         container = QWidget()
         container.setLayout(vbox)
         self.setCentralWidget(container)
-        self.model.layoutChanged.emit()
+        self.statusBar().showMessage('Loading tasks...')
         self.showMaximized()
 
         # locate user's download folder
@@ -160,24 +172,144 @@ class MainWindow(QMainWindow):
         else:  # PORT: For *Nix systems
             self.DOWNLOAD_FOLDER = f"{os.getenv('HOME')}/Downloads"
 
+        # read the tasks off the gui thread, starting once the window has been drawn
+        self.loader = TaskLoader(session_key)
+        self.loader.loaded.connect(self.showTasks)
+        self.loader.loadFailed.connect(self.loadFailed)
+        QTimer.singleShot(0, self.startLoading)
+
+    def startLoading(self):
+        """Note how long the window took to come up and start reading the tasks"""
+        if self.started is not None:
+            self.shown_ms = (time.perf_counter() - self.started) * 1000
+        self.loader.start()
+
+    def showTasks(self, store, task_data, search_index):
+        """Create the data model from the loaded tasks and put them in the window"""
+        from src.classes.pandas_model import PandasModel
+        from src.classes.filter_proxy import TaskFilterProxy
+        from src.classes.search_runner import SearchRunner
+        from src.classes.change_feed import ChangeFeed
+        from src.classes.column_types import ID_COLUMN
+        self.store = store
+        with profiler.span('MainWindow.buildModel'):
+            self.model = PandasModel(task_data, self.store, self.option_store.options())
+        if search_index is not None:
+            self.model.setSearchIndex(search_index)
+        self.columns = self.model.getColumnNames()
+
+        # create proxy model (filters by status and search text, and sorts)
+        self.proxy = TaskFilterProxy()
+        self.proxy.setSourceModel(self.model)
+        self.proxy.setColumnFilter('Status', 'Active')
+        self.view.setModel(self.proxy)
+
+        # hide certain columns
+        for column in ['Details', ID_COLUMN]:
+            if column in self.columns:
+                self.view.setColumnHidden(self.model.columnIndex(column), True)
+
+        # dynamically add actions to visible_columns_menu
+        for i, column in enumerate(self.columns): # add a qaction to menu per column
+            temp = QAction(column, self)
+            temp.setCheckable(True)
+            temp.setChecked(not self.view.isColumnHidden(i))
+            self.visible_columns_menu.addAction(temp)
+
+        # connect the actions that act on the model
+        self.view_action.triggered.connect(self.model.makeViewable)
+        self.edit_action.triggered.connect(self.model.makeEditable)
+        self.model.history.changed.connect(self.updateUndoActions)
+        self.search_runner = SearchRunner(self.model, self.proxy) # debounces and searches off the gui thread
+        self.search_bar.textChanged.connect(self.search_runner.setText)
+        self.search_runner.statsChanged.connect(self.statusBar().showMessage)
+        self.change_feed = ChangeFeed(self.model, self.store) # applies saves from other sessions as they land
+        self.change_feed.changesApplied.connect(lambda: self.statusBar().showMessage('Updated with changes saved by other users', 5000))
+        self.change_feed.conflictsFound.connect(lambda conflicts: self.showConflicts(conflicts, saved=False))
+        self.updateUndoActions()
+        self.menubar.setEnabled(True)
+        self.search_bar.setEnabled(True)
+        self.model.layoutChanged.emit()
+
+        # report how long startup took
+        if self.started is not None:
+            self.loaded_ms = (time.perf_counter() - self.started) * 1000
+            self.statusBar().showMessage('Window shown in {0:,.0f} ms, {1:,} tasks loaded in {2:,.0f} ms'.format(self.shown_ms, self.model.totalRowCount(), self.loaded_ms), 10000)
+            if profiler.enabled:
+                profiler.record('startup.windowShown', self.shown_ms / 1000)
+                profiler.record('startup.tasksLoaded', self.loaded_ms / 1000)
+        else:
+            self.statusBar().clearMessage()
+
+    def loadFailed(self, message):
+        """Report tasks that could not be loaded (the window stays empty)"""
+        self.statusBar().showMessage('Tasks could not be loaded')
+        QMessageBox.critical(self, 'Error Loading Tasks', message)
+
     def save(self):
         """Save model to json"""
         # clear current selection
         self.view.selectionModel().clear()
         # download to json
         try:
-            self.model.saveToJson()
-            # deliver success message
-            QMessageBox.information(None, "Saved", "Your changes have been successfully saved.")
+            conflicts = self.model.saveToJson()
         except Exception as e:
             self.showError('Saving JSON', e)
             return
+        # deliver success message, listing edits that lost to another session's
+        if conflicts:
+            self.showConflicts(conflicts)
+        else:
+            QMessageBox.information(None, "Saved", "Your changes have been successfully saved.")
+
+    def undo(self):
+        """Revert the last change made in this session"""
+        try:
+            conflicts = self.model.undo()
+        except Exception as e:
+            self.showError('Undoing', e)
+            return
+        # undoing rows that were already saved saves straight away
+        if conflicts:
+            self.showConflicts(conflicts)
+
+    def redo(self):
+        """Apply the last undone change again"""
+        try: self.model.redo()
+        except Exception as e:
+            self.showError('Redoing', e)
+
+    def updateUndoActions(self):
+        """Name the steps undo and redo would take, and disable them when there are none"""
+        history = self.model.history
+        self.undo_action.setEnabled(history.canUndo())
+        self.undo_action.setText(('Undo ' + history.undoText()).strip())
+        self.redo_action.setEnabled(history.canRedo())
+        self.redo_action.setText(('Redo ' + history.redoText()).strip())
+
+    def showConflicts(self, conflicts, saved=True):
+        """Tell the user which of their edits were replaced by another session's"""
+        lines = []
+        for conflict in conflicts[:20]:
+            if conflict['theirs'] is None:
+                lines.append('Row {0} ({1}) was removed, your value "{2}" was not saved.'.format(conflict['row'] + 1, conflict['column'], conflict['mine']))
+                continue
+            who = conflict['session'].split()[0] if conflict['session'] else 'another user'
+            task = self.model.getItem(conflict['row'], 0)
+            lines.append('{0}: {1} was changed to "{2}" by {3}, your value "{4}" was not saved.'.format(task, conflict['column'], conflict['theirs'], who, conflict['mine']))
+        if len(conflicts) > 20:
+            lines.append('...and {0} more.'.format(len(conflicts) - 20))
+        if saved:
+            title, intro = "Saved With Conflicts", "Your other changes were saved, but these cells had already been changed by someone else:"
+        else:
+            title, intro = "Changes From Other Users", "Someone else saved changes to cells you had edited, so your values were replaced:"
+        QMessageBox.warning(None, title, intro + "\n\n" + '\n'.join(lines))
 
     def add(self):
         """Open new task window"""
         # create a NewTask object
         from src.classes.add_row import NewTask
-        self.taskWindow = NewTask(self.model)
+        self.taskWindow = NewTask(self.model, self.option_store)
 
     def getConfirmation(self, action, task_name, message):
         """Ask user if they would like to complete the action"""
@@ -193,6 +325,11 @@ class MainWindow(QMainWindow):
 
     def closeEvent(self, event):
         """Ask user if they would like to save unsaved changes"""
+        # closing before the tasks are in has nothing to save or stop
+        if self.model is None:
+            profiler.disable()
+            event.accept()
+            return
         # check if model is dirty or not
         if self.model.isDirty() == False:
             # close
@@ -210,33 +347,94 @@ class MainWindow(QMainWindow):
                 if second_confirmation == QMessageBox.Cancel:
                     event.ignore()
                 else: event.accept()
+        # stop background searches and imports if the window is closing
+        if event.isAccepted():
+            self.search_runner.stop()
+            self.change_feed.stop()
+            profiler.disable()
+            if self.import_runner is not None:
+                self.import_runner.cancel()
+            # keep the search index for next time, but only if it matches what was saved
+            if not self.model.isDirty():
+                from src.run import resource_path
+                self.model.saveSearchIndex(resource_path(Path('data/search_index.npz')), self.store.fingerprint())
 
-    def export(self):
-        """Export the database to .xlsx"""
+    def export(self, visible_only=False):
+        """Export the database (or only the tasks currently shown) to .xlsx, .csv or .parquet"""
         # get new path name for file
         filename = 'task_tracker_on_'+datetime.now().strftime('%m%d%Y_%H%M%S')+'.xlsx'
-        path = (os.path.join(self.DOWNLOAD_FOLDER, filename))
-        # give confirmation message
-        if QMessageBox.information(None, "Export Database", "Exporting to: \n"+path.__str__(), QMessageBox.Ok | QMessageBox.Cancel) == QMessageBox.Ok:
-            # save to path
-            try:
-                # save to JSON
-                self.model.toDataFrame().to_excel(path)
-                # give success message
-                QMessageBox.information(self, 'Successfully Downloaded', "You can find the database in your downloads folder. It is named '"+filename+"'.")
-            except Exception as e:
-                # give failure message
-                self.showError('Exporting Data', e)
-                return
+        try: path, _ = QFileDialog.getSaveFileName(self, 'Export Tasks', os.path.join(self.DOWNLOAD_FOLDER, filename),
+                                                   'Excel (*.xlsx);;CSV (*.csv);;Parquet (*.parquet)')
+        except Exception as e:
+            self.showError('Getting Filepath', e)
+            return
+        # if file is null (user x'ed out), break
+        if path == '':
+            return
+        self.startExport(path, visible_only)
+
+    def startExport(self, path, visible_only=False, then=None):
+        """Write tasks to path on a worker thread, calling then() once the file is complete"""
+        # only run one export at a time
+        if self.export_runner is not None and self.export_runner.isRunning():
+            QMessageBox.information(self, 'Export Running', 'Another export is still being written.')
+            return
+        # the export reads the model's dataframe directly, in the order the view shows when exporting the view
+        rows = self.proxy.sourceRows() if visible_only else None
+        from src.classes.task_export import TaskExport
+        from src.classes.export_runner import ExportRunner
+        try: job = TaskExport(path, self.model.getDataFrame(), rows)
+        except Exception as e:
+            self.showError('Exporting Data', e)
+            return
+
+        self.export_progress = self.makeProgress('Exporting Tasks', 'Writing ' + Path(path).name + '...')
+        self.export_runner = ExportRunner(job)
+        self.export_runner.progressChanged.connect(self.exportProgress)
+        self.export_runner.exportReady.connect(lambda job: self.exportFinished(job, then))
+        self.export_runner.exportFailed.connect(self.exportFailed)
+        self.export_runner.exportCancelled.connect(self.export_progress.close)
+        self.export_progress.canceled.connect(self.export_runner.cancel)
+        self.export_runner.start()
+
+    def exportProgress(self, written, total):
+        """Show how far the running export has got"""
+        self.export_progress.setMaximum(total)
+        self.export_progress.setValue(written)
+        self.export_progress.setLabelText('Wrote {0:,} of {1:,} tasks'.format(written, total))
+
+    def exportFinished(self, job, then=None):
+        """Report a completed export and carry on with whatever was waiting for it"""
+        self.export_progress.close()
+        # give success message
+        QMessageBox.information(self, 'Successfully Exported', "{0:,} tasks were exported to:\n{1}".format(job.total, job.path))
+        if then is not None:
+            then()
+
+    def exportFailed(self, message):
+        """Report an export that could not be written"""
+        self.export_progress.close()
+        QMessageBox.critical(None, 'Error Exporting Data', message)
+
+    def makeProgress(self, title, label):
+        """Create a progress dialog that leaves the table usable while it is shown"""
+        progress = QProgressDialog(label, 'Cancel', 0, 0, self)
+        progress.setWindowTitle(title)
+        progress.setWindowModality(Qt.NonModal)
+        progress.setAutoReset(False)
+        progress.setAutoClose(False)
+        progress.setMinimumDuration(0)
+        progress.setValue(0)
+        return progress
     
     def markCompleted(self, row, row_obj):
         """Mark a task as completed"""
         # ask for confirmation
-        if self.getConfirmation('mark complete', self.model.index(row, 0).data(), " This cannot be undone."):
+        if self.getConfirmation('mark complete', self.model.index(row, 0).data(), ""):
             # mark as completed
             try:
                 # delete the row from the model and reindex model
-                self.model.setData(self.model.index(row, self.columns.index('Status'), QModelIndex()), 'Completed '+str(date.today()), Qt.ItemIsEditable)
+                self.model.setData(self.model.index(row, self.model.columnIndex('Status'), QModelIndex()), 'Completed '+str(date.today()), Qt.ItemIsEditable)
                 # give success message
                 message = str(row_obj.iloc[0])+' has been successfully marked as completed.'
                 QMessageBox.information(None, "Marked Completed", message)
@@ -254,7 +452,7 @@ class MainWindow(QMainWindow):
             cloned_row['Date Created'] = str(date.today())
             try:
                 # insert the new row into the model
-                self.model.addRows(cloned_row.to_frame().T)
+                self.model.addRows([cloned_row.to_dict()])
                 # delete the row instance
                 del cloned_row
                 # give success message
@@ -317,14 +515,8 @@ class MainWindow(QMainWindow):
             if not proxy_index.isValid():
                 QMessageBox.critical(None, 'Error', 'The index clicked was invalid.')
                 return
-            # map row to status_proxy
-            status_qindex = self.proxy.mapToSource(proxy_index)
-            # check validity of status_qindex
-            if not status_qindex.isValid():
-                QMessageBox.critical(None, 'Error', 'The index clicked was invalid.')
-                return
             # map row to model
-            model_qindex = self.status_proxy.mapToSource(status_qindex)
+            model_qindex = self.proxy.mapToSource(proxy_index)
             # check validity of model index
             if not model_qindex.isValid():
                 QMessageBox.critical(None, 'Error', 'The index clicked was invalid.')
@@ -334,39 +526,56 @@ class MainWindow(QMainWindow):
             row = model_qindex.row()
             col_name = self.columns[model_qindex.column()]
 
-            # get options data
-            try:
-                from src.run import resource_path
-                with open(resource_path(Path('data/type_data.json')), 'r') as f:
-                    options = json.load(f)
-            except Exception as e:
-                self.showError('Loading Options', e)
-                return
-
-            # check if column is an editable column
-            if col_name in options.keys():
+            # check if column is an editable column (options are served from memory)
+            if self.option_store.hasColumn(col_name):
                 # show editMenu
-                self.editMenu(self.model.index(row, model_qindex.column(), QModelIndex()), options[col_name])
+                self.editMenu(self.model.index(row, model_qindex.column(), QModelIndex()), self.option_store.values(col_name))
             # if column was first one, show regMenu
             elif col_name == self.columns[0]: self.regMenu(row)
 
     def editOptions(self, action):
         """Create a OptionsWindow widget and show"""
         from src.classes.edit_options import OptionsWindow
-        self.options_window = OptionsWindow(action.text())
+        self.options_window = OptionsWindow(action.text(), self.option_store)
         self.options_window.show()
     
+    def toggleProfiling(self, on, session_key=None):
+        """Start or stop recording timings of the hot paths"""
+        if on:
+            profiler.enable(self.profileLogPath(session_key))
+            self.statusBar().showMessage('Recording timings to ' + str(profiler.log_path), 5000)
+        else:
+            profiler.disable()
+            self.statusBar().showMessage('Stopped recording timings', 5000)
+
+    def profileLogPath(self, session_key=None):
+        """Return the log file timings go to, one per machine so sessions on a shared drive don't rotate each other's"""
+        from src.run import resource_path
+        name = session_key.split()[0] if session_key else 'profile'
+        return resource_path(Path('data/logs') / ('profile-' + name + '.log'))
+
+    def showTimings(self):
+        """Create a ProfileWindow widget and show"""
+        from src.classes.profile_window import ProfileWindow
+        self.profile_window = ProfileWindow()
+        self.profile_window.show()
+
     def columnsChange(self, checkbox):
         """Toggle if a column is hidden or shown"""
-        index = self.columns.index(checkbox.text())
+        index = self.model.columnIndex(checkbox.text())
         self.view.setColumnHidden(index, checkbox.isChecked()==False)
     
     def uploadData(self):
         """Select a file for upload.
 
         Prompt user to choose a file to upload for translation.
-        Ensure that file chosen is valid.
+        Ensure that file chosen is valid. The file is read on a worker
+        thread and the preview is shown once it is ready.
         """
+        # only run one import at a time
+        if self.import_runner is not None and self.import_runner.isRunning():
+            QMessageBox.information(self, 'Import Running', 'Another file is still being imported.')
+            return
 
         # have the user choose a file to upload
         try: filepath = QFileDialog.getOpenFileName(self,
@@ -380,72 +589,48 @@ class MainWindow(QMainWindow):
         if filepath[0] == '':
             return
         
-        # load data
-        try: new_data = pd.read_excel(filepath[0], sheet_name=0)
-        except Exception as e:
-            self.showError('Reading File', e)
-            return
-
-        # get rid of null values and format as str
-        new_data = new_data.dropna(how='all') # get rid of null values
-        new_data = new_data.fillna('') # use '' as placeholder
-        new_data = new_data.astype(str) # set everything to str
-
-        # get rid of unknown columns
-        for col in new_data.columns:
-            # get rid of unknown columns
-            if col not in self.columns:
-                new_data.drop(col, axis = 1)
-        
-        # add in missing columns
-        for col in self.columns:
-            if col not in new_data.columns:
-                new_data[col] = ['' for _ in range(new_data.shape[0])]
-
-        # format data
-        new_data = new_data[self.columns] # order columns
-        new_data['Status'] = new_data['Status'].replace('', 'Active') # put null statuses as Active
+        # show progress without blocking the table, which stays usable while the file is read
+        self.import_progress = self.makeProgress('Importing Tasks', 'Reading ' + Path(filepath[0]).name + '...')
+
+        # stream the sheet in chunks on a worker thread, normalizing rows and collecting new options
+        from src.classes.excel_import import ExcelImport
+        from src.classes.import_runner import ImportRunner
+        self.import_runner = ImportRunner(ExcelImport(filepath[0], self.columns, self.option_store.options()))
+        self.import_runner.progressChanged.connect(self.importProgress)
+        self.import_runner.importReady.connect(self.showImportPreview)
+        self.import_runner.importFailed.connect(self.importFailed)
+        self.import_runner.importCancelled.connect(self.import_progress.close)
+        self.import_progress.canceled.connect(self.import_runner.cancel)
+        self.import_runner.start()
+
+    def importProgress(self, read, kept, total):
+        """Show how far the running import has got"""
+        # sheets that do not record their size get a busy indicator instead of a percentage
+        self.import_progress.setMaximum(total)
+        self.import_progress.setValue(min(read, total))
+        if total:
+            self.import_progress.setLabelText('Read {0:,} of {1:,} rows ({2:,} tasks)'.format(read, total, kept))
+        else:
+            self.import_progress.setLabelText('Read {0:,} rows ({1:,} tasks)'.format(read, kept))
 
-        # capitalize values as necessary
-        for col in new_data.columns.tolist():
-            if col in ['Title', 'Category', 'Priority']:
-                new_data[col] = new_data[col].str.title()
+    def importFailed(self, message):
+        """Report an import that could not be read"""
+        self.import_progress.close()
+        QMessageBox.critical(None, 'Error Reading File', message)
 
-        # get type contents
-        try:
-            from src.run import resource_path
-            with open(resource_path(Path('data/type_data.json')), 'r') as f:
-                    options = json.load(f)
-        except Exception as e:
-            self.showError('Getting Options', e)
-            return
-
-        # process new data into a new options dict
-        for col in self.columns:
-            if col in options:
-                new_options = new_data[col].values.tolist()
-                if len(options[col]) != 0: new_options += options[col]
-                new_options = list(set(new_options))
-                # get rid of null values
-                if '' in new_options: new_options.remove('')
-                options[col] = new_options
-    
-        # join old and new data for display
-        try: joined_data = self.model.toDataFrame()._append(new_data, ignore_index = True)
-        except Exception as e:
-            self.showError('Joining Data', e)
-            return
+    def showImportPreview(self, importer):
+        """Show the rows of a finished import for the user to confirm"""
+        self.import_progress.close()
+        new_data = importer.rows
+        options = importer.options
 
         # create a DataPreview widget and show
         try:
             from src.classes.upload_preview import DataPreview
-            self.preview_data = DataPreview(joined_data, new_data, self.model, options)
+            self.preview_data = DataPreview(new_data, self.model, options, self.option_store)
         except Exception as e:
             self.showError('Showing Preview', e)
             return
-        # get rid of DataFrame instances
-        del joined_data
-        del new_data
     
     def clearData(self):
         """Get rid of all"""
@@ -457,47 +642,48 @@ class MainWindow(QMainWindow):
             # check password
             if psswd == 'CLEAR ALL DATA':
                 # confirm again
-                if self.getConfirmation('clear', 'all data', ' This action is irreversible.'):
-                    # save a copy
-                    self.export()
-                    # remove all data from model
-                    try: self.model.clearAllData()
-                    except Exception as e:
-                        self.showError('Clearing Model Data', e)
-                        return
-                    # remove all data from json
-                    try:
-                        from src.run import resource_path
-                        with open(resource_path(Path('data/type_data.json')), 'r') as f:
-                            options = json.load(f)
-                        # clear type_data
-                        for col in options:
-                            options[col] = []
-                        # save edit options to json
-                        with open(resource_path(Path('data/type_data.json')), 'w') as f:
-                            json.dump(options, f)
-                    except Exception as e:
-                        self.showError('Clearing Column Options', e)
-                        return
-                    # save empty model data to json
-                    try: self.model.saveToJson()
-                    except Exception as e:
-                        self.showError('Saving Model Data to JSON', e)
-                        return
-                    # give success message
-                    QMessageBox.information(None, "Successfully Cleared", "The database is empty.")
+                if self.getConfirmation('clear', 'all data', ' Undo will bring the tasks back until the window is closed.'):
+                    # save a copy, only clearing once it has been completely written
+                    filename = 'task_tracker_on_'+datetime.now().strftime('%m%d%Y_%H%M%S')+'.xlsx'
+                    path = os.path.join(self.DOWNLOAD_FOLDER, filename)
+                    if QMessageBox.information(None, "Export Database", "Exporting to: \n"+path, QMessageBox.Ok | QMessageBox.Cancel) == QMessageBox.Ok:
+                        self.startExport(path, then=self.clearAllTasks)
+                    else:
+                        self.clearAllTasks()
             else:
                 # if something failed, give failure message
                 QMessageBox.critical(None, "Wrong Password", "The password inputted was incorrect, try again.")
     
+    def clearAllTasks(self):
+        """Remove every task and column option, and save"""
+        # remove all data from model
+        try: self.model.clearAllData()
+        except Exception as e:
+            self.showError('Clearing Model Data', e)
+            return
+        # clear type_data, putting the options back if the clear is undone
+        options = self.option_store.options()
+        try: self.option_store.clearValues()
+        except Exception as e:
+            self.showError('Clearing Column Options', e)
+            return
+        self.model.history.attach(lambda: self.option_store.addValues(options), self.option_store.clearValues)
+        # save empty model data to json
+        try: self.model.saveToJson()
+        except Exception as e:
+            self.showError('Saving Model Data to JSON', e)
+            return
+        # give success message
+        QMessageBox.information(None, "Successfully Cleared", "The database is empty.")
+    
     def toggleShowCompleted(self, state):
         """Change if completed tasks are shown or not"""
         # check checkbox state
         if state == Qt.Unchecked:
-            # set filter string to nothing (accepts all)
-            self.status_proxy.setFilterFixedString("")
-        # set filter string to 'Active' tasks only
-        else: self.status_proxy.setFilterFixedString("Active")
+            # remove the status filter (accepts all)
+            self.proxy.setColumnFilter('Status', None)
+        # filter to 'Active' tasks only
+        else: self.proxy.setColumnFilter('Status', 'Active')
 
     def showError(self, action, e):
         """Print an error message"""
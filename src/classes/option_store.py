@@ -0,0 +1,120 @@
+from PyQt5.QtCore import QObject, QFileSystemWatcher, pyqtSignal
+import json
+import os
+
+from src.classes.atomic_file import writeAtomic, readLatest
+
+GENERATIONS = 2  # previous option files kept beside the current one, to load from if it is damaged
+
+
+class OptionStore(QObject):
+    """The column value options in type_data.json, loaded once and kept in memory.
+
+    Lookups never touch the disk. Changes are written straight through to the
+    file with an atomic replace, and a file watcher reloads the options when
+    another session saves the file.
+    """
+    optionsChanged = pyqtSignal()  # the options were reloaded or changed
+
+    def __init__(self, path):
+        """Load the options file and start watching it"""
+        super().__init__()
+        # set up variables
+        self.path = path
+        self._options = {}
+        self._valid = {}  # column -> set of its values, for O(1) checks
+        self._stat = None  # (mtime, size) of the file as last read or written
+        self._load()
+
+        # reload when the file is changed from outside this window
+        self._watcher = QFileSystemWatcher(self)
+        self._watcher.addPath(path)
+        self._watcher.fileChanged.connect(self._fileChanged)
+
+    def columns(self):
+        """Return the columns that have options, in their saved order"""
+        return list(self._options)
+
+    def values(self, column):
+        """Return a copy of a column's options, or an empty list if it has none"""
+        return list(self._options.get(column, []))
+
+    def options(self):
+        """Return a copy of every column's options"""
+        return {col: list(values) for col, values in self._options.items()}
+
+    def hasColumn(self, column):
+        """Return if a column has options"""
+        return column in self._options
+
+    def isValid(self, column, value):
+        """Return if value is one of a column's options"""
+        return value in self._valid.get(column, ())
+
+    def setValues(self, column, values):
+        """Replace a column's options and save"""
+        options = self.options()
+        options[column] = list(values)
+        self._save(options)
+
+    def addValues(self, options):
+        """Add any values from options (column -> values) that are not known yet, and save"""
+        merged = self.options()
+        changed = False
+        for col, values in options.items():
+            known = self._valid.get(col, set())
+            new = [value for value in dict.fromkeys(values) if value not in known]
+            if new or col not in merged:
+                merged[col] = merged.get(col, []) + new
+                changed = True
+        if changed:
+            self._save(merged)
+
+    def clearValues(self):
+        """Remove every column's options (keeping the columns), and save"""
+        self._save({col: [] for col in self._options})
+
+    def _load(self):
+        """Read the options file"""
+        options, _ = readLatest(self.path, json.loads, GENERATIONS)
+        self._stat = self._fileStat()
+        self._setOptions(options)
+
+    def _save(self, options):
+        """Write options out atomically, so readers never see a partial file"""
+        writeAtomic(self.path, json.dumps(options).encode('utf-8'), GENERATIONS)
+        self._stat = self._fileStat()
+        self._setOptions(options)
+        self._watchFile()
+
+    def _setOptions(self, options):
+        """Keep options in memory and rebuild the lookup sets"""
+        self._options = options
+        self._valid = {col: set(values) for col, values in options.items()}
+        self.optionsChanged.emit()
+
+    def _fileStat(self):
+        """Return the options file's (modified time, size), or None if it is missing"""
+        try:
+            stat = os.stat(self.path)
+        except OSError:
+            return None
+        return (stat.st_mtime_ns, stat.st_size)
+
+    def _fileChanged(self, path):
+        """Reload the options if another session changed the file"""
+        # a replaced file stops being watched, so watch the new one
+        self._watchFile()
+        stat = self._fileStat()
+        if stat is None or stat == self._stat:
+            return
+        try:
+            self._load()
+        except (OSError, ValueError):
+            # caught the file mid write by a writer that does not replace it, the next change reloads it
+            pass
+
+    def _watchFile(self):
+        """Make sure the options file is being watched"""
+        if self.path not in self._watcher.files() and os.path.exists(self.path):
+            self._watcher.addPath(self.path)
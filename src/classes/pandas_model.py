@@ -1,93 +1,471 @@
 from PyQt5.QtCore import Qt, QAbstractTableModel, QModelIndex, Qt, QVariant
 from PyQt5.QtWidgets import QMessageBox
 import pandas as pd
+import numpy as np
 from pathlib import Path
+from itertools import islice
+from bisect import bisect_right
+import threading
+
+from src.classes.atomic_file import writeAtomic
+from src.classes.column_info import ColumnInfo, READ_FLAGS
+from src.classes.edit_history import EditHistory
+from src.classes.row_ids import RowIds, newId, withIds
+from src.classes.search_index import SearchIndex
+from src.classes.column_types import compactFrame, appendRows, setCell, displayArray, displayValue, plainFrame, sortKey, ID_COLUMN
+
+CHUNK_ROWS = 256  # rows stringified together when a part of the table is first displayed
+FETCH_ROWS = 500  # rows handed to the view at startup and on each fetchMore
+BLOCK_ROWS = 10000  # rows gathered into one block when appending from an iterator
 
 class PandasModel(QAbstractTableModel):
-    def __init__(self, data):
+    def __init__(self, data, store=None, options=None):
         """Create object to hold dataframe info and interact with view"""
         QAbstractTableModel.__init__(self)
-        # set up variables
-        self._data = data
+        # set up variables (columns are stored compactly, see column_types)
+        self._frame = compactFrame(withIds(data), options)
+        # appended rows wait here as blocks until something needs the whole dataframe
+        self._blocks = []
+        self._block_starts = []  # row of each block's first row
+        self._rows = data.shape[0]
+        self._blocks_lock = threading.Lock()  # search threads read the frame and blocks together
+        self.store = store
         self.dirty = False
         self.editable = False
+        # display strings are cached per chunk of rows as they are first shown
+        self._chunks = {}
+        # only expose the first rows to the view, more are fetched as it scrolls
+        self._fetched = min(FETCH_ROWS, self._rows)
+        # inverted index used by searchMask, loaded from disk or built on the first search
+        self._index = None
+        # bumped on every change so background searches can tell their data went stale
+        self._version = 0
+        # this session's changes, as steps that can be undone and redone
+        self.history = EditHistory()
+        # names, positions and item flags of the columns, for per cell and per header lookups
+        self._columns = ColumnInfo(self._frame.columns)
+        # every task keeps its id for life, looked up in O(1) by rowForId
+        self._id_column = self._columns.position(ID_COLUMN)
+        self._row_ids = RowIds(self._idArray)
+
+    @property
+    def _data(self):
+        """The whole dataframe, with any appended blocks concatenated on first use"""
+        if self._blocks:
+            frame = self._concatenated(self._frame, self._blocks)
+            with self._blocks_lock:
+                self._frame = frame
+                self._blocks = []
+                self._block_starts = []
+        return self._frame
+
+    @_data.setter
+    def _data(self, data):
+        with self._blocks_lock:
+            self._frame = data
+            self._blocks = []
+            self._block_starts = []
+        self._rows = data.shape[0]
+        self._row_ids.reset()
+        if not self._columns.matches(data.columns):
+            self._columns = ColumnInfo(data.columns)
+            self._id_column = self._columns.position(ID_COLUMN)
+
+    def _concatenated(self, frame, blocks):
+        """Return frame with blocks of rows appended, leaving the model as it is"""
+        if not blocks:
+            return frame
+        return appendRows(frame, [row for block in blocks for row in block])
+
+    def _snapshot(self):
+        """Return the whole dataframe without concatenating in place (safe from a search thread)"""
+        with self._blocks_lock:
+            frame = self._frame
+            blocks = list(self._blocks)
+        return self._concatenated(frame, blocks)
+
+    def _loadChunk(self, number):
+        """Stringify one chunk of rows into the display cache"""
+        start = number * CHUNK_ROWS
+        block = self._data.iloc[start:start + CHUNK_ROWS]
+        chunk = [self._stringify(block.iloc[:, col]) for col in range(block.shape[1])]
+        self._chunks[number] = chunk
+        return chunk
+
+    def _stringify(self, series):
+        """Return a column slice as a list of display strings"""
+        return displayArray(series).tolist()
+
+    def _cell(self, row, col):
+        """Return a cell's display string, loading its chunk if needed"""
+        # read rows still in appended blocks directly, so checking new rows does not concatenate
+        if self._blocks and row >= self._block_starts[0] and row // CHUNK_ROWS not in self._chunks:
+            block = bisect_right(self._block_starts, row) - 1
+            return displayValue(self._blocks[block][row - self._block_starts[block]][col])
+        chunk = self._chunks.get(row // CHUNK_ROWS)
+        if chunk is None:
+            chunk = self._loadChunk(row // CHUNK_ROWS)
+        return chunk[col][row % CHUNK_ROWS]
 
     def rowCount(self, parent=None):
-        """return amount of rows"""
-        return self._data.shape[0]
+        """return amount of rows fetched into the view"""
+        return self._fetched
+
+    def totalRowCount(self):
+        """return amount of rows in the dataframe"""
+        return self._rows
+
+    def canFetchMore(self, parent=QModelIndex()):
+        """Return if there are rows the view has not been given yet"""
+        return not parent.isValid() and self._fetched < self._rows
+
+    def fetchMore(self, parent=QModelIndex()):
+        """Hand the next batch of rows to the view"""
+        self._fetchUpTo(min(self._fetched + FETCH_ROWS, self._rows))
+
+    def fetchAll(self):
+        """Hand every remaining row to the view (needed before searching or sorting)"""
+        self._fetchUpTo(self._rows)
+
+    def _fetchUpTo(self, rows):
+        """Grow the fetched window to the given amount of rows"""
+        if rows <= self._fetched:
+            return
+        self.beginInsertRows(QModelIndex(), self._fetched, rows - 1)
+        self._fetched = rows
+        self.endInsertRows()
 
     def columnCount(self, parent = None):
         """return amount of columns"""
-        return self._data.shape[1]
+        return self._frame.shape[1]
 
     def setData(self, index, value, role):
         """Update a cell"""
         if role == Qt.EditRole:
-            self._data.iloc[index.row(),index.column()] = value
-            self.dirty = True
-            self.dataChanged.emit(index, index)
+            old_value, value = self._editCell(index.row(), index.column(), value)
+            if value != old_value:
+                self.history.recordEdit(index.row(), index.column(), old_value, value)
             return True
         return False
 
+    def _editCell(self, row, col, value):
+        """Change a cell and journal it for the next save, returning its (old, new) text"""
+        old_value = self._cell(row, col)
+        value = self._setCell(row, col, value)
+        # journal the edit for the next save
+        if self.store is not None:
+            self.store.recordUpdate(row, self._data.columns[col], value, old_value)
+        self.dirty = True
+        return old_value, value
+
+    def _setCell(self, row, col, value):
+        """Store a value in a cell, keeping the caches in step, and return the text it displays as"""
+        old_value = self._cell(row, col)
+        # store the value in the column's type, getting back the text it displays as
+        value = setCell(self._data, row, col, value)
+        # refresh the cached display string for this cell only
+        chunk = self._chunks.get(row // CHUNK_ROWS)
+        if chunk is not None:
+            chunk[col][row % CHUNK_ROWS] = value
+        if self._index is not None:
+            self._index.update(row, self._data.columns[col], old_value, value)
+        self._version += 1
+        if row < self._fetched:
+            index = self.index(row, col)
+            self.dataChanged.emit(index, index)
+        return value
+
     def headerData(self, section, orientation, role=Qt.DisplayRole):
         """Set up headers and their attributes (colors, fonts, etc)"""
         if orientation == Qt.Horizontal:
             if role == Qt.DisplayRole:
-                try:
-                    return self._data.columns.tolist()[section]
-                except (IndexError,):
-                    return QVariant()
+                if 0 <= section < len(self._columns.names):
+                    return self._columns.names[section]
+                return QVariant()
         elif orientation == Qt.Vertical:
             if role == Qt.DisplayRole:
                 try:
-                    return self._data.index.tolist()[section]
+                    # index directly, converting the whole index for each row header scales with the table
+                    if section < self._frame.shape[0]:
+                        return str(self._frame.index[section])
+                    # appended rows are numbered by position, as they will be once concatenated
+                    return str(section) if section < self._rows else QVariant()
                 except (IndexError,):
                     return QVariant()
         return QVariant()
     
     def flags(self, index):
         "Set data to editable or view only"
-        # if editable from main_window is false or cell is in a column with predefined values
-        if self.editable == False or self.getColumnNames()[index.column()] in ['Category', 'Priority', 'Status']:
-            return Qt.ItemIsSelectable | Qt.ItemIsEnabled
-        # otherwise, data can be edited
-        else:
-            return Qt.ItemIsEditable | Qt.ItemIsEnabled
+        # view only unless editable from main_window, and columns with predefined values or ids always are
+        if self.editable:
+            return self._columns.edit_flags[index.column()]
+        return READ_FLAGS
     
     def data(self, index, role=Qt.DisplayRole):
         """Return a cell's value as str"""
         if index.isValid():
             if role == Qt.DisplayRole or role == Qt.EditRole:
-                value = self._data.iloc[index.row(), index.column()]
-                return str(value)
+                return self._cell(index.row(), index.column())
             
     def getRow(self, index):
         """Return a row as a string"""
-        value = self._data.iloc[index]
-        return str(value)
+        values = [self._cell(index, col) for col in range(self.columnCount())]
+        return str(pd.Series(values, index=self.getColumnNames(), name=index))
     
     def getRowObj(self, index):
-        """Return row as an object"""
-        return self._data.iloc[index]
+        """Return row as an object (of display strings)"""
+        values = [self._cell(index, col) for col in range(self.columnCount())]
+        return pd.Series(values, index=self.getColumnNames(), name=index)
     
     def getItem(self, row, col):
         """Return a cell as a string"""
-        value=self._data.iloc[row, col]
-        return str(value)
+        return self._cell(row, col)
 
     def toDataFrame(self):
         """Return data as a dataframe"""
         return self._data.copy()
+
+    def getDataFrame(self):
+        """Return the dataframe itself rather than a copy, for reading only"""
+        return self._data
     
     def getColumnNames(self):
         """Return the column names as a list"""
-        return self._data.columns.values.tolist()
+        return list(self._columns.names)
+
+    def columnIndex(self, column):
+        """Return the position of a column by name (ValueError if there is none)"""
+        return self._columns.position(column)
+
+    def rowId(self, row):
+        """Return the id of the task at a row"""
+        if self._blocks and row >= self._block_starts[0]:
+            block = bisect_right(self._block_starts, row) - 1
+            return int(self._blocks[block][row - self._block_starts[block]][self._id_column])
+        return int(self._frame.iat[row, self._id_column])
+
+    def rowForId(self, task_id):
+        """Return the row of the task with an id, or None if there is none"""
+        return self._row_ids.row(task_id)
+
+    def setItemById(self, task_id, column, value):
+        """Change a cell of the task with an id, returning if the task was found"""
+        row = self.rowForId(task_id)
+        if row is None:
+            return False
+        return self.setData(self.createIndex(row, self.columnIndex(column)), value, Qt.EditRole)
+
+    def removeById(self, task_id):
+        """Remove the task with an id, returning edits that conflicted with another session's.
+
+        Saved tasks can only be removed on top of what other sessions saved since,
+        so removing one saves straight away.
+        """
+        row = self.rowForId(task_id)
+        if row is None:
+            return []
+        if self.store is not None and row < self.store.savedRows():
+            conflicts = self.store.commit(self.getDataFrame, self.mergeChanges, lambda: self._removeTask(task_id))
+            self.dirty = False
+            return conflicts
+        self._removeTask(task_id)
+        return []
+
+    def _removeTask(self, task_id):
+        """Remove the task with an id from the rows and journal it"""
+        # looked up again, saving may have merged in rows that moved it
+        row = self.rowForId(task_id)
+        if row is None:
+            return
+        self._removeBlock(row, 1)
+        if self.store is not None:
+            self.store.recordRemove(row, 1)
+        self.history.rowsRemoved(row, 1)
+        self.dirty = True
+
+    def _idArray(self):
+        """Return every row's id in row order"""
+        with self._blocks_lock:
+            frame, blocks = self._frame, list(self._blocks)
+        ids = frame[ID_COLUMN].to_numpy()
+        if blocks:
+            ids = np.concatenate([ids, np.array([int(row[self._id_column]) for block in blocks for row in block], dtype=np.int64)])
+        return ids
     
     def saveToJson(self):
-        """Save current model data to json"""
-        from src.run import resource_path
-        self._data.to_json(resource_path(Path('data/task_data.json')))
+        """Save current model data to json, returning edits that conflicted with another session's"""
+        # only write the changes since the last save when a store is attached
+        if self.store is not None:
+            # changes other sessions saved first are merged in before writing
+            conflicts = self.store.commit(self.getDataFrame, self.mergeChanges)
+        else:
+            from src.run import resource_path
+            writeAtomic(resource_path(Path('data/task_data.json')), plainFrame(self._data).to_json().encode('utf-8'))
+            conflicts = []
         self.dirty = False
+        return conflicts
+
+    def pullChanges(self, reload=True):
+        """Apply changes other sessions saved since the last sync.
+
+        Returns edits that lost to another session's. With reload False, None is
+        returned instead when every task would have to be read again (see TaskStore.pull).
+        """
+        if self.store is None or not hasattr(self.store, 'pull'):
+            return []
+        return self.store.pull(self.mergeChanges, reload)
+
+    def pullReloaded(self, sync_point, reloaded):
+        """Apply tasks the store read again on another thread, or return None if the read is out of date"""
+        return self.store.pullReloaded(sync_point, reloaded, self.mergeChanges)
+
+    def mergeChanges(self, changes, first_new_row):
+        """Apply changes saved by another session.
+
+        Rows from first_new_row on were added in this session and are not saved
+        yet, so rows the other session added go in before them.
+        """
+        if any(change['op'] == 'clear' for change in changes):
+            self._rebuild(changes, first_new_row)
+            self.history.clear()
+            return
+
+        # otherwise cells change and rows are added, which the view is told about one by one
+        positions = self._columns.positions
+        saved_rows = first_new_row
+        for change in changes:
+            if change['op'] == 'update':
+                if change['row'] < saved_rows and change['column'] in positions:
+                    self._setCell(change['row'], positions[change['column']], change['value'])
+            elif change['op'] == 'insert':
+                rows = [list(row) for row in change['rows']]
+                # rows saved before tasks had ids are numbered by position, as loading them would
+                rows = [row + [saved_rows + i] if len(row) < len(positions) else row for i, row in enumerate(rows)]
+                if saved_rows < self._rows:
+                    self._insertBlock(saved_rows, rows)
+                    self.history.rowsInserted(saved_rows, len(rows))
+                else:
+                    self._appendBlocks([rows], record=False)
+                saved_rows += len(rows)
+            elif change['op'] == 'remove':
+                self._removeBlock(change['start'], change['count'])
+                self.history.rowsRemoved(change['start'], change['count'])
+                saved_rows -= change['count']
+
+    def _insertBlock(self, position, rows):
+        """Insert rows (value lists) before the unsaved rows that start at position"""
+        if not rows:
+            return
+        # take the unsaved rows out as value lists, they are few compared to the table
+        with self._blocks_lock:
+            frame, blocks, starts = self._frame, self._blocks, self._block_starts
+        if position < frame.shape[0]:
+            tail = plainFrame(frame.iloc[position:]).values.tolist()
+            frame = frame.iloc[:position]
+            blocks = [tail] + blocks
+            starts = [position] + starts
+        values = [row for block in blocks for row in block]
+        keep = values[:position - frame.shape[0]]
+        moved = values[position - frame.shape[0]:]
+        blocks, starts = [], []
+        for block in (keep, rows, moved):
+            if block:
+                starts.append(frame.shape[0] + sum(len(b) for b in blocks))
+                blocks.append(block)
+
+        visible = position < self._fetched
+        if visible:
+            self.beginInsertRows(QModelIndex(), position, position + len(rows) - 1)
+        with self._blocks_lock:
+            self._frame, self._blocks, self._block_starts = frame, blocks, starts
+        self._rows += len(rows)
+        self._row_ids.inserted(position, [int(row[self._id_column]) for row in rows])
+        # the moved rows are reindexed at their new positions
+        if self._index is not None:
+            columns = self.getColumnNames()
+            for offset, row in enumerate(moved):
+                for col, value in enumerate(row):
+                    self._index.update(position + offset, columns[col], str(value), '')
+            self._index.append(position, rows)
+            self._index.append(position + len(rows), moved)
+        for number in [number for number in self._chunks if number >= position // CHUNK_ROWS]:
+            del self._chunks[number]
+        self._version += 1
+        if visible:
+            self._fetched += len(rows)
+            self.endInsertRows()
+
+    def _removeBlock(self, start, count):
+        """Remove count rows from start on, returning their values"""
+        # take the rows from start on out as value lists, there are few when removing recent rows
+        with self._blocks_lock:
+            frame, blocks = self._frame, self._blocks
+        if start < frame.shape[0]:
+            tail = plainFrame(frame.iloc[start:]).values.tolist()
+            frame = frame.iloc[:start].copy()
+            blocks = [tail] + blocks
+        values = [row for block in blocks for row in block]
+        offset = start - frame.shape[0]
+        keep = values[:offset]
+        removed = values[offset:offset + count]
+        moved = values[offset + count:]
+        blocks, starts = [], []
+        for block in (keep, moved):
+            if block:
+                starts.append(frame.shape[0] + sum(len(b) for b in blocks))
+                blocks.append(block)
+
+        last = min(start + count, self._fetched) - 1
+        visible = start <= last
+        if visible:
+            self.beginRemoveRows(QModelIndex(), start, last)
+        with self._blocks_lock:
+            self._frame, self._blocks, self._block_starts = frame, blocks, starts
+        self._rows -= count
+        self._row_ids.removed(start, [int(row[self._id_column]) for row in removed])
+        # the removed and moved rows leave the index, and the moved ones come back at their new positions
+        if self._index is not None:
+            columns = self.getColumnNames()
+            for offset, row in enumerate(removed + moved):
+                for col, value in enumerate(row):
+                    self._index.update(start + offset, columns[col], str(value), '')
+            self._index.append(start, moved)
+        for number in [number for number in self._chunks if number >= start // CHUNK_ROWS]:
+            del self._chunks[number]
+        self._version += 1
+        if visible:
+            self._fetched -= last - start + 1
+            self.endRemoveRows()
+        return removed
+
+    def _rebuild(self, changes, first_new_row):
+        """Apply changes that drop saved rows by rebuilding the dataframe"""
+        data = self._data
+        saved = data.iloc[:first_new_row].reset_index(drop=True).copy()
+        new_rows = plainFrame(data.iloc[first_new_row:]).values.tolist()
+        positions = {col: i for i, col in enumerate(data.columns)}
+        for change in changes:
+            if change['op'] == 'update':
+                if change['row'] < saved.shape[0] and change['column'] in positions:
+                    setCell(saved, change['row'], positions[change['column']], change['value'])
+            elif change['op'] == 'insert':
+                saved = appendRows(saved, change['rows'])
+            elif change['op'] == 'remove':
+                saved = saved.drop(saved.index[change['start']:change['start'] + change['count']]).reset_index(drop=True)
+            elif change['op'] == 'clear':
+                saved = saved.iloc[:0]
+        if new_rows:
+            saved = appendRows(saved, new_rows)
+
+        # a model that had handed every row out (as it has under the filter proxy) keeps doing so
+        fetched_all = self._fetched == self._rows
+        self.beginResetModel()
+        self._data = saved
+        self._chunks = {}
+        self._fetched = self._rows if fetched_all else min(max(self._fetched, FETCH_ROWS), self._rows)
+        self._index = None
+        self._version += 1
+        self.endResetModel()
 
     def makeViewable(self):
         """Change editable to False"""
@@ -99,37 +477,264 @@ class PandasModel(QAbstractTableModel):
     
     def clearAllData(self):
         """Drop all rows"""
-        self._data = self._data.drop(self._data.index)
-        self.headerDataChanged.emit(Qt.Horizontal, 0, self.columnCount())
-        self.layoutChanged.emit()
+        self.history.recordClear(self._clearRows())
+
+    def _clearRows(self):
+        """Drop all rows and journal it, returning the dropped dataframe"""
+        dropped = self._data
+        # reset instead of a bare layoutChanged so proxies drop their row mappings
+        self.beginResetModel()
+        self._data = dropped.drop(dropped.index)
+        self._chunks = {}
+        self._fetched = 0
+        self._index = None
+        self._version += 1
+        if self.store is not None:
+            self.store.recordClear()
+        self.dirty = True
+        self.endResetModel()
+        self.headerDataChanged.emit(Qt.Horizontal, 0, self.columnCount() - 1)
+        return dropped
+
+    def undo(self):
+        """Revert the last change, returning edits that conflicted with another session's.
+
+        Saved rows can only be removed on top of what other sessions saved since,
+        so undoing an insert that was already saved saves straight away.
+        """
+        step = self.history.nextUndo()
+        if step is None:
+            return []
+        if step[0] == 'insert' and self.store is not None and step[1] < self.store.savedRows():
+            conflicts = self.store.commit(self.getDataFrame, self.mergeChanges, self._undoStep)
+            self.dirty = False
+            return conflicts
+        self._undoStep()
+        return []
+
+    def _undoStep(self):
+        """Revert the step at the top of the history"""
+        step = self.history.popUndo()
+        if step is None:
+            return
+        if step[0] == 'edit':
+            self._editCell(step[1], step[2], step[3])
+            self.history.undone(step)
+        elif step[0] == 'insert':
+            values = self._removeBlock(step[1], step[2])
+            if self.store is not None:
+                self.store.recordRemove(step[1], step[2])
+            self.dirty = True
+            self.history.insertUndone(step, values)
+        else:
+            # the cleared rows come back at the end, after any saved by others since
+            self._appendBlocks([plainFrame(step[1]).values.tolist()])
+            step[1] = None
+            self.dirty = True
+            self.history.undone(step)
+
+    def redo(self):
+        """Apply the last undone change again"""
+        step = self.history.popRedo()
+        if step is None:
+            return
+        if step[0] == 'edit':
+            self._editCell(step[1], step[2], step[4])
+            self.history.redone(step)
+        elif step[0] == 'insert':
+            start = self._rows
+            self._appendBlocks([step[3]])
+            self.dirty = True
+            self.history.insertRedone(step, start)
+        else:
+            step[1] = self._clearRows()
+            self.history.redone(step)
     
-    def addRows(self, df):
-        """Add rows to the end of the dataframe"""
-        # check for validity
-        if not isinstance(df, pd.DataFrame) or df.shape[1] != self._data.shape[1]:
+    def addRows(self, rows):
+        """Add rows to the end of the dataframe.
+
+        rows can be a dataframe with the model's columns, or a list or iterator of
+        dicts (column -> value, missing columns are left blank) or value lists.
+        Everything is announced to the view in one insert, and the new rows are
+        kept as lists of values until the whole dataframe is next needed, so
+        appending a row at a time does not copy the table on every call.
+        """
+        # gather the new rows into blocks with the model's columns
+        blocks = self._toBlocks(rows)
+        if blocks is None:
             return False
-        
-        # Start inserting rows
-        orig_rows = self.rowCount()
-        self.beginInsertRows(QModelIndex(), orig_rows, orig_rows+df.shape[0]-1)  # Notify the model about the upcoming row insertion
+        count = sum(len(block) for block in blocks)
+        if count == 0:
+            return True
+        self._assignIds(blocks)
 
         # Append the rows
-        try:
-            self._data = self._data._append(df, ignore_index=True)
-            self._data = self._data.reset_index(drop=True)
+        start = self.totalRowCount()
+        try: self._appendBlocks(blocks)
         except Exception as e:
             QMessageBox.critical(None, 'Error Appending Rows', str(e))
             return
-
-        # End inserting rows
-        self.endInsertRows()  # Notify the model that the rows have been inserted
+        self.history.recordInsert(start, count)
 
         # mark as dirty
         self.dirty = True
 
         # return successful
         return True
-    
+
+    def _appendBlocks(self, blocks, record=True):
+        """Append blocks of value lists, journaling them for the next save if record is set"""
+        count = sum(len(block) for block in blocks)
+        if count == 0:
+            return
+
+        # Start inserting rows (only announced to the view if it has every row already)
+        orig_rows = self.totalRowCount()
+        visible = self._fetched == orig_rows
+        if visible:
+            self.beginInsertRows(QModelIndex(), orig_rows, orig_rows+count-1)  # Notify the model about the upcoming row insertion
+
+        start = orig_rows
+        for block in blocks:
+            with self._blocks_lock:
+                self._blocks.append(block)
+                self._block_starts.append(start)
+            if self._index is not None:
+                self._index.append(start, block)
+            self._row_ids.appended(start, [int(row[self._id_column]) for row in block])
+            if record and self.store is not None:
+                self.store.recordInsert(block)
+            start += len(block)
+        self._rows = start
+        # drop the cached chunk the new rows extend, the rest load when shown
+        self._chunks.pop(orig_rows // CHUNK_ROWS, None)
+        self._version += 1
+
+        # End inserting rows
+        if visible:
+            self._fetched = self.totalRowCount()
+            self.endInsertRows()  # Notify the model that the rows have been inserted
+
+    def _assignIds(self, blocks):
+        """Give new rows without an id, or with one another task has, a new id"""
+        seen = set()
+        for block in blocks:
+            for row in block:
+                try:
+                    task_id = int(row[self._id_column])
+                except (TypeError, ValueError):
+                    task_id = None
+                # ids of imported tasks are kept, so a backup can be restored as it was
+                if task_id is None or task_id in seen or self.rowForId(task_id) is not None:
+                    task_id = newId()
+                seen.add(task_id)
+                row[self._id_column] = task_id
+
+    def _toBlocks(self, rows):
+        """Return rows as blocks of value lists in column order, or None if they do not fit"""
+        columns = self.getColumnNames()
+        if isinstance(rows, pd.DataFrame):
+            # tasks from outside the tracker have no ids yet
+            if ID_COLUMN not in rows.columns and rows.shape[1] == len(columns) - 1:
+                rows = rows.assign(**{ID_COLUMN: ''})
+            if rows.shape[1] != len(columns):
+                return None
+            # match columns by name when they line up, otherwise by position
+            if set(rows.columns) == set(columns):
+                rows = rows[columns]
+            return [rows.values.tolist()]
+
+        blocks = []
+        rows = iter(rows)
+        while True:
+            batch = list(islice(rows, BLOCK_ROWS))
+            if not batch:
+                return blocks
+            block = []
+            for row in batch:
+                if isinstance(row, dict):
+                    if any(key not in columns for key in row):
+                        return None
+                    block.append([row.get(col, '') for col in columns])
+                elif len(row) == len(columns):
+                    block.append(list(row))
+                elif len(row) == len(columns) - 1:
+                    block.append(list(row) + [''])
+                else:
+                    return None
+            blocks.append(block)
+
+    def queryRows(self, column, value):
+        """Return the rows where column equals value, in ascending order"""
+        cells = self._data[column]
+        # let an indexed store answer for committed rows, then recheck rows edited since
+        if self.store is not None and hasattr(self.store, 'queryRows'):
+            touched = self.store.pendingRows()
+            if touched is not None:
+                rows = self.store.queryRows(column, value) - touched
+                rows.update(row for row in touched if row < len(cells) and cells.iat[row] == value)
+                return np.array(sorted(rows), dtype=np.int64)
+        return np.flatnonzero((cells == value).to_numpy())
+
+    def searchMask(self, text, rows=None):
+        """Return a mask of rows matching a search query (only rows listed are checked)"""
+        found = self.matchSearch(text, rows)
+        if rows is None:
+            return found
+        mask = np.zeros(self._rows, dtype=bool)
+        mask[rows] = found
+        return mask
+
+    def matchSearch(self, text, rows=None):
+        """Return whether each of rows (default all) matches a search query, see SearchIndex.query"""
+        index = self._index
+        if index is None:
+            version = self._version
+            index = SearchIndex.build(self._snapshot())
+            # a background search may have built this while the data changed, only keep it if current
+            if version == self._version:
+                self._index = index
+        total = self._rows
+        mask = index.query(text, total, lambda columns, value: self._containsMask(columns, value, total, rows))
+        return mask if rows is None else mask[rows]
+
+    def _containsMask(self, columns, text, total, rows=None):
+        """Return a mask of rows (default all) where one of columns contains text (lowercase), for search terms without words"""
+        mask = np.zeros(total, dtype=bool)
+        if rows is not None:
+            # a few edited or added rows are checked cell by cell
+            positions = [self.columnIndex(col) for col in columns]
+            for row in np.asarray(rows).tolist():
+                mask[row] = any(text in self.getItem(row, col).lower() for col in positions)
+            return mask
+        data = self._snapshot()
+        for col in columns:
+            found = pd.Series(displayArray(data[col]), dtype=object).str.lower().str.contains(text, regex=False).to_numpy(dtype=bool)
+            count = min(len(found), total)
+            mask[:count] |= found[:count]
+        return mask
+
+    def setSearchIndex(self, index):
+        """Use a previously saved search index"""
+        self._index = index
+
+    def saveSearchIndex(self, path, fingerprint):
+        """Save the search index if it changed, tagged with the saved data it matches"""
+        if self._index is not None and (self._index.changed or self._index.fingerprint != fingerprint):
+            self._index.fingerprint = fingerprint
+            self._index.save(path)
+
+    def version(self):
+        """Return a counter that changes whenever the data does"""
+        return self._version
+
+    def sortedRows(self, column):
+        """Return row positions in ascending order of a column"""
+        # the store's index order is only usable when nothing is waiting to be saved
+        if self.store is not None and hasattr(self.store, 'sortedRows') and not self.store.hasPending():
+            return np.array(self.store.sortedRows(column), dtype=np.int64)
+        return np.argsort(sortKey(self._data[column]), kind='stable')
+
     def getIndex(self):
         """Return the data index information"""
         return self._data.index
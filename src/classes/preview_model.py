@@ -0,0 +1,78 @@
+from PyQt5.QtCore import Qt, QAbstractTableModel, QModelIndex, QVariant
+from PyQt5.QtGui import QColor
+
+NEW_ROW_COLOR = QColor(214, 245, 214)  # background of rows that are about to be added
+
+
+class PreviewModel(QAbstractTableModel):
+    """Read-only table of the existing tasks followed by rows staged for import.
+
+    Rows below the existing row count are read from the live model and the rest
+    from the staged rows, so neither is copied to build the preview.
+    """
+
+    def __init__(self, model, new_rows):
+        """Present model's rows with new_rows (value lists in column order) after them"""
+        QAbstractTableModel.__init__(self)
+        # set up variables
+        self.model = model
+        self.new_rows = new_rows
+        self._existing = model.totalRowCount()
+
+        # follow rows being added, removed or cleared in the main window while the preview is open
+        model.rowsInserted.connect(self._sourceChanged)
+        model.rowsRemoved.connect(self._sourceChanged)
+        model.layoutChanged.connect(self._sourceChanged)
+        model.modelReset.connect(self._sourceChanged)
+
+    def rowCount(self, parent=QModelIndex()):
+        """return amount of existing and new rows"""
+        if parent.isValid():
+            return 0
+        return self._existingRows() + len(self.new_rows)
+
+    def columnCount(self, parent=QModelIndex()):
+        """return amount of columns"""
+        if parent.isValid():
+            return 0
+        return self.model.columnCount()
+
+    def firstNewRow(self):
+        """Return the row of the first staged row"""
+        return self._existingRows()
+
+    def _existingRows(self):
+        """Return the existing row count, never more than the main model holds right now"""
+        return min(self._existing, self.model.totalRowCount())
+
+    def data(self, index, role=Qt.DisplayRole):
+        """Return a cell's value as str, shading new rows"""
+        if not index.isValid():
+            return QVariant()
+        row = index.row()
+        existing = self._existingRows()
+        if row >= existing + len(self.new_rows):
+            return QVariant()
+        if role == Qt.DisplayRole or role == Qt.EditRole:
+            if row < existing:
+                return self.model.getItem(row, index.column())
+            return str(self.new_rows[row - existing][index.column()])
+        if role == Qt.BackgroundRole and row >= existing:
+            return NEW_ROW_COLOR
+        return QVariant()
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        """Use the main model's column names"""
+        if orientation == Qt.Horizontal and role == Qt.DisplayRole:
+            return self.model.headerData(section, orientation, role)
+        return QVariant()
+
+    def flags(self, index):
+        """Preview cells are view only"""
+        return Qt.ItemIsSelectable | Qt.ItemIsEnabled
+
+    def _sourceChanged(self, *args):
+        """Pick up the main model's new row count"""
+        self.beginResetModel()
+        self._existing = self.model.totalRowCount()
+        self.endResetModel()
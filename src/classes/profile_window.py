@@ -0,0 +1,95 @@
+from PyQt5.QtWidgets import QMainWindow, QWidget, QTableWidget, QTableWidgetItem, QPlainTextEdit, QPushButton, QLabel, QVBoxLayout, QHBoxLayout, QHeaderView
+from PyQt5.QtCore import QSize, QTimer, Qt
+from datetime import datetime
+
+from src.classes.profiler import profiler, STALL_MS
+
+REFRESH_MS = 1000  # how often the shown timings are updated
+
+
+class ProfileWindow(QMainWindow):
+    def __init__(self):
+        """Create a window showing the recorded timings and event loop stalls as they come in"""
+        super().__init__()
+
+        # set up window
+        self.setMinimumSize(QSize(640, 480))
+        self.setWindowTitle("Timings")
+
+        # timings table and the latest stalls below it
+        self.state_label = QLabel()
+        self.table = QTableWidget(0, 5)
+        self.table.setHorizontalHeaderLabels(['Name', 'Calls', 'Total ms', 'Mean ms', 'Max ms'])
+        self.table.horizontalHeader().setSectionResizeMode(0, QHeaderView.Stretch)
+        self.table.verticalHeader().hide()
+        self.table.setEditTriggers(QTableWidget.NoEditTriggers)
+        self.stall_label = QLabel()
+        self.stall_text = QPlainTextEdit()
+        self.stall_text.setReadOnly(True)
+
+        # buttons to start over and to keep the numbers so far
+        reset_button = QPushButton('Reset')
+        reset_button.clicked.connect(self.reset)
+        log_button = QPushButton('Write to Log')
+        log_button.clicked.connect(profiler.writeSummary)
+
+        # create layout
+        buttons = QHBoxLayout()
+        buttons.addStretch()
+        buttons.addWidget(reset_button)
+        buttons.addWidget(log_button)
+        container = QWidget()
+        layout = QVBoxLayout()
+        layout.addWidget(self.state_label)
+        layout.addWidget(self.table, 3)
+        layout.addWidget(self.stall_label)
+        layout.addWidget(self.stall_text, 2)
+        layout.addLayout(buttons)
+        container.setLayout(layout)
+        self.setCentralWidget(container)
+
+        # refresh while the window is open
+        self.timer = QTimer(self)
+        self.timer.setInterval(REFRESH_MS)
+        self.timer.timeout.connect(self.refresh)
+        self.refresh()
+        self.show()
+
+    def refresh(self):
+        """Show the latest timings and stalls"""
+        if profiler.enabled:
+            self.state_label.setText('Recording timings' + (' to ' + str(profiler.log_path) if profiler.log_path else ''))
+        else:
+            self.state_label.setText('Not recording, turn on Record Timings to measure')
+        rows = profiler.stats()
+        self.table.setRowCount(len(rows))
+        for i, row in enumerate(rows):
+            texts = [row[0], '{0:,}'.format(row[1]), '{0:,.1f}'.format(row[2]), '{0:,.3f}'.format(row[3]), '{0:,.1f}'.format(row[4])]
+            for j, text in enumerate(texts):
+                item = QTableWidgetItem(text)
+                if j > 0:
+                    item.setTextAlignment(Qt.AlignRight | Qt.AlignVCenter)
+                self.table.setItem(i, j, item)
+        self.stall_label.setText('{0:,} event loop stalls over {1:.0f} ms'.format(profiler.stall_count, STALL_MS))
+        # the newest stall first, with where the gui thread was stuck
+        stalls = []
+        for when, ms, stack in reversed(profiler.stalls):
+            stalls.append('{0} stalled for {1:,.0f} ms\n{2}'.format(datetime.fromtimestamp(when).strftime('%H:%M:%S'), ms, stack or ''))
+        text = '\n'.join(stalls)
+        if text != self.stall_text.toPlainText():
+            self.stall_text.setPlainText(text)
+
+    def reset(self):
+        """Clear the timings and stalls"""
+        profiler.reset()
+        self.refresh()
+
+    def showEvent(self, event):
+        """Start refreshing when shown"""
+        self.timer.start()
+        super().showEvent(event)
+
+    def hideEvent(self, event):
+        """Stop refreshing when hidden"""
+        self.timer.stop()
+        super().hideEvent(event)
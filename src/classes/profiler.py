@@ -0,0 +1,198 @@
+from PyQt5.QtCore import QObject, QTimer, pyqtSignal
+from collections import deque
+from contextlib import contextmanager, nullcontext
+from logging.handlers import RotatingFileHandler
+import importlib
+import logging
+import os
+import sys
+import threading
+import time
+import traceback
+
+PROFILE_AT_START = os.environ.get('TASK_TRACKER_PROFILE', '') not in ('', '0')  # record timings from launch
+STALL_MS = float(os.environ.get('TASK_TRACKER_STALL_MS', 200))  # event loop pauses longer than this are logged
+TICK_MS = 50  # how often the event loop is checked on
+SUMMARY_S = 60  # how often the timings are written to the log
+LOG_BYTES = 1_000_000  # size of a log file before it is rotated
+LOG_FILES = 3  # rotated log files kept
+RECENT_STALLS = 20  # stalls kept for the stats window
+# hot paths timed while profiling: (module, class, methods)
+HOT_PATHS = [
+    ('src.classes.pandas_model', 'PandasModel', ['data', 'setData', 'addRows', 'saveToJson', 'pullChanges', 'undo', 'redo']),
+    ('src.classes.filter_proxy', 'TaskFilterProxy', ['setColumnFilter', 'setSearchText', 'setSearchResult', 'sort']),
+]
+
+
+class Profiler(QObject):
+    """Opt-in timings and call counts for the hot paths, and a watch for event loop stalls.
+
+    Nothing is measured until enable() is called (TASK_TRACKER_PROFILE=1 or the
+    menu): the hot path methods are only swapped for timed wrappers while
+    profiling, so the disabled cost is nil, and span() hands out a shared no-op
+    context. Stalls are noticed by a timer that fires late, and a watchdog
+    thread records where the gui thread was stuck. Timings, slow calls and
+    stalls go to a rotating log file.
+    """
+    stallFound = pyqtSignal(float)  # ms the event loop was blocked for
+
+    def __init__(self):
+        """Start disabled with empty stats"""
+        super().__init__()
+        self.enabled = False
+        self.log_path = None
+        self._stats = {}  # name -> [calls, total seconds, longest seconds]
+        self._originals = []  # (class, method name, original function) swapped out while enabled
+        self.stalls = deque(maxlen=RECENT_STALLS)  # (time, ms, stack) of recent stalls
+        self.stall_count = 0
+        self._logger = logging.getLogger('task_tracker.profile')
+        self._logger.propagate = False
+        self._logger.setLevel(logging.INFO)
+        self._tick_timer = QTimer(self)
+        self._tick_timer.setInterval(TICK_MS)
+        self._tick_timer.timeout.connect(self._tick)
+        self._summary_timer = QTimer(self)
+        self._summary_timer.setInterval(SUMMARY_S * 1000)
+        self._summary_timer.timeout.connect(self.writeSummary)
+        self._last_tick = 0.0
+        self._stuck_stack = None  # where the gui thread was while the current stall lasted
+        self._watchdog = None
+        self._stop = threading.Event()
+
+    def enable(self, log_path=None):
+        """Start timing the hot paths and watching for stalls, logging to log_path"""
+        if self.enabled:
+            return
+        if log_path is not None and log_path != self.log_path:
+            self._openLog(log_path)
+        for module, name, methods in HOT_PATHS:
+            cls = getattr(importlib.import_module(module), name)
+            for method in methods:
+                original = cls.__dict__[method]
+                self._originals.append((cls, method, original))
+                setattr(cls, method, self._timed(name + '.' + method, original))
+        self.enabled = True
+        self._last_tick = time.perf_counter()
+        self._tick_timer.start()
+        self._summary_timer.start()
+        self._stop.clear()
+        self._watchdog = threading.Thread(target=self._watch, args=(threading.main_thread().ident,), name='stall-watchdog', daemon=True)
+        self._watchdog.start()
+        self._logger.info('profiling started')
+
+    def disable(self):
+        """Put the original methods back and stop watching, writing the timings to the log"""
+        if not self.enabled:
+            return
+        for cls, method, original in self._originals:
+            setattr(cls, method, original)
+        self._originals = []
+        self.enabled = False
+        self._tick_timer.stop()
+        self._summary_timer.stop()
+        self._stop.set()
+        self._watchdog = None
+        self.writeSummary()
+        self._logger.info('profiling stopped')
+
+    def span(self, name):
+        """Return a context manager timing a block under name (doing nothing while disabled)"""
+        return self._span(name) if self.enabled else nullcontext()
+
+    @contextmanager
+    def _span(self, name):
+        """Time a block"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - start)
+
+    def record(self, name, elapsed):
+        """Add one call of name that took elapsed seconds"""
+        entry = self._stats.get(name)
+        if entry is None:
+            entry = self._stats[name] = [0, 0.0, 0.0]
+        entry[0] += 1
+        entry[1] += elapsed
+        if elapsed > entry[2]:
+            entry[2] = elapsed
+        if elapsed * 1000 > STALL_MS:
+            self._logger.info('slow call: %s took %.0f ms', name, elapsed * 1000)
+
+    def stats(self):
+        """Return (name, calls, total ms, mean ms, longest ms) for everything measured, slowest in total first"""
+        rows = [(name, calls, total * 1000, total * 1000 / calls, longest * 1000)
+                for name, (calls, total, longest) in list(self._stats.items())]
+        return sorted(rows, key=lambda row: row[2], reverse=True)
+
+    def reset(self):
+        """Forget the timings and stalls measured so far"""
+        self._stats = {}
+        self.stalls.clear()
+        self.stall_count = 0
+
+    def writeSummary(self):
+        """Write the timings so far to the log"""
+        rows = self.stats()
+        if not rows:
+            return
+        lines = ['{0:<36} {1:>9} {2:>11} {3:>9} {4:>9}'.format('timings', 'calls', 'total ms', 'mean ms', 'max ms')]
+        lines += ['{0:<36} {1:>9} {2:>11.1f} {3:>9.3f} {4:>9.1f}'.format(*row) for row in rows]
+        lines.append('{0} event loop stalls over {1:.0f} ms'.format(self.stall_count, STALL_MS))
+        self._logger.info('\n'.join(lines))
+
+    def _openLog(self, log_path):
+        """Send the log to a rotating file"""
+        os.makedirs(os.path.dirname(log_path), exist_ok=True)
+        for handler in list(self._logger.handlers):
+            self._logger.removeHandler(handler)
+            handler.close()
+        handler = RotatingFileHandler(log_path, maxBytes=LOG_BYTES, backupCount=LOG_FILES, encoding='utf-8')
+        handler.setFormatter(logging.Formatter('%(asctime)s %(message)s'))
+        self._logger.addHandler(handler)
+        self.log_path = log_path
+
+    def _timed(self, name, method):
+        """Return method wrapped to record each call's time under name"""
+        record = self.record
+        clock = time.perf_counter
+
+        def timed(*args, **kwargs):
+            start = clock()
+            try:
+                return method(*args, **kwargs)
+            finally:
+                record(name, clock() - start)
+        timed.__name__ = method.__name__
+        timed.__doc__ = method.__doc__
+        return timed
+
+    def _tick(self):
+        """Notice the event loop coming back late from a stall (gui thread)"""
+        now = time.perf_counter()
+        late = (now - self._last_tick) * 1000 - TICK_MS
+        self._last_tick = now
+        if late > STALL_MS:
+            stack, self._stuck_stack = self._stuck_stack, None
+            self.stall_count += 1
+            self.stalls.append((time.time(), late, stack))
+            self._logger.info('event loop stalled for %.0f ms%s', late, '\n' + stack if stack else '')
+            self.stallFound.emit(late)
+
+    def _watch(self, gui_thread):
+        """Record where the gui thread is while the event loop has not ticked for a while (watchdog thread)"""
+        seen = None
+        while not self._stop.wait(STALL_MS / 2000):
+            last = self._last_tick
+            if last == seen or (time.perf_counter() - last) * 1000 < TICK_MS + STALL_MS:
+                continue
+            # one stack per stall, taken while it is still going on
+            seen = last
+            frame = sys._current_frames().get(gui_thread)
+            if frame is not None:
+                self._stuck_stack = ''.join(traceback.format_stack(frame))
+
+
+# shared by the main window and the stats window
+profiler = Profiler()
@@ -0,0 +1,89 @@
+import secrets
+
+import numpy as np
+import pandas as pd
+
+from src.classes.column_types import ID_COLUMN
+
+FIRST_NEW_ID = 2 ** 32  # tasks saved before ids existed are numbered below this by position
+LAST_NEW_ID = 2 ** 53  # ids stay exact as json numbers and floats
+
+
+class RowIds:
+    """Lookup from task id to the row the task is at.
+
+    Ids of the rows present when the lookup is built are held in a pandas index,
+    whose hash table answers in O(1) for a few bytes per row. Rows appended or
+    moved after that are kept in a small dict, so adding tasks and changing the
+    rows after the index keep it current. Moving rows the index covers (another
+    session removing saved tasks) rebuilds it on the next lookup.
+    """
+
+    def __init__(self, ids):
+        """Set up a lookup over ids(), a function returning every row's id in row order"""
+        self._ids = ids
+        self._index = None  # ids of rows 0 to len(self._index) - 1
+        self._recent = {}  # id -> row for rows after the index
+
+    def row(self, task_id):
+        """Return the row of the task with an id, or None if there is none"""
+        if self._index is None:
+            self._index = pd.Index(self._ids())
+            self._recent = {}
+        row = self._recent.get(task_id)
+        if row is not None:
+            return row
+        try:
+            row = self._index.get_loc(task_id)
+        except KeyError:
+            return None
+        # an id held by several rows (a damaged file) finds the first of them
+        if isinstance(row, slice):
+            row = row.start
+        elif isinstance(row, np.ndarray):
+            row = np.argmax(row)
+        return int(row)
+
+    def appended(self, first, ids):
+        """Add rows appended from row first on"""
+        if self._index is not None:
+            self._recent.update(zip(ids, range(first, first + len(ids))))
+
+    def inserted(self, position, ids):
+        """Add rows inserted at position, moving the rows after them down"""
+        if self._index is None:
+            return
+        if position < len(self._index):
+            self.reset()
+            return
+        count = len(ids)
+        self._recent = {task_id: row + count if row >= position else row for task_id, row in self._recent.items()}
+        self._recent.update(zip(ids, range(position, position + count)))
+
+    def removed(self, start, ids):
+        """Drop rows removed from start on, moving the rows after them up"""
+        if self._index is None:
+            return
+        if start < len(self._index):
+            self.reset()
+            return
+        gone = set(ids)
+        self._recent = {task_id: row - len(ids) if row > start else row
+                        for task_id, row in self._recent.items() if task_id not in gone}
+
+    def reset(self):
+        """Forget every row (rebuilt from ids() on the next lookup)"""
+        self._index = None
+        self._recent = {}
+
+
+def newId():
+    """Return a new task id, random so sessions never need to agree on the next one"""
+    return FIRST_NEW_ID + secrets.randbelow(LAST_NEW_ID - FIRST_NEW_ID)
+
+
+def withIds(data):
+    """Return data with an ID column as its last column, numbering rows by position if it has none"""
+    if ID_COLUMN in data.columns:
+        return data
+    return data.assign(**{ID_COLUMN: np.arange(data.shape[0], dtype=np.int64)})
@@ -0,0 +1,214 @@
+import os
+import re
+
+import numpy as np
+import pandas as pd
+
+from src.classes.column_types import displayArray, ID_COLUMN
+
+TOKEN_PATTERN = re.compile(r'\w+')
+LAST_CHAR = '\U0010ffff'  # sorts after every character, used to find the end of a prefix range
+COMPACT_CHANGES = 20000  # pending tokens/rows in a column before its arrays are rebuilt
+UNINDEXED_COLUMNS = [ID_COLUMN]  # a token per row that nobody searches for
+
+
+def tokenize(text):
+    """Split text into its distinct lowercase word tokens"""
+    return list(set(TOKEN_PATTERN.findall(str(text).lower())))
+
+
+def normalizeColumn(name):
+    """Turn a column name into the form used in scoped terms (e.g. 'Date Created' -> 'datecreated')"""
+    return name.lower().replace(' ', '').replace('_', '')
+
+
+class ColumnPostings:
+    """Token -> rows lookup for one column: a sorted token array with each token's rows stored contiguously.
+
+    Rows edited or added after the arrays were built are tracked separately until the next rebuild.
+    """
+
+    def __init__(self, tokens, offsets, rows):
+        """Wrap prebuilt arrays"""
+        self.tokens = tokens  # sorted unique tokens
+        self.offsets = offsets  # rows of tokens[i] are rows[offsets[i]:offsets[i + 1]]
+        self.rows = rows
+        self.stale = set()  # rows whose entries in the arrays are out of date
+        self.added = {}  # token -> rows for cells changed since the build
+
+    @classmethod
+    def build(cls, values):
+        """Index a column's cell values"""
+        codes, uniques = pd.factorize(pd.Series(values, dtype=object).astype(str), sort=False)
+        # (unique value, token) pairs in unique value order
+        pairs = pd.Series([tokenize(value) for value in uniques], dtype=object).explode().dropna()
+        if len(pairs) == 0:
+            return cls(np.array([], dtype=str), np.zeros(1, dtype=np.int64), np.array([], dtype=np.int64))
+        token_ids, tokens = pd.factorize(pairs.to_numpy(), sort=True)
+        pair_values = pairs.index.to_numpy()
+
+        # expand to one (row, token) pair for every token of every row
+        per_value = np.bincount(pair_values, minlength=len(uniques))
+        value_starts = np.concatenate([[0], np.cumsum(per_value)[:-1]])
+        per_row = per_value[codes]
+        row_ids = np.repeat(np.arange(len(codes)), per_row)
+        row_starts = np.repeat(np.cumsum(per_row) - per_row, per_row)
+        pair_index = np.repeat(value_starts[codes], per_row) + (np.arange(len(row_ids)) - row_starts)
+        row_tokens = token_ids[pair_index]
+
+        # group rows by token (stable, so each token's rows stay ascending)
+        order = np.argsort(row_tokens, kind='stable')
+        offsets = np.concatenate([[0], np.cumsum(np.bincount(row_tokens, minlength=len(tokens)))])
+        return cls(np.asarray(tokens, dtype=str), offsets.astype(np.int64), row_ids[order].astype(np.int64))
+
+    def update(self, row, old_value, new_value):
+        """Move a row from its old cell's tokens to the new cell's tokens"""
+        for token in tokenize(old_value):
+            rows = self.added.get(token)
+            if rows is not None:
+                rows.discard(row)
+        self.stale.add(row)
+        for token in tokenize(new_value):
+            self.added.setdefault(token, set()).add(row)
+
+    def append(self, first, values):
+        """Index cells of rows appended starting at row first"""
+        for row, value in enumerate(values, first):
+            for token in tokenize(value):
+                self.added.setdefault(token, set()).add(row)
+
+    def prefixRows(self, prefix):
+        """Return the rows with a token starting with prefix"""
+        start = np.searchsorted(self.tokens, prefix, 'left')
+        end = np.searchsorted(self.tokens, prefix + LAST_CHAR, 'left')
+        rows = self.rows[self.offsets[start]:self.offsets[end]]
+        if self.stale:
+            rows = rows[~np.isin(rows, np.fromiter(self.stale, dtype=np.int64, count=len(self.stale)))]
+        extra = [row for token, found in list(self.added.items()) if token.startswith(prefix) for row in found]
+        if extra:
+            rows = np.concatenate([rows, np.array(extra, dtype=np.int64)])
+        return rows
+
+
+class SearchIndex:
+    """Inverted index over every column's word tokens, answering prefix and column-scoped AND queries"""
+
+    def __init__(self, columns, postings, fingerprint=None):
+        """Wrap per-column postings (columns lists every column, in row order, indexed or not)"""
+        self.columns = columns
+        self._postings = postings  # column name -> ColumnPostings
+        self._scopes = {normalizeColumn(col): col for col in postings}
+        self.fingerprint = fingerprint  # identifies the saved data the index was built from
+        self.changed = False  # edited since it was built or loaded
+
+    @classmethod
+    def build(cls, data, fingerprint=None):
+        """Index every column of a dataframe"""
+        columns = data.columns.tolist()
+        postings = {col: ColumnPostings.build(displayArray(data[col])) for col in columns if col not in UNINDEXED_COLUMNS}
+        index = cls(columns, postings, fingerprint)
+        index.changed = True
+        return index
+
+    def update(self, row, column, old_value, new_value):
+        """Reindex one edited cell"""
+        if column not in self._postings:
+            return
+        self._postings[column].update(row, old_value, new_value)
+        self._compactIfDue(column)
+        self.changed = True
+
+    def append(self, first, rows):
+        """Index rows (value lists in column order) appended starting at row first"""
+        for i, col in enumerate(self.columns):
+            if col not in self._postings:
+                continue
+            self._postings[col].append(first, [row[i] for row in rows])
+            self._compactIfDue(col)
+        self.changed = True
+
+    def _compactIfDue(self, column):
+        """Fold a column's pending edits into its arrays once queries would spend too long on them"""
+        postings = self._postings[column]
+        if len(postings.added) + len(postings.stale) > COMPACT_CHANGES:
+            self._compacted(column)
+
+    def query(self, text, rows, scan=None):
+        """Return a mask over rows of those matching every term of text.
+
+        Each term is a word prefix matched in any column, or 'column:prefix' to match in one column only.
+        A term without word characters (like '-' or '#') is not in the index, so it is handed to
+        scan(columns, value), which returns a mask of rows where one of columns contains value
+        (lowercase), and matches nothing without one. A scoped term without a value matches nothing.
+        """
+        mask = np.ones(rows, dtype=bool)
+        for term in text.split():
+            column, _, value = term.rpartition(':')
+            columns = list(self._postings)
+            if column != '':
+                if normalizeColumn(column) not in self._scopes:
+                    return np.zeros(rows, dtype=bool)
+                columns = [self._scopes[normalizeColumn(column)]]
+            tokens = TOKEN_PATTERN.findall(value.lower())
+            if not tokens:
+                if value == '' or scan is None:
+                    return np.zeros(rows, dtype=bool)
+                mask &= scan(columns, value.lower())
+                continue
+            # a term like "12-3" holds several tokens, all of which must match
+            for token in tokens:
+                term_mask = np.zeros(rows, dtype=bool)
+                for col in columns:
+                    found = self._postings[col].prefixRows(token)
+                    term_mask[found[found < rows]] = True
+                mask &= term_mask
+        return mask
+
+    def save(self, path):
+        """Write the index and its fingerprint to an npz file"""
+        arrays = {'columns': np.array(self.columns, dtype=str), 'fingerprint': np.array(self.fingerprint or '', dtype=str)}
+        for i, col in enumerate(self.columns):
+            if col not in self._postings:
+                continue
+            postings = self._postings[col]
+            # fold pending edits in first so the file holds plain arrays
+            if postings.stale or postings.added:
+                postings = self._compacted(col)
+            arrays['tokens_%d' % i] = postings.tokens
+            arrays['offsets_%d' % i] = postings.offsets
+            arrays['rows_%d' % i] = postings.rows
+        temp_path = path + '.tmp.npz'
+        np.savez(temp_path, **arrays)
+        os.replace(temp_path, path)
+        self.changed = False
+
+    @classmethod
+    def load(cls, path, fingerprint):
+        """Read a saved index, or return None if it is missing or was built from different data"""
+        if fingerprint is None or not os.path.exists(path):
+            return None
+        with np.load(path, allow_pickle=False) as arrays:
+            if str(arrays['fingerprint']) != fingerprint:
+                return None
+            columns = arrays['columns'].tolist()
+            postings = {col: ColumnPostings(arrays['tokens_%d' % i], arrays['offsets_%d' % i], arrays['rows_%d' % i])
+                        for i, col in enumerate(columns) if 'tokens_%d' % i in arrays.files}
+        return cls(columns, postings, fingerprint)
+
+    def _compacted(self, column):
+        """Return a column's postings with pending edits merged into the arrays"""
+        postings = self._postings[column]
+        stale = np.fromiter(postings.stale, dtype=np.int64, count=len(postings.stale))
+        keep = ~np.isin(postings.rows, stale)
+        lengths = np.diff(postings.offsets)
+        token_of_row = np.repeat(np.arange(len(postings.tokens)), lengths)[keep]
+        tokens = postings.tokens[token_of_row].tolist() + [token for token, rows in postings.added.items() for _ in rows]
+        rows = postings.rows[keep].tolist() + [row for rows in postings.added.values() for row in rows]
+        if not tokens:
+            return ColumnPostings(np.array([], dtype=str), np.zeros(1, dtype=np.int64), np.array([], dtype=np.int64))
+        token_ids, unique_tokens = pd.factorize(np.array(tokens, dtype=object), sort=True)
+        order = np.lexsort((np.array(rows), token_ids))
+        offsets = np.concatenate([[0], np.cumsum(np.bincount(token_ids, minlength=len(unique_tokens)))])
+        compacted = ColumnPostings(np.asarray(unique_tokens, dtype=str), offsets.astype(np.int64), np.array(rows, dtype=np.int64)[order])
+        self._postings[column] = compacted
+        return compacted
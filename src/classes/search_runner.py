@@ -0,0 +1,110 @@
+from PyQt5.QtCore import QObject, QTimer, pyqtSignal
+from concurrent.futures import ThreadPoolExecutor
+import time
+
+DEBOUNCE_MS = 150  # quiet time after a keystroke before searching
+
+
+class SearchRunner(QObject):
+    """Debounce search bar text and match it against the model on a worker thread"""
+    resultReady = pyqtSignal(int, str, object)  # generation, text, (mask or None on error, data version, start time)
+    queryCancelled = pyqtSignal()
+    statsChanged = pyqtSignal(str)
+
+    def __init__(self, model, proxy):
+        """Set up the debounce timer and worker thread"""
+        super().__init__()
+        # set up variables
+        self.model = model
+        self.proxy = proxy
+        self._text = ''
+        self._generation = 0  # bumped on every keystroke, older queries are stale
+        self._future = None
+        self._executor = ThreadPoolExecutor(max_workers=1)
+        self.stats = {'queries': 0, 'cancelled': 0, 'last_ms': 0.0, 'total_ms': 0.0}
+
+        # restart the timer on every keystroke so only the last one runs
+        self._timer = QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.setInterval(DEBOUNCE_MS)
+        self._timer.timeout.connect(self._submit)
+
+        # worker results come back to the gui thread through queued signals
+        self.resultReady.connect(self._publish)
+        self.queryCancelled.connect(self._countCancelled)
+
+    def setText(self, text):
+        """Queue a search for text once typing pauses"""
+        self._text = text
+        self._generation += 1  # any query still running is now stale
+        self._timer.start()
+
+    def stop(self):
+        """Abandon queued and running queries and stop the worker"""
+        self._timer.stop()
+        self._generation += 1
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def _submit(self):
+        """Start matching the latest text on the worker thread"""
+        generation = self._generation
+        text = self._text.lower()
+        # a query that has not started yet can simply be dropped
+        if self._future is not None and self._future.cancel():
+            self._countCancelled()
+        started = time.perf_counter()
+        if text == '':
+            self.proxy.setSearchResult('', None)
+            self._report('', started)
+            return
+        self._future = self._executor.submit(self._run, generation, text, self.model.version(), started)
+
+    def _run(self, generation, text, version, started):
+        """Look text up in the model's search index, unless a newer query already arrived (worker thread)"""
+        try:
+            # the first search may have to build the index, so check for newer queries on both sides
+            if generation != self._generation:
+                self.queryCancelled.emit()
+                return
+            mask = self.model.searchMask(text)
+            if generation != self._generation:
+                self.queryCancelled.emit()
+                return
+            self.resultReady.emit(generation, text, (mask, version, started))
+        except Exception:
+            # most likely the data changed underneath the query, _publish decides whether to retry
+            self.resultReady.emit(generation, text, (None, version, started))
+
+    def _publish(self, generation, text, result):
+        """Show a finished query's rows, unless a newer query or edit made it stale"""
+        if generation != self._generation:
+            self._countCancelled()
+            return
+        mask, version, started = result
+        if version != self.model.version():
+            # rows were edited or added while matching, run it again on the current data
+            self._submit()
+            return
+        if mask is None:
+            self.statsChanged.emit('Search "{0}" failed'.format(text))
+            return
+        self.proxy.setSearchResult(text, mask)
+        self._report(text, started)
+
+    def _countCancelled(self):
+        """Record a query that was dropped before its result was shown"""
+        self.stats['cancelled'] += 1
+
+    def _report(self, text, started):
+        """Update latency stats and announce them"""
+        elapsed = (time.perf_counter() - started) * 1000
+        self.stats['queries'] += 1
+        self.stats['last_ms'] = elapsed
+        self.stats['total_ms'] += elapsed
+        if text == '':
+            message = 'Showing all tasks'
+        else:
+            message = 'Search "{0}": {1} tasks in {2:.0f} ms'.format(text, self.proxy.matchCount(), elapsed)
+        message += ' ({0} searches, {1} stale searches cancelled, {2:.0f} ms average)'.format(
+            self.stats['queries'], self.stats['cancelled'], self.stats['total_ms'] / self.stats['queries'])
+        self.statsChanged.emit(message)
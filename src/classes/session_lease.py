@@ -0,0 +1,104 @@
+import json
+import os
+import re
+import threading
+import time
+
+# seconds a lease lasts without being renewed, it is renewed three times within that
+LEASE_TTL = float(os.environ.get('TASK_TRACKER_LEASE_TTL', 90))
+
+
+class SessionLease:
+    """A timestamped lease marking a session as editing, renewed on a background thread.
+
+    Each session owns one small file in the sessions folder holding when its lease
+    expires, so renewing never waits on other sessions. A session that crashes or
+    whose machine sleeps stops renewing, and once its lease has expired the next
+    launch removes it, so nobody has to clear session data by hand.
+    """
+
+    def __init__(self, folder, session_key, ttl=LEASE_TTL):
+        """Set up the lease file for a session"""
+        self.folder = folder
+        self.session_key = session_key
+        self.ttl = ttl
+        self.path = os.path.join(folder, re.sub(r'[^A-Za-z0-9_-]', '_', session_key) + '.lease')
+        self._stop = threading.Event()
+        self._thread = None
+
+    def acquire(self):
+        """Write the lease and keep renewing it until released"""
+        os.makedirs(self.folder, exist_ok=True)
+        self.renew()
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._heartbeat, name='session-lease', daemon=True)
+        self._thread.start()
+
+    def renew(self):
+        """Push the lease's expiry ttl seconds ahead"""
+        lease = {'session': self.session_key, 'expires': time.time() + self.ttl}
+        temp_path = self.path + '.tmp'
+        with open(temp_path, 'w') as f:
+            json.dump(lease, f)
+        # replace in one step so readers never see a half written lease
+        os.replace(temp_path, self.path)
+
+    def release(self):
+        """Stop renewing and remove the lease"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
+
+    def _heartbeat(self):
+        """Renew the lease a few times per ttl (lease thread)"""
+        while not self._stop.wait(self.ttl / 3):
+            try:
+                self.renew()
+            except OSError:
+                # the shared drive may be briefly unreachable, the next beat tries again
+                pass
+
+
+def activeSessions(folder):
+    """Return the keys of sessions holding a live lease, removing leases that have expired"""
+    sessions = []
+    try:
+        names = os.listdir(folder)
+    except FileNotFoundError:
+        return sessions
+    now = time.time()
+    for name in names:
+        if not name.endswith('.lease'):
+            continue
+        path = os.path.join(folder, name)
+        try:
+            with open(path, 'r') as f:
+                lease = json.load(f)
+            expired = lease['expires'] < now
+        except FileNotFoundError:
+            continue
+        except (OSError, ValueError, KeyError):
+            # unreadable leases only count until they are as old as a lease lasts
+            lease = {'session': name[:-len('.lease')]}
+            expired = _age(path) > LEASE_TTL
+        if expired:
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+        else:
+            sessions.append(lease['session'])
+    return sessions
+
+
+def _age(path):
+    """Return how many seconds ago a file was modified (0 if it is gone)"""
+    try:
+        return time.time() - os.path.getmtime(path)
+    except OSError:
+        return 0
@@ -0,0 +1,305 @@
+import json
+import sqlite3
+import uuid
+
+import pandas as pd
+
+from src.classes.change_merge import rebaseChanges, rebaseOnData, hasClear, rowsAfter
+from src.classes.column_types import rawFrame, ID_COLUMN
+
+# columns that get an index so filters and sorts on them are pushed into sqlite
+INDEXED_COLUMNS = ['Status', 'Category', 'Priority', 'Date Created', ID_COLUMN]
+KEEP_CHANGES = 5000  # committed batches kept in the change log for sessions catching up
+
+
+class SqliteTaskStore:
+    """Persist the task table in a local sqlite database.
+
+    Offers the same load/record/commit interface as TaskStore, plus queryRows()
+    and sortedRows() so filtering and sorting can use the column indexes. Rows
+    are keyed by their position in the model. Rows are appended at the end, and
+    removing rows moves the ones after them up.
+
+    Every commit is also added to a numbered change log, so a session saving after
+    others merges their batches in first, like the json store does with its journal.
+    """
+
+    def __init__(self, db_path, session=None):
+        """Open (or create) the database"""
+        self.db_path = db_path
+        self.session = session or uuid.uuid4().hex
+        # opened on the loader thread, then only used from the gui thread
+        self._conn = sqlite3.connect(db_path, timeout=10, check_same_thread=False)
+        self._pending = []  # changes made since the last commit
+        self._touched = set()  # rows whose committed values differ from the model
+        self._cleared = False  # a clear is pending, so nothing committed is current
+        self._row_count = 0
+        self._saved_rows = 0  # rows in the table as of the last load or commit
+        self._seq = 0  # last change log batch this session has applied
+        with self._conn:
+            # bumped on every commit so caches built from the data can tell when it changed
+            self._conn.execute('CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value INTEGER)')
+            self._conn.execute("INSERT OR IGNORE INTO meta (key, value) VALUES ('revision', 0)")
+            self._conn.execute('CREATE TABLE IF NOT EXISTS changes (seq INTEGER PRIMARY KEY, session TEXT, batch TEXT)')
+
+    def isEmpty(self):
+        """Return if the database has no task table yet"""
+        found = self._conn.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='tasks'").fetchone()
+        return found is None
+
+    def createSchema(self, columns):
+        """Create the task table and its indexes"""
+        column_sql = ', '.join(self._quote(col) + ' TEXT' for col in columns)
+        with self._conn:
+            self._conn.execute('CREATE TABLE IF NOT EXISTS tasks (position INTEGER PRIMARY KEY, ' + column_sql + ')')
+            for col in INDEXED_COLUMNS:
+                if col in columns:
+                    self._conn.execute('CREATE INDEX IF NOT EXISTS ' + self._quote('idx_' + col) + ' ON tasks (' + self._quote(col) + ', position)')
+
+    def migrateFromJson(self, json_store):
+        """Copy everything from a json TaskStore into an empty database"""
+        data = rawFrame(json_store.load())
+        self.createSchema(data.columns.tolist())
+        with self._conn:
+            self._conn.execute('DELETE FROM tasks')
+            self._insert(0, data.columns.tolist(), data.values.tolist())
+
+    def addIds(self):
+        """Give a task table made before tasks had ids an ID column, numbering tasks by position"""
+        if ID_COLUMN in self.getColumnNames():
+            return
+        with self._conn:
+            self._conn.execute('ALTER TABLE tasks ADD COLUMN ' + self._quote(ID_COLUMN) + ' TEXT')
+            self._conn.execute('UPDATE tasks SET ' + self._quote(ID_COLUMN) + ' = position')
+        self.createSchema(self.getColumnNames())
+
+    def getColumnNames(self):
+        """Return the task columns in table order"""
+        info = self._conn.execute('PRAGMA table_info(tasks)').fetchall()
+        return [row[1] for row in info if row[1] != 'position']
+
+    def load(self):
+        """Read every task into a dataframe"""
+        # read the rows and the change log position together
+        with self._conn:
+            self._conn.execute('BEGIN')
+            data = self._readTasks()
+            self._seq = self._lastSeq()
+        self._row_count = data.shape[0]
+        self._saved_rows = data.shape[0]
+        return data
+
+    def _readTasks(self):
+        """Return the task table as a dataframe"""
+        columns = self.getColumnNames()
+        select = ', '.join(self._quote(col) for col in columns)
+        data = pd.read_sql_query('SELECT ' + select + ' FROM tasks ORDER BY position', self._conn)
+        return data.fillna('')
+
+    def recordUpdate(self, row, column, value, old=None):
+        """Remember a single cell edit (old is the value it replaced, used to spot conflicts)"""
+        self._pending.append({'op': 'update', 'row': row, 'column': column, 'value': value, 'old': old})
+        self._touched.add(row)
+
+    def recordInsert(self, rows):
+        """Remember rows appended to the end of the table"""
+        self._pending.append({'op': 'insert', 'start': self._row_count, 'rows': rows})
+        self._touched.update(range(self._row_count, self._row_count + len(rows)))
+        self._row_count += len(rows)
+
+    def recordRemove(self, start, count):
+        """Remember that count rows were removed from start on"""
+        self._pending.append({'op': 'remove', 'start': start, 'count': count})
+        self._touched = _removedRows(self._touched, start, count)
+        self._row_count -= count
+
+    def recordClear(self):
+        """Remember that every row was dropped"""
+        self._pending.append({'op': 'clear'})
+        self._cleared = True
+        self._touched = set()
+        self._row_count = 0
+
+    def hasPending(self):
+        """Return if there are uncommitted changes"""
+        return len(self._pending) != 0
+
+    def savedRows(self):
+        """Return how many of the model's rows are saved (its new rows come after them)"""
+        return self._saved_rows
+
+    def pendingRows(self):
+        """Return rows changed since the last commit, or None if nothing committed is still valid"""
+        if self._cleared:
+            return None
+        return self._touched
+
+    def commit(self, data, merge=None, prepare=None):
+        """Apply the pending changes in one transaction.
+
+        data is a function returning the model's dataframe (kept for the same interface
+        as TaskStore, sqlite never needs the whole table). Batches other sessions
+        committed first are handed to merge(changes, first_new_row) to apply to the
+        model, then prepare() can record changes that need the latest rows (removing
+        saved ones). Returns the pending edits that were dropped because another
+        session changed the same cell.
+        """
+        if not self._pending and prepare is None:
+            return []
+        columns = self.getColumnNames()
+        with self._conn:
+            # take the write lock before reading the change log, so nothing commits in between
+            self._conn.execute('BEGIN IMMEDIATE')
+            first_new_row = self._saved_rows
+            changes, conflicts = self._catchUp()
+            if changes and merge is not None:
+                merge(changes, first_new_row)
+            if prepare is not None:
+                prepare()
+                if not self._pending:
+                    return conflicts
+            rows = rowsAfter(self._pending, self._saved_rows)
+            for change in self._pending:
+                if change['op'] == 'update':
+                    self._conn.execute('UPDATE tasks SET ' + self._quote(change['column']) + ' = ? WHERE position = ?',
+                                       (self._toSql(change['value']), change['row']))
+                elif change['op'] == 'insert':
+                    self._insert(change['start'], columns, change['rows'])
+                elif change['op'] == 'remove':
+                    self._remove(change['start'], change['count'])
+                elif change['op'] == 'clear':
+                    self._conn.execute('DELETE FROM tasks')
+            self._seq = self._lastSeq() + 1
+            self._conn.execute('INSERT INTO changes (seq, session, batch) VALUES (?, ?, ?)',
+                               (self._seq, self.session, json.dumps(self._pending, default=str)))
+            self._conn.execute('DELETE FROM changes WHERE seq <= ?', (self._seq - KEEP_CHANGES,))
+            self._conn.execute("UPDATE meta SET value = value + 1 WHERE key = 'revision'")
+        self._pending = []
+        self._touched = set()
+        self._cleared = False
+        self._row_count = rows
+        self._saved_rows = rows
+        return conflicts
+
+    def _catchUp(self):
+        """Read batches other sessions committed since the last sync and rebase the pending changes on them.
+
+        Returns (changes, conflicts): the changes to apply to this session's data and
+        the pending edits dropped because another session changed the same cell.
+        """
+        found = self._conn.execute('SELECT seq, session, batch FROM changes WHERE seq > ? ORDER BY seq', (self._seq,)).fetchall()
+        if not found:
+            return [], []
+        saved_rows = self._saved_rows
+        last = found[-1][0]
+        if hasClear(self._pending):
+            # this session's clear is committed last, so nothing the others did survives it
+            self._seq = last
+            return [], []
+        if found[0][0] == self._seq + 1:
+            foreign = [(session, change) for _, session, batch in found for change in json.loads(batch)]
+            pending, conflicts, self._saved_rows = rebaseChanges(self._pending, foreign, saved_rows)
+            changes = [change for _, change in foreign]
+        else:
+            # batches this session missed were dropped from the log, so compare with the table itself
+            fresh = self._readTasks()
+            pending, conflicts, changes = rebaseOnData(self._pending, fresh, saved_rows)
+            self._saved_rows = fresh.shape[0]
+        self._seq = last
+        self._setPending(pending)
+        return changes, conflicts
+
+    def hasNewChanges(self):
+        """Return if another session committed since this one last synced"""
+        return self._lastSeq() != self._seq
+
+    def watchPaths(self):
+        """Return the files that change whenever a session saves"""
+        return [self.db_path]
+
+    def pull(self, merge, reload=True):
+        """Apply what other sessions committed since the last sync through merge(changes, first_new_row).
+
+        Returns the pending edits dropped because another session changed the same cell.
+        reload is there to match TaskStore.pull: when the change log was pruned the
+        table is read in the same transaction, so this never returns None.
+        """
+        with self._conn:
+            # read the change log and (when it was pruned) the table in one snapshot
+            self._conn.execute('BEGIN')
+            first_new_row = self._saved_rows
+            changes, conflicts = self._catchUp()
+        if changes:
+            merge(changes, first_new_row)
+            self._row_count = rowsAfter(self._pending, self._saved_rows)
+        return conflicts
+
+    def _setPending(self, pending):
+        """Replace the pending changes, working out the rows they touch again"""
+        self._pending = pending
+        self._touched = set()
+        for change in pending:
+            if change['op'] == 'update':
+                self._touched.add(change['row'])
+            elif change['op'] == 'insert':
+                self._touched.update(range(change['start'], change['start'] + len(change['rows'])))
+            elif change['op'] == 'remove':
+                self._touched = _removedRows(self._touched, change['start'], change['count'])
+
+    def _lastSeq(self):
+        """Return the number of the last batch in the change log"""
+        return self._conn.execute('SELECT MAX(seq) FROM changes').fetchone()[0] or 0
+
+    def fingerprint(self):
+        """Return a string identifying the saved data, which changes on every commit"""
+        revision = self._conn.execute("SELECT value FROM meta WHERE key = 'revision'").fetchone()[0]
+        return '{0}:{1}'.format(self.db_path, revision)
+
+    def queryRows(self, column, value):
+        """Return the committed rows where column equals value, using its index"""
+        found = self._conn.execute('SELECT position FROM tasks WHERE ' + self._quote(column) + ' = ?', (value,))
+        return {row[0] for row in found}
+
+    def sortedRows(self, column):
+        """Return committed row positions in ascending order of column"""
+        found = self._conn.execute('SELECT position FROM tasks ORDER BY ' + self._quote(column) + ', position')
+        return [row[0] for row in found]
+
+    def _insert(self, start, columns, rows):
+        """Insert rows at consecutive positions starting at start"""
+        placeholders = ', '.join('?' for _ in range(len(columns) + 1))
+        names = ', '.join(self._quote(col) for col in columns)
+        self._conn.executemany('INSERT INTO tasks (position, ' + names + ') VALUES (' + placeholders + ')',
+                               ([start + i] + [self._toSql(value) for value in row] for i, row in enumerate(rows)))
+
+    def _remove(self, start, count):
+        """Delete count rows from start on and move the rows after them up"""
+        self._conn.execute('DELETE FROM tasks WHERE position >= ? AND position < ?', (start, start + count))
+        # go through negative positions, so no row is moved onto one that has not moved yet
+        self._conn.execute('UPDATE tasks SET position = ? - position WHERE position >= ?', (count, start + count))
+        self._conn.execute('UPDATE tasks SET position = -position WHERE position < 0')
+
+    def _toSql(self, value):
+        """Convert a cell value to something sqlite can store"""
+        if value is None or isinstance(value, (str, int, float)):
+            return value
+        return str(value)
+
+    def _quote(self, name):
+        """Quote a column name for use in sql"""
+        return '"' + name.replace('"', '""') + '"'
+
+
+def _removedRows(rows, start, count):
+    """Return row positions as they are after removing count rows from start on"""
+    return {row if row < start else row - count for row in rows if not start <= row < start + count}
+
+
+def openSqliteStore(db_path, json_store):
+    """Open the sqlite store, migrating the json data into it on first use"""
+    store = SqliteTaskStore(db_path, json_store.session)
+    if store.isEmpty():
+        store.migrateFromJson(json_store)
+    else:
+        store.addIds()
+    return store
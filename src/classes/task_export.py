@@ -0,0 +1,98 @@
+import csv
+import os
+
+import numpy as np
+
+from src.classes.column_types import displayArray
+
+CHUNK_ROWS = 5000  # rows written between progress updates
+FORMATS = {'.xlsx': 'Excel', '.csv': 'CSV', '.parquet': 'Parquet'}
+
+
+class TaskExport:
+    """Write task rows to an .xlsx, .csv or .parquet file in chunks.
+
+    Rows are taken from the dataframe's columns a chunk at a time and
+    streamed to a writer that does not keep the file in memory. Output goes to
+    a temporary file that only replaces path once everything is written.
+    """
+
+    def __init__(self, path, data, rows=None):
+        """Set up an export of data (every row, or just the positions in rows, in that order)"""
+        self.path = path
+        self.columns = data.columns.tolist()
+        # hold on to the columns so the worker never touches the dataframe itself
+        self._series = [data[col] for col in self.columns]
+        self.rows = np.arange(data.shape[0]) if rows is None else np.asarray(rows)
+        self.written = 0  # rows written so far
+        self.total = len(self.rows)
+        self.format = os.path.splitext(path)[1].lower()
+        if self.format not in FORMATS:
+            raise ValueError('Cannot export to ' + (self.format or 'a file without an extension') +
+                             ', choose one of ' + ', '.join(FORMATS))
+
+    def chunks(self):
+        """Write the file, yielding after each chunk so callers can report progress or stop"""
+        temp_path = self.path + '.part'
+        writer = getattr(self, '_write' + FORMATS[self.format])
+        finished = False
+        try:
+            yield from writer(temp_path)
+            finished = True
+        finally:
+            # leave no half written file behind when stopped early or on an error
+            if finished:
+                os.replace(temp_path, self.path)
+            elif os.path.exists(temp_path):
+                os.remove(temp_path)
+
+    def _blocks(self):
+        """Yield the exported rows as lists of string values, a chunk at a time"""
+        for start in range(0, self.total, CHUNK_ROWS):
+            rows = self.rows[start:start + CHUNK_ROWS]
+            cells = [displayArray(series.iloc[rows]).tolist() for series in self._series]
+            yield [list(row) for row in zip(*cells)]
+
+    def _writeExcel(self, path):
+        """Stream rows into a write-only workbook"""
+        from openpyxl import Workbook
+        workbook = Workbook(write_only=True)
+        sheet = workbook.create_sheet('Tasks')
+        sheet.append(self.columns)
+        try:
+            for block in self._blocks():
+                for row in block:
+                    sheet.append(row)
+                self.written += len(block)
+                yield
+        except GeneratorExit:
+            # stopped early, finish the sheet's own temp file so it is cleaned up now
+            sheet.close()
+            raise
+        workbook.save(path)
+
+    def _writeCSV(self, path):
+        """Append rows to a csv file"""
+        with open(path, 'w', newline='', encoding='utf-8') as f:
+            writer = csv.writer(f)
+            writer.writerow(self.columns)
+            for block in self._blocks():
+                writer.writerows(block)
+                self.written += len(block)
+                yield
+
+    def _writeParquet(self, path):
+        """Write each chunk as a row group of a parquet file (needs pyarrow)"""
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise RuntimeError('Exporting to Parquet needs the pyarrow package, which is not installed')
+        columns = self.columns
+        schema = pa.schema([(col, pa.string()) for col in columns])
+        with pq.ParquetWriter(path, schema) as writer:
+            for block in self._blocks():
+                arrays = [pa.array([row[i] for row in block], pa.string()) for i in range(len(columns))]
+                writer.write_table(pa.Table.from_arrays(arrays, schema=schema))
+                self.written += len(block)
+                yield
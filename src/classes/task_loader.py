@@ -0,0 +1,56 @@
+from PyQt5.QtCore import QObject, pyqtSignal
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+import os
+
+from src.classes.profiler import profiler
+
+
+class TaskLoader(QObject):
+    """Open the task store and read the tasks on a worker thread, so the window can show before they are in"""
+    loaded = pyqtSignal(object, object, object)  # the store, its tasks and the saved search index (or None)
+    loadFailed = pyqtSignal(str)
+
+    def __init__(self, session_key=None):
+        """Set up the worker thread for this session's store"""
+        super().__init__()
+        self.session_key = session_key
+        self._future = None
+        self._executor = ThreadPoolExecutor(max_workers=1)
+
+    def start(self):
+        """Start loading on the worker thread"""
+        self._future = self._executor.submit(self._run)
+        # the thread exits on its own once the tasks are read
+        self._executor.shutdown(wait=False)
+
+    def isRunning(self):
+        """Return if loading has started and not finished yet"""
+        return self._future is not None and not self._future.done()
+
+    def _run(self):
+        """Open the store, read the tasks and the saved search index (worker thread)"""
+        try:
+            # pandas and the stores are first imported here, after the window is up
+            from src.run import resource_path
+            from src.classes.task_store import TaskStore
+            from src.classes.search_index import SearchIndex
+            # several sessions can edit at once, their saves are merged by the store
+            # the snapshot is json unless TASK_TRACKER_SNAPSHOT=arrow (either is read, and migrated on the next save)
+            store = TaskStore(resource_path(Path('data/task_data.json')), resource_path(Path('data/task_journal.jsonl')), session=self.session_key,
+                              snapshot_format=os.environ.get('TASK_TRACKER_SNAPSHOT', 'json').lower())
+            # switch to the sqlite backend if requested (migrates the json data on first use)
+            if os.environ.get('TASK_TRACKER_STORAGE', 'json').lower() == 'sqlite':
+                from src.classes.sqlite_store import openSqliteStore
+                store = openSqliteStore(resource_path(Path('data/task_data.db')), store)
+            # load the snapshot and replay the change journal
+            with profiler.span('MainWindow.loadTasks'):
+                task_data = store.load()
+            # reuse the search index from the last session if the data has not changed since
+            with profiler.span('MainWindow.loadSearchIndex'):
+                search_index = SearchIndex.load(resource_path(Path('data/search_index.npz')), store.fingerprint())
+        except Exception as e:
+            self.loadFailed.emit(str(e))
+            return
+        # results come back to the gui thread through a queued signal
+        self.loaded.emit(store, task_data, search_index)
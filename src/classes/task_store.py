@@ -0,0 +1,466 @@
+import hashlib
+import io
+import json
+import os
+import time
+import uuid
+
+import numpy as np
+import pandas as pd
+
+from src.classes import arrow_snapshot
+from src.classes.atomic_file import writeAtomic, readLatest, generationPaths
+from src.classes.column_types import plainFrame, rawFrame, plainValues, isCompact, extendColumn, ID_COLUMN
+from src.classes.change_merge import rebaseChanges, rebaseOnData, hasClear, rowsAfter
+from src.classes.file_lock import FileLock
+from src.classes.row_ids import withIds
+
+SNAPSHOT_GENERATIONS = 2  # previous snapshots kept beside the current one, to load from if it is damaged
+LOAD_TRIES = 20  # reads while a compaction is swapping the snapshot and journal
+
+
+class TaskStore:
+    """Persist the task table as a JSON snapshot plus an append-only change journal.
+
+    Saving appends only the changes made since the last save, and the journal is
+    folded into a new snapshot once it holds compact_threshold changes. The journal
+    header stores a digest of its snapshot so changes are never replayed twice.
+    With snapshot_format 'arrow' the snapshot is written as an Arrow IPC file
+    beside the JSON path instead (see arrow_snapshot). Either file is read,
+    whichever the journal belongs to, and one in the other format is rewritten
+    in this store's format on the next commit.
+
+    Several sessions can edit at once. Every batch in the journal is numbered, and a
+    commit first reads the batches other sessions saved since this one last synced,
+    merges them in (see change_merge) and reports edits that lost to theirs.
+    Writing happens under a lock file so batches never interleave, while reading
+    needs no lock because every file is replaced whole or only appended to.
+    """
+
+    def __init__(self, snapshot_path, journal_path, compact_threshold=2000, session=None, generations=SNAPSHOT_GENERATIONS, snapshot_format='json'):
+        """Set up paths and empty change buffers"""
+        self.snapshot_path = snapshot_path
+        self.arrow_path = os.path.splitext(snapshot_path)[0] + '.arrow'
+        # binary snapshots need pyarrow, without it the store keeps writing json
+        self.snapshot_format = 'arrow' if snapshot_format == 'arrow' and arrow_snapshot.available() else 'json'
+        self.journal_path = journal_path
+        self.compact_threshold = compact_threshold
+        self.generations = generations
+        self.session = session or uuid.uuid4().hex  # written with each batch to tell sessions apart
+        self._pending = []  # changes made since the last commit
+        self._journal_changes = 0  # changes currently stored in the journal
+        self._digest = None  # digest of the snapshot the journal applies to
+        self._seq = 0  # number of the last batch this session has applied
+        self._offset = 0  # journal bytes this session has read
+        self._rows = 0  # saved rows as of the last load or commit
+        self._journal_stat = None  # journal (size, mtime) when this session last read or wrote it
+        self._repair = False  # the snapshot or journal on disk could not be used as is and gets rewritten
+        self._lock = FileLock(journal_path + '.lock')
+
+    def load(self):
+        """Read the snapshot and replay any journaled changes on top of it.
+
+        No lock is taken: snapshots are swapped in whole and a half written batch
+        is skipped, so a save happening meanwhile is at worst not seen yet.
+        """
+        return self._load()
+
+    def _load(self):
+        """Load the data, retrying if a compaction is caught halfway"""
+        for attempt in range(LOAD_TRIES):
+            data, matched = self._read()
+            if matched:
+                return data
+            time.sleep(0.05)
+        # the journal belongs to no snapshot that can be read, the next commit rewrites both
+        self._repair = True
+        return data
+
+    def _read(self):
+        """Return (data, matched): the snapshot with its journal replayed, and if the journal belonged to it"""
+        data, self._digest, path = self._readSnapshot()
+        # an older generation or the other format is only used once, the next commit writes it again
+        self._repair = path != self._snapshotFiles()[0][0]
+        if ID_COLUMN not in data.columns:
+            # tasks saved before ids existed are numbered by position, and the next commit writes the ids out
+            data = withIds(data)
+            self._repair = True
+
+        self._journal_stat = self._fileStat(self.journal_path)
+        header, batches, end = self._readJournalFile(self.journal_path, 0)
+        self._offset = end
+        if header is None:
+            self._seq = 0
+            self._journal_changes = 0
+            self._rows = data.shape[0]
+            return data, True
+        self._seq = batches[-1]['seq'] if batches else header.get('seq', 0)
+        self._journal_changes = sum(len(batch['changes']) for batch in batches)
+        if header.get('snapshot') != self._digest:
+            # the journal was started for a newer snapshot, which is the one read plus the batches kept in .prev
+            previous, missed, _ = self._readJournalFile(self.journal_path + '.prev', 0)
+            last = missed[-1]['seq'] if missed else (previous or {}).get('seq', 0)
+            if previous is None or previous.get('snapshot') != self._digest or last != header.get('seq'):
+                self._rows = data.shape[0]
+                return data, False
+            self._digest = header['snapshot']
+            batches = missed + batches
+        if batches:
+            data = self._replay(data, [batch['changes'] for batch in batches])
+        self._rows = data.shape[0]
+        return data, True
+
+    def _snapshotFiles(self):
+        """Return (path, parse) for each snapshot format that can be read, the one this store writes first"""
+        files = [(self.snapshot_path, lambda raw: (pd.read_json(io.BytesIO(raw)), self._hash(raw)))]
+        if arrow_snapshot.available():
+            files.append((self.arrow_path, arrow_snapshot.fromArrow))
+        if self.snapshot_format == 'arrow':
+            files.reverse()
+        return files
+
+    def _readSnapshot(self):
+        """Return (data, digest, path read) for the snapshot the journal belongs to, or the first one readable"""
+        header, _, _ = self._readJournalFile(self.journal_path, 0, header_only=True)
+        wanted = (header or {}).get('snapshot')
+        found = None
+        error = None
+        for path, parse in self._snapshotFiles():
+            if found is not None and not any(os.path.exists(candidate) for candidate in generationPaths(path, self.generations)):
+                continue
+            try:
+                (data, digest), used = readLatest(path, parse, self.generations)
+            except (OSError, ValueError) as e:
+                error = error or e
+                continue
+            if found is None or digest == wanted:
+                found = (data, digest, used)
+            if digest == wanted:
+                break
+        if found is None:
+            raise error
+        if wanted is not None and found[1] != wanted and not arrow_snapshot.available() and os.path.exists(self.arrow_path):
+            # the json left beside a binary snapshot is out of date, don't lose the journal by starting from it
+            raise RuntimeError('The tasks were saved as a binary snapshot, reading it needs the pyarrow package')
+        return found
+
+    def _readJournalFile(self, path, offset, header_only=False):
+        """Return (header, batches, end) for a journal, reading only the batches from offset on.
+
+        header is None if the file is missing, and end is where the last complete batch finishes.
+        """
+        try:
+            f = open(path, 'rb')
+        except FileNotFoundError:
+            return None, [], 0
+        with f:
+            first = f.readline()
+            try: header = json.loads(first)
+            except ValueError: header = {}
+            if header_only:
+                return header, [], len(first)
+            start = max(offset, len(first))
+            f.seek(start)
+            content = f.read()
+        batches, used = self._parseBatches(content, header.get('seq', 0) if start == len(first) else self._seq)
+        return header, batches, start + used
+
+    def _parseBatches(self, content, seq):
+        """Return the complete batches in journal bytes (numbered on from seq) and how many bytes they use"""
+        batches = []
+        valid_bytes = 0
+        for line in content.split(b'\n'):
+            # a line without its newline or with broken json is an interrupted commit
+            if valid_bytes + len(line) + 1 > len(content):
+                break
+            try: batch = json.loads(line)
+            except ValueError: break
+            if 'changes' not in batch:
+                break
+            # journals written before batches were numbered count them by position
+            seq = batch.get('seq', seq + 1)
+            batches.append({'seq': seq, 'session': batch.get('session'), 'changes': batch['changes']})
+            valid_bytes += len(line) + 1
+        return batches, valid_bytes
+
+    def _catchUp(self, reload=True):
+        """Read what other sessions saved since the last sync and rebase the pending changes on it.
+
+        Only the journal bytes this session has not read yet are parsed. Returns
+        (changes, conflicts): the changes to apply to this session's data and the
+        pending edits dropped because another session changed the same cell. When
+        the batches this session missed are gone every task is read again, unless
+        reload is False, when None is returned and nothing changes.
+        """
+        # stat before reading, so a batch landing during the read is noticed next time
+        stat = self._fileStat(self.journal_path)
+        header, batches, end = self._readJournalFile(self.journal_path, self._offset)
+        if header is None:
+            return [], []
+        saved_rows = self._rows
+        if header.get('snapshot') == self._digest:
+            self._journal_changes += sum(len(batch['changes']) for batch in batches)
+        else:
+            # another session folded the journal into a new snapshot, read what this session missed from the copy it kept
+            previous, missed, _ = self._readJournalFile(self.journal_path + '.prev', self._offset)
+            last = missed[-1]['seq'] if missed else self._seq
+            if previous is None or previous.get('snapshot') != self._digest or last != header.get('seq'):
+                return self._reloadChanges(saved_rows) if reload else None
+            digest = header['snapshot']
+            header, batches, end = self._readJournalFile(self.journal_path, 0)
+            if header is None or header.get('snapshot') != digest:
+                # compacted again while reading
+                return self._reloadChanges(saved_rows) if reload else None
+            self._digest = digest
+            self._journal_changes = sum(len(batch['changes']) for batch in batches)
+            batches = missed + batches
+        self._offset = end
+        self._journal_stat = stat
+        if not batches:
+            return [], []
+        self._seq = batches[-1]['seq']
+        if hasClear(self._pending):
+            # this session's clear is saved last, so nothing the others did survives it
+            return [], []
+        foreign = [(batch['session'], change) for batch in batches for change in batch['changes']]
+        self._pending, conflicts, self._rows = rebaseChanges(self._pending, foreign, saved_rows)
+        return [change for _, change in foreign], conflicts
+
+    def _reloadChanges(self, saved_rows):
+        """Catch up by loading everything again, when the batches this session missed are gone"""
+        return self._rebaseOnFresh(self._load(), saved_rows)
+
+    def _rebaseOnFresh(self, fresh, saved_rows):
+        """Return (changes, conflicts) bringing data with saved_rows saved rows up to freshly loaded tasks"""
+        if hasClear(self._pending):
+            return [], []
+        # cells are compared and handed to the model as the values a json snapshot holds
+        self._pending, conflicts, changes = rebaseOnData(self._pending, rawFrame(fresh), saved_rows)
+        return changes, conflicts
+
+    def hasNewChanges(self):
+        """Return if the journal changed since this session last read or wrote it (a cheap stat)"""
+        return self._fileStat(self.journal_path) != self._journal_stat
+
+    def watchPaths(self):
+        """Return the files that change whenever a session saves"""
+        return [self.journal_path]
+
+    def pull(self, merge, reload=True):
+        """Apply what other sessions saved since the last sync through merge(changes, first_new_row).
+
+        Returns the pending edits dropped because another session changed the same
+        cell. Only reads files, without taking the lock. If the batches this session
+        missed were folded into a snapshot it no longer has, every task is read
+        again, which can wait out a compaction. With reload False that is left to
+        the caller instead: None is returned, and the tasks can be read on another
+        thread with reloaded() and applied with pullReloaded().
+        """
+        first_new_row = self._rows
+        caught = self._catchUp(reload)
+        if caught is None:
+            return None
+        changes, conflicts = caught
+        if changes:
+            merge(changes, first_new_row)
+        return conflicts
+
+    def syncPoint(self):
+        """Return where this session is in the saved changes, which moves on every sync and commit"""
+        return (self._digest, self._seq, self._offset)
+
+    def reloaded(self):
+        """Return (store, data): a copy of this store and every task it read again (safe on a worker thread)"""
+        store = TaskStore(self.snapshot_path, self.journal_path, self.compact_threshold, self.session, self.generations, self.snapshot_format)
+        return store, store.load()
+
+    def pullReloaded(self, sync_point, reloaded, merge):
+        """Apply tasks read again by reloaded() through merge(changes, first_new_row), like pull.
+
+        sync_point is syncPoint() from before the read. If this session synced or
+        committed since, the read may be older than its data, so nothing changes
+        and None is returned.
+        """
+        if sync_point != self.syncPoint():
+            return None
+        store, fresh = reloaded
+        first_new_row = self._rows
+        # carry on from where the copy finished reading
+        self._digest, self._seq, self._offset = store._digest, store._seq, store._offset
+        self._journal_changes, self._journal_stat, self._repair = store._journal_changes, store._journal_stat, store._repair
+        self._rows = store._rows
+        changes, conflicts = self._rebaseOnFresh(fresh, first_new_row)
+        if changes:
+            merge(changes, first_new_row)
+        return conflicts
+
+    def _replay(self, data, batches):
+        """Apply journaled changes to a dataframe loaded from the snapshot.
+
+        Only the columns with an edited snapshot row become value arrays, and
+        inserted rows are kept apart until the end, so the other columns keep the
+        types they were read in (compact ones, from a binary snapshot).
+        """
+        columns = data.columns.tolist()
+        base = data.reset_index(drop=True)
+        edited = {}  # column -> values of the snapshot rows, for columns with an edit to one
+        tail = []  # rows inserted after the snapshot rows, as value lists
+        for batch in batches:
+            for change in batch:
+                if change['op'] == 'update':
+                    row, col = change['row'], change['column']
+                    if row >= base.shape[0]:
+                        tail[row - base.shape[0]][columns.index(col)] = change['value']
+                    else:
+                        if col not in edited:
+                            edited[col] = plainValues(col, base[col])
+                        edited[col][row] = change['value']
+                elif change['op'] == 'insert':
+                    for row in change['rows']:
+                        if len(row) < len(columns):
+                            # rows journaled before tasks had ids are numbered by position
+                            row = list(row) + [base.shape[0] + len(tail)]
+                        tail.append(list(row))
+                elif change['op'] == 'remove':
+                    start, end, saved = change['start'], change['start'] + change['count'], base.shape[0]
+                    if start < saved:
+                        kept = np.r_[0:start, min(end, saved):saved]
+                        base = base.take(kept).reset_index(drop=True)
+                        edited = {col: values[kept] for col, values in edited.items()}
+                    del tail[max(start - saved, 0):max(end - saved, 0)]
+                elif change['op'] == 'clear':
+                    base = base.iloc[0:0]
+                    edited = {col: values[:0] for col, values in edited.items()}
+                    tail = []
+        result = {}
+        for i, col in enumerate(columns):
+            added = [row[i] for row in tail]
+            if col in edited or not isCompact(col, base[col]):
+                values = edited[col] if col in edited else plainValues(col, base[col])
+                result[col] = pd.Series(np.concatenate([values, np.array(added, dtype=object)]), dtype=object)
+            else:
+                result[col] = extendColumn(base[col], added) if added else base[col]
+        return pd.DataFrame(result, columns=columns)
+
+    def recordUpdate(self, row, column, value, old=None):
+        """Remember a single cell edit (old is the value it replaced, used to spot conflicts)"""
+        self._pending.append({'op': 'update', 'row': row, 'column': column, 'value': value, 'old': old})
+
+    def recordInsert(self, rows):
+        """Remember rows appended to the end of the table"""
+        self._pending.append({'op': 'insert', 'rows': rows})
+
+    def recordRemove(self, start, count):
+        """Remember that count rows were removed from start on"""
+        self._pending.append({'op': 'remove', 'start': start, 'count': count})
+
+    def recordClear(self):
+        """Remember that every row was dropped"""
+        self._pending.append({'op': 'clear'})
+
+    def hasPending(self):
+        """Return if there are uncommitted changes"""
+        return len(self._pending) != 0
+
+    def savedRows(self):
+        """Return how many of the model's rows are saved (its new rows come after them)"""
+        return self._rows
+
+    def commit(self, data, merge=None, prepare=None):
+        """Write the pending changes, compacting into a new snapshot when due.
+
+        data is a function returning the model's dataframe, only called when a
+        compaction needs the whole table. Changes other sessions saved first are
+        handed to merge(changes, first_new_row) to apply to the model, then
+        prepare() can record changes that need the latest rows (removing saved
+        ones). Returns the pending edits that were dropped because another session
+        changed the same cell.
+        """
+        if not self._pending and prepare is None:
+            return []
+        with self._lock:
+            first_new_row = self._rows
+            changes, conflicts = self._catchUp()
+            if changes and merge is not None:
+                merge(changes, first_new_row)
+            if prepare is not None:
+                prepare()
+                if not self._pending:
+                    return conflicts
+            self._seq += 1
+            rows = rowsAfter(self._pending, self._rows)
+            if self._repair:
+                # the files on disk don't fit together, write everything out again instead of appending
+                self.compact(data())
+            else:
+                self._append()
+                # fold the journal into a new snapshot once it is long or everything was cleared
+                if hasClear(self._pending) or self._journal_changes >= self.compact_threshold:
+                    self.compact(data())
+            self._pending = []
+            self._rows = rows
+            self._journal_stat = self._fileStat(self.journal_path)
+        return conflicts
+
+    def _append(self):
+        """Append the pending changes to the journal as one batch (with the lock held)"""
+        if not os.path.exists(self.journal_path):
+            self._resetJournal()
+        # the whole batch is one line, so it is replayed all or nothing
+        line = (json.dumps({'seq': self._seq, 'session': self.session, 'changes': self._pending}, default=str) + '\n').encode('utf-8')
+        with open(self.journal_path, 'r+b') as f:
+            # cut off a batch left half written by a session that crashed while saving
+            f.truncate(self._offset)
+            f.seek(self._offset)
+            f.write(line)
+            f.flush()
+            os.fsync(f.fileno())
+        self._offset += len(line)
+        self._journal_changes += len(self._pending)
+
+    def fingerprint(self):
+        """Return a string identifying the saved data, which changes on every commit"""
+        return '{0}:{1}'.format(self._digest, self._seq)
+
+    def compact(self, data):
+        """Fold everything into a fresh snapshot and start an empty journal (with the lock held)"""
+        if self.snapshot_format == 'arrow':
+            # a binary snapshot is named at random instead of hashed, so reading it needs no pass over its bytes
+            digest = uuid.uuid4().hex
+            raw = arrow_snapshot.toArrow(data, digest)
+            path = self.arrow_path
+        else:
+            # write display strings, so dates and categories read back as they were shown
+            raw = plainFrame(data).to_json().encode('utf-8')
+            digest = self._hash(raw)
+            path = self.snapshot_path
+        # keep the journal being folded in, so other sessions can still read the batches they missed
+        if os.path.exists(self.journal_path):
+            with open(self.journal_path, 'rb') as f:
+                writeAtomic(self.journal_path + '.prev', f.read())
+        writeAtomic(path, raw, self.generations)
+        self._digest = digest
+        # a crash before this point leaves a journal whose header no longer matches
+        self._resetJournal()
+        self._journal_changes = 0
+        self._pending = []
+        self._rows = data.shape[0]
+        self._repair = False
+
+    def _resetJournal(self):
+        """Replace the journal with just a header for the current snapshot"""
+        header = (json.dumps({'snapshot': self._digest, 'seq': self._seq}) + '\n').encode('utf-8')
+        writeAtomic(self.journal_path, header)
+        self._offset = len(header)
+
+    def _fileStat(self, path):
+        """Return a file's (size, modified time), or None if it is missing"""
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None
+        return (stat.st_size, stat.st_mtime_ns)
+
+    def _hash(self, raw):
+        """Return a short digest identifying a snapshot's contents"""
+        return hashlib.blake2b(raw, digest_size=16).hexdigest()
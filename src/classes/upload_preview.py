@@ -1,29 +1,28 @@
 from PyQt5.QtWidgets import QTableView, QMainWindow, QHeaderView, QWidget, QPushButton, QMessageBox, QVBoxLayout
 from PyQt5.QtCore import QSize
-from pathlib import Path
-import json
 
 class DataPreview(QMainWindow):
-    def __init__(self, joined_data, new_data, model, options):
+    def __init__(self, new_data, model, options, option_store):
         """Create a preview window of data to be uploaded"""
         super().__init__()
 
         # set up variables
-        self.joined_data = joined_data
         self.new_data = new_data
         self.main_model = model
         self.options = options
+        self.option_store = option_store
 
         # configure window size and title
         self.setMinimumSize(QSize(990, 630)) 
         self.setWindowTitle('New Data Preview')
 
-        # create a mini model for display
+        # show the current tasks followed by the highlighted new ones, without copying either
         try:
-            from src.classes.pandas_model import PandasModel
-            self.new_model = PandasModel(joined_data)
+            from src.classes.preview_model import PreviewModel
+            self.new_model = PreviewModel(model, new_data)
             view = QTableView()
             view.verticalHeader().hide()
+            view.verticalHeader().setSectionResizeMode(QHeaderView.Fixed)
             view.setModel(self.new_model)
             for i in range(view.horizontalHeader().count()):
                 view.horizontalHeader().setSectionResizeMode(i, QHeaderView.Stretch)
@@ -51,6 +50,9 @@ class DataPreview(QMainWindow):
         self.setCentralWidget(container)
 
         self.show()
+        # start at the new rows
+        if len(new_data) != 0:
+            view.scrollTo(self.new_model.index(self.new_model.firstNewRow(), 0), QTableView.PositionAtTop)
 
     def save(self):
         """Save the new rows in dataframe and update json files"""
@@ -68,11 +70,8 @@ class DataPreview(QMainWindow):
                 QMessageBox.critical(None, 'Error Adding Rows', str(e))
                 return
 
-            # update json files
-            try:
-                from src.run import resource_path
-                with open(resource_path(Path('data/type_data.json')), 'w') as f:
-                    json.dump(self.options, f)
+            # add the new column options (merged, so values saved by another session are kept)
+            try: self.option_store.addValues(self.options)
             except Exception as e:
                 QMessageBox.critical(None, 'Error Saving Column Options', str(e))
                 return
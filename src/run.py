@@ -1,4 +1,6 @@
 # imports
+import time
+started = time.perf_counter() # startup is timed from here to the window showing and the tasks being in
 import sys
 import os
 from PyQt5.QtWidgets import QApplication, QMessageBox
@@ -27,52 +29,51 @@ def resource_path(relative_path):
 
     return os.path.join(base_path, relative_path)
 
-def clearSessionData():
-    reset_message = QMessageBox()
-    reset_message.setIcon(QMessageBox.Critical)
-    reset_message.setWindowTitle('Clear Session Data')
-    reset_message.setText('Are you sure you want to clear session data? This could cause data conflicts if another user is actively editing.')
-    reset_message.setStandardButtons(QMessageBox.Yes | QMessageBox.Abort)
-    reset_message.setDefaultButton(QMessageBox.Abort)
-    clear = reset_message.exec()
-    if clear == QMessageBox.Yes:
-        with open(resource_path(Path('data/active_session.txt')), 'w') as f:
-            f.truncate(0)
-        return True
-    else:
-        return False
+def sessionsFolder():
+    """Return the folder holding the editing sessions' leases"""
+    return resource_path(Path('data/sessions'))
+
+# the lease this session holds while editing
+lease = None
 
 def regQuit():
-    with open(resource_path(Path('data/active_session.txt')), 'r+') as f:
-            active_session = f.readlines()
-            if SESSION_KEY in active_session:
-                f.truncate(0)
+    # give up this session's lease, others may still be editing
+    if lease is not None:
+        lease.release()
 
 def checkUsers():
-    """Create and run a window, only if the data file is not open"""
-    with open(resource_path(Path('data/active_session.txt')), 'r') as f:
-        active_session = f.readlines()
+    """Ask whether to edit alongside sessions that are already editing, or only view"""
+    from src.classes.session_lease import activeSessions
+    # leases that stopped being renewed (crashed or sleeping sessions) expire and are dropped here
+    active_session = [session for session in activeSessions(sessionsFolder()) if session != SESSION_KEY]
     if active_session != []:
+        names = ', '.join(sorted(set(session.split()[0] for session in active_session)))
         view_message = QMessageBox()
         view_message.setIcon(QMessageBox.Information)
         view_message.setWindowTitle('Edit Session Active')
-        view_message.setText(active_session[0].split()[0] + ' is running an active editing session, so the application will open in view-only mode. Press "Reset" button to clear all session data and open in editing mode **could cause data conflicts**.')
-        view_message.setStandardButtons(QMessageBox.Open | QMessageBox.Cancel | QMessageBox.Reset)
-        view_message.setDefaultButton(QMessageBox.Open)
+        view_message.setText(names + ' is already editing. You can edit at the same time: changes are merged when saved, and you will be told about any cell someone else changed first. Press "Open" to only view the tasks.')
+        view_message.setStandardButtons(QMessageBox.Yes | QMessageBox.Open | QMessageBox.Cancel)
+        view_message.setDefaultButton(QMessageBox.Yes)
         response = view_message.exec()
-        if response == QMessageBox.Open:
-            return False
-        elif response == QMessageBox.Reset and clearSessionData() == True:
+        # time spent answering is not part of startup
+        global started
+        started = time.perf_counter()
+        if response == QMessageBox.Yes:
             return True
+        elif response == QMessageBox.Open:
+            return False
         else: sys.exit()
     return True
 
 def runApp(edit_on):
+        global lease
         if edit_on:
-            with open(resource_path(Path('data/active_session.txt')), 'w') as f:
-                f.writelines(SESSION_KEY)
+            # hold a lease while editing, renewed in the background until the app quits
+            from src.classes.session_lease import SessionLease
+            lease = SessionLease(sessionsFolder(), SESSION_KEY)
+            lease.acquire()
         from src.classes.main_window import MainWindow
-        window = MainWindow(edit_on)
+        window = MainWindow(edit_on, SESSION_KEY, started)
         app.exec_()
 
 
@@ -0,0 +1,37 @@
+import os
+
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+
+import pytest
+from PyQt5.QtWidgets import QApplication
+
+from benchmarks.synthetic import makeTasks
+from src.classes.pandas_model import PandasModel
+from src.classes.row_ids import withIds
+from src.classes.task_store import TaskStore
+
+
+@pytest.fixture(scope='session')
+def app():
+    """One QApplication for every test that builds a model"""
+    return QApplication.instance() or QApplication([])
+
+
+@pytest.fixture
+def openStore(tmp_path):
+    """Return a function opening a session's TaskStore on a shared snapshot of 50 tasks"""
+    withIds(makeTasks(50)).to_json(str(tmp_path / 'task_data.json'))
+
+    def openStore(name, compact_threshold=2000):
+        return TaskStore(str(tmp_path / 'task_data.json'), str(tmp_path / 'task_journal.jsonl'),
+                         compact_threshold=compact_threshold, session=name + ' 1')
+    return openStore
+
+
+@pytest.fixture
+def openModel(app, openStore):
+    """Return a function opening a session's model on the shared tasks"""
+    def openModel(name, compact_threshold=2000):
+        store = openStore(name, compact_threshold)
+        return PandasModel(store.load(), store)
+    return openModel
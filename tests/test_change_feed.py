@@ -0,0 +1,63 @@
+import time
+
+from PyQt5.QtCore import Qt
+
+from src.classes.change_feed import ChangeFeed
+
+
+def edit(model, row, column, value):
+    """Change a cell the way the view does"""
+    model.setData(model.createIndex(row, model.columnIndex(column)), value, Qt.EditRole)
+
+
+def foldTwice(model):
+    """Save twice through compactions, so the journal copy another session would read is gone"""
+    for value in ('first', 'second'):
+        edit(model, 0, 'Title', value)
+        model.saveToJson()
+
+
+def test_pull_leaves_reload_to_the_caller(openModel):
+    mine = openModel('A', compact_threshold=1)
+    theirs = openModel('B', compact_threshold=1)
+    foldTwice(theirs)
+    edit(mine, 1, 'Notes', 'local')
+
+    sync_point = mine.store.syncPoint()
+    version = mine.version()
+    assert mine.pullChanges(reload=False) is None
+    assert mine.version() == version and mine.store.syncPoint() == sync_point
+
+    assert mine.pullReloaded(sync_point, mine.store.reloaded()) == []
+    assert mine.getItem(0, 0) == 'second'
+    assert mine.getItem(1, mine.columnIndex('Notes')) == 'local'
+    assert not mine.store.hasNewChanges()
+
+
+def test_stale_reload_is_dropped(openModel):
+    mine = openModel('A', compact_threshold=1)
+    theirs = openModel('B', compact_threshold=1)
+    foldTwice(theirs)
+    sync_point = mine.store.syncPoint()
+    reloaded = mine.store.reloaded()
+    # this session catches up on its own before the read is applied
+    assert mine.pullChanges() == []
+    assert mine.pullReloaded(sync_point, reloaded) is None
+
+
+def test_feed_reloads_off_the_gui_thread(app, openModel):
+    mine = openModel('A', compact_threshold=1)
+    theirs = openModel('B', compact_threshold=1)
+    feed = ChangeFeed(mine, mine.store)
+    applied = []
+    feed.changesApplied.connect(lambda: applied.append(True))
+    foldTwice(theirs)
+
+    feed.refresh()
+    deadline = time.monotonic() + 10
+    while not applied and time.monotonic() < deadline:
+        app.processEvents()
+        time.sleep(0.01)
+    feed.stop()
+    assert applied
+    assert mine.getItem(0, 0) == 'second'
@@ -0,0 +1,83 @@
+from PyQt5.QtCore import Qt
+
+from src.classes import edit_history
+from src.classes.edit_history import EditHistory
+
+
+def edit(model, row, column, value):
+    """Change a cell the way the view does"""
+    model.setData(model.createIndex(row, model.columnIndex(column)), value, Qt.EditRole)
+
+
+def titles(model, rows):
+    return [model.getItem(row, model.columnIndex('Title')) for row in rows]
+
+
+def test_insert_keeps_the_rows_left_after_a_partial_remove():
+    history = EditHistory()
+    history.recordInsert(10, 4)  # rows 10-13
+    history.recordEdit(12, 0, 'old', 'new')
+    history.recordEdit(20, 0, 'old', 'new')
+    # rows 9-11 go: the insert loses its first two rows and the edits move up
+    history.rowsRemoved(9, 3)
+    insert, on_insert, after = history._undo
+    assert insert[1:3] == [9, 2]
+    assert on_insert[1] == 9 and after[1] == 17
+    # the rest of the insert goes with row 9, taking the edit on it along
+    history.rowsRemoved(9, 2)
+    assert history._undo == [after] and after[1] == 15
+
+
+def test_remote_remove_of_some_inserted_rows(openModel):
+    mine, theirs = openModel('A'), openModel('B')
+    mine.addRows([{'Title': 'mine %d' % i} for i in range(3)])
+    mine.saveToJson()
+    theirs.pullChanges()
+    assert theirs.removeById(theirs.rowId(51)) == []
+
+    mine.pullChanges()
+    assert titles(mine, [50, 51]) == ['mine 0', 'mine 2']
+    assert mine.history.undoText() == 'Add 2 Tasks'
+    mine.undo()
+    assert mine.totalRowCount() == 50
+    mine.redo()
+    assert titles(mine, [50, 51]) == ['mine 0', 'mine 2']
+
+
+def test_undo_edit_and_insert_then_redo_both(openModel):
+    mine, theirs = openModel('A'), openModel('B')
+    mine.addRows([{'Title': 'new'}])
+    edit(mine, 50, 'Title', 'edited')
+    mine.undo()
+    assert titles(mine, [50]) == ['new']
+    mine.undo()
+    assert mine.totalRowCount() == 50
+
+    # rows saved by another session meanwhile take the place the row had
+    theirs.addRows([{'Title': 'theirs 1'}, {'Title': 'theirs 2'}])
+    theirs.saveToJson()
+    mine.pullChanges()
+    mine.redo()
+    assert titles(mine, [50, 51, 52]) == ['theirs 1', 'theirs 2', 'new']
+    mine.redo()
+    assert titles(mine, [52]) == ['edited']
+    assert not mine.history.canRedo()
+
+    mine.saveToJson()
+    assert titles(openModel('C'), [52]) == ['edited']
+
+
+def test_oldest_step_is_dropped(monkeypatch, openModel):
+    monkeypatch.setattr(edit_history, 'HISTORY_STEPS', 3)
+    model = openModel('A')
+    first = titles(model, [0])[0]
+    for value in ('one', 'two', 'three', 'four'):
+        edit(model, 0, 'Title', value)
+    assert len(model.history._undo) == 3
+    for _ in range(3):
+        model.undo()
+    # the first edit can no longer be undone
+    assert titles(model, [0]) == ['one'] and first != 'one'
+    assert not model.history.canUndo()
+    model.undo()
+    assert titles(model, [0]) == ['one']
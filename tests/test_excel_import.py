@@ -0,0 +1,31 @@
+from datetime import datetime
+
+import pandas as pd
+from openpyxl import Workbook
+
+from benchmarks.synthetic import makeTasks
+from src.classes.excel_import import ExcelImport
+from src.classes.pandas_model import PandasModel
+
+
+def test_date_cells_keep_the_date_column_as_dates(app, tmp_path):
+    model = PandasModel(makeTasks(10))
+    assert pd.api.types.is_datetime64_any_dtype(model.getDataFrame()['Date Created'].dtype)
+
+    workbook = Workbook()
+    sheet = workbook.active
+    sheet.append(['Title', 'Date Created'])
+    sheet.append(['Imported', datetime(2024, 1, 5)])
+    path = str(tmp_path / 'tasks.xlsx')
+    workbook.save(path)
+
+    reader = ExcelImport(path, model.getColumnNames(), {})
+    for _ in reader.chunks():
+        pass
+    dates = model.columnIndex('Date Created')
+    assert reader.rows[0][dates] == '2024-01-05'
+
+    model.addRows(reader.rows)
+    assert model.getItem(10, dates) == '2024-01-05'
+    assert pd.api.types.is_datetime64_any_dtype(model.getDataFrame()['Date Created'].dtype)
+    assert model.getItem(10, dates) == '2024-01-05'
@@ -0,0 +1,83 @@
+import os
+import time
+
+import pytest
+
+from src.classes import file_lock
+from src.classes.file_lock import FileLock
+
+
+def makeStale(path, token='crashed 1 old'):
+    """Leave a lock file behind like a session that crashed long ago"""
+    with open(path, 'w') as f:
+        f.write(token)
+    old = time.time() - 3600
+    os.utime(path, (old, old))
+
+
+def leftovers(tmp_path):
+    return sorted(name for name in os.listdir(tmp_path) if name != 'journal.lock')
+
+
+def test_release_keeps_a_lock_another_session_took_over(tmp_path):
+    path = str(tmp_path / 'journal.lock')
+    lock = FileLock(path)
+    lock.acquire()
+    with open(path, 'w') as f:
+        f.write('other 2 token')
+    lock.release()
+    with open(path) as f:
+        assert f.read() == 'other 2 token'
+
+
+def test_stale_lock_is_taken_over(tmp_path):
+    path = str(tmp_path / 'journal.lock')
+    makeStale(path)
+    lock = FileLock(path, timeout=1)
+    lock.acquire()
+    with open(path) as f:
+        assert f.read() == lock._token
+    lock.release()
+    assert not os.path.exists(path)
+    assert leftovers(tmp_path) == []
+
+
+def test_only_one_session_takes_over_a_stale_lock(tmp_path):
+    path = str(tmp_path / 'journal.lock')
+    makeStale(path)
+    first, second = FileLock(path, timeout=1), FileLock(path, timeout=1)
+    # both see the same stale lock, the first one takes it over before the second acts
+    stale = second._staleToken()
+    assert stale is not None
+    first.acquire()
+    second._takeOver(stale)
+    with open(path) as f:
+        assert f.read() == first._token
+    with pytest.raises(TimeoutError):
+        second.acquire(timeout=0.2)
+    first.release()
+    second.acquire(timeout=1)
+    second.release()
+    assert leftovers(tmp_path) == []
+
+
+def test_clock_ahead_does_not_make_a_lock_stale(tmp_path, monkeypatch):
+    path = str(tmp_path / 'journal.lock')
+    holder = FileLock(path)
+    holder.acquire()
+    clock = time.time
+    monkeypatch.setattr(file_lock.time, 'time', lambda: clock() + 120)
+    assert FileLock(path)._staleToken() is None
+    holder.release()
+
+
+def test_held_lock_is_kept_fresh(tmp_path):
+    path = str(tmp_path / 'journal.lock')
+    holder = FileLock(path, stale_after=0.4)
+    holder.acquire()
+    old = time.time() - 10
+    os.utime(path, (old, old))
+    time.sleep(0.3)
+    # a save running longer than stale_after is not taken over
+    assert FileLock(path, stale_after=0.4)._staleToken() is None
+    holder.release()
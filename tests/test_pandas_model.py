@@ -0,0 +1,19 @@
+import numpy as np
+import pandas as pd
+
+from benchmarks.synthetic import makeTasks
+from src.classes.pandas_model import PandasModel
+
+
+def test_appended_cells_read_the_same_before_and_after_concatenating(app):
+    model = PandasModel(makeTasks(10))
+    columns = model.getColumnNames()
+    rows = pd.DataFrame([[None] * len(columns), [np.nan] * len(columns)], columns=columns)
+    rows['Title'] = ['no notes', float('nan')]
+    model.addRows(rows)
+
+    notes = model.columnIndex('Notes')
+    before = [(model.getItem(row, 0), model.getItem(row, notes)) for row in (10, 11)]
+    assert before == [('no notes', ''), ('', '')]
+    model.getDataFrame()  # concatenates the appended rows into the frame
+    assert [(model.getItem(row, 0), model.getItem(row, notes)) for row in (10, 11)] == before
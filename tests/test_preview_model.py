@@ -0,0 +1,35 @@
+from PyQt5.QtCore import Qt
+
+from src.classes.preview_model import PreviewModel
+
+
+def test_preview_follows_removed_rows(openModel):
+    model = openModel('A')
+    model.addRows([{'Title': 'extra %d' % i} for i in range(3)])
+    preview = PreviewModel(model, [['staged'] + [''] * (model.columnCount() - 1)])
+    assert preview.rowCount() == 54
+
+    # undoing the insert removes the rows the preview was showing
+    model.undo()
+    assert preview.rowCount() == 51
+    assert preview.firstNewRow() == 50
+    assert preview.data(preview.index(49, 0)) == model.getItem(49, 0)
+    assert preview.data(preview.index(50, 0)) == 'staged'
+    assert preview.data(preview.index(50, 0), Qt.BackgroundRole) is not None
+
+    task_id = model.rowId(0)
+    model.removeById(task_id)
+    assert preview.rowCount() == 50
+    assert preview.data(preview.index(49, 0)) == 'staged'
+
+
+def test_preview_reads_are_clamped(openModel):
+    model = openModel('A')
+    preview = PreviewModel(model, [['staged'] + [''] * (model.columnCount() - 1)])
+    # rows removed without a signal reaching the preview yet are not read
+    model.rowsRemoved.disconnect(preview._sourceChanged)
+    model.removeById(model.rowId(49))
+    assert preview.rowCount() == 50
+    assert preview.data(preview.index(49, 0)) == 'staged'
+    # a view still asking for the old last row gets nothing rather than an IndexError
+    assert not isinstance(preview.data(preview.createIndex(50, 0)), str)
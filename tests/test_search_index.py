@@ -0,0 +1,86 @@
+import numpy as np
+import pandas as pd
+
+from src.classes import search_index
+from src.classes.pandas_model import PandasModel
+from src.classes.search_index import SearchIndex
+
+
+def makeIndex():
+    data = pd.DataFrame({'Title': ['Fix printer', 'Order toner', 'printer jam - urgent', 'Call #42'],
+                         'Status': ['Active', 'Done', 'Active', 'Active'],
+                         'ID': [1, 2, 3, 4]})
+    return SearchIndex.build(data)
+
+
+def rowsOf(mask):
+    return np.flatnonzero(mask).tolist()
+
+
+def test_prefix_and_scoped_terms():
+    index = makeIndex()
+    assert rowsOf(index.query('print', 4)) == [0, 2]
+    assert rowsOf(index.query('print status:act', 4)) == [0, 2]
+    assert rowsOf(index.query('status:done', 4)) == [1]
+    assert rowsOf(index.query('owner:me', 4)) == []
+
+
+def test_terms_without_words():
+    index = makeIndex()
+    # nothing to look up in the index, so without a scan they match nothing rather than everything
+    assert rowsOf(index.query('-', 4)) == []
+    assert rowsOf(index.query('status:', 4)) == []
+    assert rowsOf(index.query('printer status:', 4)) == []
+
+    scanned = []
+
+    def scan(columns, value):
+        scanned.append((columns, value))
+        return np.array([False, False, True, False])
+    assert rowsOf(index.query('printer -', 4, scan)) == [2]
+    assert scanned == [(['Title', 'Status'], '-')]
+    assert rowsOf(index.query('status:', 4, scan)) == []
+
+
+def test_edits_and_appends():
+    index = makeIndex()
+    index.update(0, 'Title', 'Fix printer', 'Replace fuser')
+    assert rowsOf(index.query('print', 4)) == [2]
+    assert rowsOf(index.query('fuser', 4)) == [0]
+    # edited again before the next compaction
+    index.update(0, 'Title', 'Replace fuser', 'Replace drum')
+    assert rowsOf(index.query('fuser', 4)) == []
+
+    index.append(4, [['New printer', 'Active', 5], ['Mouse', 'Done', 6]])
+    assert rowsOf(index.query('print', 6)) == [2, 4]
+    assert rowsOf(index.query('status:done', 6)) == [1, 5]
+    assert index.changed
+
+
+def test_compaction_keeps_results(monkeypatch, tmp_path):
+    monkeypatch.setattr(search_index, 'COMPACT_CHANGES', 3)
+    index = makeIndex()
+    index.update(1, 'Title', 'Order toner', 'Order paper')
+    index.append(4, [['Paper tray', 'Active', 5], ['Toner low', 'Active', 6]])
+    postings = index._postings['Title']
+    # the appends pushed the pending changes past the limit, so they were folded into the arrays
+    assert not postings.added and not postings.stale
+    assert rowsOf(index.query('paper', 6)) == [1, 4]
+    assert rowsOf(index.query('toner', 6)) == [5]
+
+    path = str(tmp_path / 'search_index.npz')
+    index.update(3, 'Title', 'Call #42', 'Call back')
+    index.fingerprint = 'saved'
+    index.save(path)
+    loaded = SearchIndex.load(path, 'saved')
+    assert rowsOf(loaded.query('call', 6)) == [3]
+    assert rowsOf(loaded.query('42', 6)) == []
+    assert SearchIndex.load(path, 'other') is None
+
+
+def test_model_scans_terms_without_words(app):
+    model = PandasModel(pd.DataFrame({'Title': ['a - b', 'c@d', 'plain'], 'Notes': ['', '', 'x-y']}))
+    assert rowsOf(model.searchMask('-')) == [0, 2]
+    assert rowsOf(model.searchMask('@')) == [1]
+    assert rowsOf(model.searchMask('notes:-')) == [2]
+    assert rowsOf(model.searchMask('-', np.array([1, 2]))) == [2]
@@ -0,0 +1,122 @@
+from PyQt5.QtCore import Qt
+
+from src.classes.column_types import plainFrame
+from src.classes.filter_proxy import TaskFilterProxy
+
+
+def edit(model, row, column, value):
+    """Change a cell the way the view does"""
+    model.setData(model.createIndex(row, model.columnIndex(column)), value, Qt.EditRole)
+
+
+def cell(model, row, column):
+    return model.getItem(row, model.columnIndex(column))
+
+
+def assertSaved(model, openStore):
+    """Check a fresh session loads exactly what the model shows"""
+    fresh = plainFrame(openStore('C').load()).astype(str)
+    mine = plainFrame(model.getDataFrame()).astype(str)
+    assert fresh.shape == mine.shape
+    assert (fresh.values == mine.values).all()
+
+
+def test_conflicting_edit_keeps_the_first_save(openModel, openStore):
+    mine, theirs = openModel('A'), openModel('B')
+    edit(theirs, 2, 'Notes', 'theirs')
+    edit(mine, 2, 'Notes', 'mine')
+    edit(mine, 3, 'Notes', 'only mine')
+    assert theirs.saveToJson() == []
+
+    conflicts = mine.saveToJson()
+    assert conflicts == [{'row': 2, 'column': 'Notes', 'mine': 'mine', 'theirs': 'theirs', 'session': 'B 1'}]
+    assert cell(mine, 2, 'Notes') == 'theirs'
+    assert cell(mine, 3, 'Notes') == 'only mine'
+    assert mine.totalRowCount() == 50
+    assertSaved(mine, openStore)
+
+
+def test_remote_remove_of_an_edited_row(openModel, openStore):
+    mine, theirs = openModel('A'), openModel('B')
+    removed = theirs.rowId(3)
+    kept = theirs.rowId(4)
+    assert theirs.removeById(removed) == []
+    edit(mine, 3, 'Notes', 'lost')
+    edit(mine, 4, 'Notes', 'kept')
+
+    conflicts = mine.saveToJson()
+    assert [(c['row'], c['column'], c['theirs']) for c in conflicts] == [(3, 'Notes', None)]
+    assert mine.totalRowCount() == 49
+    assert mine.rowForId(removed) is None
+    assert mine.rowForId(kept) == 3 and cell(mine, 3, 'Notes') == 'kept'
+    assertSaved(mine, openStore)
+
+
+def test_remote_clear_then_local_add(openModel, openStore):
+    mine, theirs = openModel('A'), openModel('B')
+    proxy = TaskFilterProxy()
+    proxy.setSourceModel(mine)
+    changed = []
+    mine.dataChanged.connect(lambda top_left, bottom_right: changed.append(top_left.row()))
+    # more rows than one fetch, so a model that stopped fetching shows it
+    theirs.clearAllData()
+    theirs.addRows([{'Title': 'theirs %d' % i} for i in range(800)])
+    theirs.saveToJson()
+
+    assert mine.pullChanges() == []
+    assert mine.rowCount() == mine.totalRowCount() == 800
+    mine.addRows([{'Title': 'mine'}])
+    assert mine.rowCount() == 801
+    assert proxy.sourceRows()[-1] == 800
+    edit(mine, 700, 'Title', 'edited')
+    assert changed == [700]
+
+    mine.saveToJson()
+    assert cell(mine, 800, 'Title') == 'mine'
+    assertSaved(mine, openStore)
+
+
+def test_journal_cut_off_mid_write(openModel, openStore):
+    model = openModel('A')
+    edit(model, 0, 'Title', 'saved')
+    model.saveToJson()
+    edit(model, 1, 'Title', 'torn')
+    model.saveToJson()
+    # the last batch was only partly written when the session went away
+    store = openStore('B')
+    with open(store.journal_path, 'rb') as f:
+        content = f.read()
+    last = content.rindex(b'\n', 0, len(content) - 1) + 1
+    with open(store.journal_path, 'wb') as f:
+        f.write(content[:last + (len(content) - last) // 2])
+
+    reopened = openModel('B')
+    assert cell(reopened, 0, 'Title') == 'saved'
+    assert cell(reopened, 1, 'Title') != 'torn'
+    # the next save replaces the torn batch instead of appending after it
+    edit(reopened, 2, 'Title', 'after')
+    reopened.saveToJson()
+    assert cell(openModel('D'), 2, 'Title') == 'after'
+    assertSaved(reopened, openStore)
+
+
+def test_undo_redo_across_a_merge(openModel, openStore):
+    mine, theirs = openModel('A'), openModel('B')
+    mine.addRows([{'Title': 'mine'}])
+    edit(mine, 50, 'Notes', 'note')
+    theirs.addRows([{'Title': 'theirs 1'}, {'Title': 'theirs 2'}])
+    theirs.saveToJson()
+
+    mine.pullChanges()
+    # the rows saved by the other session go in before this session's new row
+    assert [cell(mine, row, 'Title') for row in (50, 51, 52)] == ['theirs 1', 'theirs 2', 'mine']
+    mine.undo()
+    assert cell(mine, 52, 'Notes') == ''
+    mine.undo()
+    assert mine.totalRowCount() == 52 and cell(mine, 51, 'Title') == 'theirs 2'
+    mine.redo()
+    mine.redo()
+    assert cell(mine, 52, 'Title') == 'mine' and cell(mine, 52, 'Notes') == 'note'
+
+    mine.saveToJson()
+    assertSaved(mine, openStore)